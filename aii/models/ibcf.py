@@ -1,9 +1,12 @@
 # aii/models/ibcf.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 import os
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -40,6 +43,18 @@ class ModelConfig:
     min_common_raters: int = 2
     topk_sim_per_item: int = 200
 
+    # deadline handling: stop expanding history seeds once less than
+    # `deadline_reserve_ms` is left (kept for ranking + explanations)
+    deadline_reserve_ms: float = 10.0
+    deadline_check_every: int = 16
+
+    # per-user ranked-list cache (filled by recommend() and the warm-up batch).
+    # Rows are stored as numpy arrays (24 bytes each); whichever of the user
+    # count and the memory cap is hit first evicts the least recently used.
+    ranked_cache_users: int = 4096
+    ranked_cache_depth: int = 500
+    ranked_cache_mb: float = 64.0
+
     def __post_init__(self) -> None:
         if not self.ratings_csv:
             self.ratings_csv = os.path.join(self.processed_dir, "ratings.csv")
@@ -51,6 +66,28 @@ class ModelConfig:
             self.sims_cache = os.path.join(self.processed_dir, "item_sims.npz")
 
 
+@dataclass
+class RecommendTrace:
+    """
+    Per-call facts filled in by recommend() when the caller passes one.
+    Stage timers only run when `timed` is set; without a trace nothing is recorded.
+    """
+
+    timed: bool = True
+    path: str = ""  # history | seed_only | popular
+    degraded: bool = False
+    cache_hit: bool = False
+    history_size: int = 0
+    seeds_expanded: int = 0
+    candidates: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> ms
+
+    def lap(self, stage: str, t0: float) -> float:
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + (now - t0) * 1000.0
+        return now
+
+
 class IBCFRecommender:
     """
     Baseline Item-Based CF:
@@ -73,6 +110,11 @@ class IBCFRecommender:
         self.movie_title: Dict[int, str] = {}
         self.movie_genres: Dict[int, set[str]] = {}
 
+        # user -> (movies, preds, seeds (-1: none), complete); complete=False when cut at depth
+        self._ranked: OrderedDict[int, Tuple[np.ndarray, np.ndarray, np.ndarray, bool]] = OrderedDict()
+        self._ranked_bytes = 0
+        self._ranked_lock = threading.Lock()
+
     def load(self) -> None:
         try:
             self.ratings = pd.read_csv(self.cfg.ratings_csv)
@@ -188,13 +230,22 @@ class IBCFRecommender:
         exclude_movie_ids: Optional[List[int]] = None,
         use_social: bool = False,
         seed_movie_ids: Optional[List[int]] = None,
+        deadline: Optional[float] = None,
+        trace: Optional[RecommendTrace] = None,
     ) -> List[Dict]:
+        """
+        `deadline` is a time.monotonic() timestamp. When it would be exceeded we
+        expand fewer history seeds (highest-rated first), or serve the popular
+        list if there's no time at all, and set `trace.degraded`.
+        """
         if limit > self.cfg.max_k:
             limit = self.cfg.max_k
 
         exclude = set(exclude_movie_ids or [])
         hist = list(self.user_hist.get(int(user_id), []))  # copy
         seen = {mid for mid, _ in hist}
+        if trace is not None:
+            trace.history_size = len(hist)
 
         seed_movie_ids = [int(m) for m in (seed_movie_ids or []) if int(m) not in exclude]
         effective_seen = set(seen) | set(seed_movie_ids)
@@ -203,9 +254,33 @@ class IBCFRecommender:
         if len(effective_seen) < self.cfg.min_user_history:
             if seed_movie_ids:
                 return self._seed_only_recommend(
-                    seed_movie_ids, limit=limit, offset=offset, exclude=exclude, use_social=use_social
+                    seed_movie_ids,
+                    limit=limit,
+                    offset=offset,
+                    exclude=exclude,
+                    use_social=use_social,
+                    deadline=deadline,
+                    trace=trace,
                 )
-            return self._popular_fallback(limit=limit, offset=offset, exclude=exclude)
+            return self._popular_fallback(limit=limit, offset=offset, exclude=exclude, trace=trace)
+
+        timed = trace is not None and trace.timed
+        t = time.perf_counter() if timed else 0.0
+        if trace is not None:
+            trace.path = "history"
+
+        # The cached ranking is history-only; seeds change the ranking itself,
+        # excludes just drop entries so they can be filtered out of it
+        if not seed_movie_ids:
+            window = self._cached_window(int(user_id), limit=limit, offset=offset, exclude=exclude)
+            if window is not None:
+                if trace is not None:
+                    trace.cache_hit = True
+                if timed:
+                    t = trace.lap("cache", t)
+                if not window:
+                    return self._popular_fallback(limit=limit, offset=offset, exclude=exclude, trace=trace)
+                return self._explain_ranked(window, offset, int(user_id), use_social, trace, t)
 
         # Add seeds to history as "soft likes"
         for mid in seed_movie_ids:
@@ -213,74 +288,127 @@ class IBCFRecommender:
                 hist.append((mid, 4.0))
                 seen.add(mid)
 
-        num: Dict[int, float] = {}
-        den: Dict[int, float] = {}
-        best_seed: Dict[int, Tuple[int, float]] = {}
+        ranked = self._score_history(hist, seen, exclude, deadline=deadline, trace=trace)
+        if timed:
+            t = trace.lap("candidates", t)
 
-        for seed_mid, seed_r in hist:
-            for other_mid, sim, _common in self.item_sims.get(seed_mid, []):
-                if other_mid in seen or other_mid in exclude:
-                    continue
-                contrib = sim * seed_r
-                num[other_mid] = num.get(other_mid, 0.0) + contrib
-                den[other_mid] = den.get(other_mid, 0.0) + abs(sim)
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        if not seed_movie_ids and not exclude and not (trace is not None and trace.degraded):
+            self._ranked_put(int(user_id), ranked)
+        window = ranked[offset : offset + limit]
+        if timed:
+            t = trace.lap("rank", t)
 
-                prev = best_seed.get(other_mid)
-                if prev is None or contrib > prev[1]:
-                    best_seed[other_mid] = (seed_mid, contrib)
+        if not window:
+            return self._popular_fallback(limit=limit, offset=offset, exclude=exclude, trace=trace)
 
+        return self._explain_ranked(window, offset, int(user_id), use_social, trace, t)
+
+    def rank_batch(self, user_ids: Iterable[int], deadline: Optional[float] = None) -> int:
+        """
+        Precompute and cache full rankings for several users (start-up warm-up).
+        Stops early at `deadline` (time.monotonic()); returns how many were ranked.
+        """
+        done = 0
+        for uid in user_ids:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            uid = int(uid)
+            hist = self.user_hist.get(uid, [])
+            if len(hist) < self.cfg.min_user_history:
+                continue
+            with self._ranked_lock:
+                if uid in self._ranked:
+                    continue
+            ranked = self._score_history(list(hist), {mid for mid, _ in hist}, set())
+            ranked.sort(key=lambda x: x[1], reverse=True)
+            self._ranked_put(uid, ranked)
+            done += 1
+        return done
+
+    def most_active_users(self, n: int) -> List[int]:
+        """Users with the most ratings, most active first."""
+        by_count = sorted(self.user_hist.items(), key=lambda kv: len(kv[1]), reverse=True)
+        return [uid for uid, _ in by_count[: max(0, n)]]
+
+    def _score_history(
+        self,
+        hist: List[Tuple[int, float]],
+        seen: set[int],
+        exclude: set[int],
+        deadline: Optional[float] = None,
+        trace: Optional[RecommendTrace] = None,
+    ) -> List[Tuple[int, float, Optional[int]]]:
+        """Unsorted (movie, prediction, best seed) for every candidate."""
+        num, den, best_seed = self._expand(hist, seen, exclude, deadline=deadline, trace=trace)
         scored = []
         for mid, n in num.items():
             d = den.get(mid, 1e-9)
-            scored.append((mid, float(n / d)))
-
-        scored.sort(key=lambda x: x[1], reverse=True)
-        window = scored[offset : offset + limit]
-
-        if not window:
-            return self._popular_fallback(limit=limit, offset=offset, exclude=exclude)
-
-        vals = [s for _, s in window]
-        vmin, vmax = min(vals), max(vals)
-
-        def to01(x: float) -> float:
-            if vmax - vmin < 1e-9:
-                return 0.5
-            return (x - vmin) / (vmax - vmin)
-
-        items: List[Dict] = []
-        for rank_idx, (mid, pred) in enumerate(window, start=1):
-            seed_mid, _ = best_seed.get(mid, (None, 0.0))
-
-            # Explanation (Phase 3)
-            if ReasonInput is not None:
-                reason = generate_reason(
-                    ReasonInput(
-                        user_id=int(user_id),
-                        rec_movie_id=int(mid),
-                        seed_movie_id=int(seed_mid) if seed_mid else None,
-                        movie_title=self.movie_title,
-                        movie_genres=self.movie_genres,
-                        use_social=use_social,
-                        friend_ids=None,
-                    )
-                )
-            else:
-                reason = generate_reason()
-
-            items.append(
-                {
-                    "movie_id": int(mid),
-                    "score": float(to01(pred)),
-                    "rank": int(offset + rank_idx),
-                    "explanation": {
-                        "primary_reason": reason["primary_reason"],
-                        "confidence": float(reason["confidence"]),
-                        "text": reason["text"],
-                        "factors": reason["factors"],
-                    },
-                }
-            )
+            scored.append((mid, float(n / d), best_seed[mid][0] if mid in best_seed else None))
+        return scored
+
+    @staticmethod
+    def _entry_bytes(entry: Tuple[np.ndarray, np.ndarray, np.ndarray, bool]) -> int:
+        return entry[0].nbytes + entry[1].nbytes + entry[2].nbytes
+
+    def _ranked_put(self, user_id: int, ranked: List[Tuple[int, float, Optional[int]]]) -> None:
+        top = ranked[: self.cfg.ranked_cache_depth]
+        entry = (
+            np.fromiter((mid for mid, _, _ in top), dtype=np.int64, count=len(top)),
+            np.fromiter((pred for _, pred, _ in top), dtype=np.float64, count=len(top)),
+            np.fromiter((-1 if seed is None else seed for _, _, seed in top), dtype=np.int64, count=len(top)),
+            len(ranked) <= len(top),
+        )
+        max_bytes = self.cfg.ranked_cache_mb * 1024 * 1024
+        with self._ranked_lock:
+            old = self._ranked.pop(user_id, None)
+            if old is not None:
+                self._ranked_bytes -= self._entry_bytes(old)
+            self._ranked[user_id] = entry
+            self._ranked_bytes += self._entry_bytes(entry)
+            # never evicts the entry just added
+            while len(self._ranked) > 1 and (
+                len(self._ranked) > self.cfg.ranked_cache_users or self._ranked_bytes > max_bytes
+            ):
+                _, evicted = self._ranked.popitem(last=False)
+                self._ranked_bytes -= self._entry_bytes(evicted)
+
+    def _cached_window(
+        self, user_id: int, limit: int, offset: int, exclude: set[int]
+    ) -> Optional[List[Tuple[int, float, Optional[int]]]]:
+        """Window from the cached ranking, or None if it isn't cached / doesn't reach that far."""
+        with self._ranked_lock:
+            entry = self._ranked.get(user_id)
+            if entry is None:
+                return None
+            self._ranked.move_to_end(user_id)
+        movies, preds, seeds, complete = entry
+        if exclude:
+            keep = ~np.isin(movies, np.fromiter(exclude, dtype=np.int64, count=len(exclude)))
+            movies, preds, seeds = movies[keep], preds[keep], seeds[keep]
+        if not complete and offset + limit > len(movies):
+            return None
+        window = slice(offset, offset + limit)
+        return [
+            (mid, pred, None if seed < 0 else seed)
+            for mid, pred, seed in zip(movies[window].tolist(), preds[window].tolist(), seeds[window].tolist())
+        ]
+
+    def _explain_ranked(
+        self,
+        window: List[Tuple[int, float, Optional[int]]],
+        offset: int,
+        user_id: int,
+        use_social: bool,
+        trace: Optional[RecommendTrace],
+        t: float,
+    ) -> List[Dict]:
+        best_seed = {mid: (seed, 0.0) for mid, _, seed in window if seed is not None}
+        items = self._explain_window(
+            [(mid, pred) for mid, pred, _ in window], best_seed, offset, reason_user_id=user_id, use_social=use_social
+        )
+        if trace is not None and trace.timed:
+            trace.lap("explain", t)
         return items
 
     def explain(self, user_id: int, movie_id: int, use_social: bool = False) -> Dict:
@@ -332,33 +460,43 @@ class IBCFRecommender:
         offset: int,
         exclude: set[int],
         use_social: bool,
+        deadline: Optional[float] = None,
+        trace: Optional[RecommendTrace] = None,
     ) -> List[Dict]:
+        timed = trace is not None and trace.timed
+        t = time.perf_counter() if timed else 0.0
+        if trace is not None:
+            trace.path = "seed_only"
+
         hist = [(int(mid), 4.0) for mid in seed_movie_ids if int(mid) not in exclude]
         seen = {mid for mid, _ in hist}
 
-        num: Dict[int, float] = {}
-        den: Dict[int, float] = {}
-        best_seed: Dict[int, Tuple[int, float]] = {}
-
-        for seed_mid, seed_r in hist:
-            for other_mid, sim, _common in self.item_sims.get(seed_mid, []):
-                if other_mid in seen or other_mid in exclude:
-                    continue
-                contrib = sim * seed_r
-                num[other_mid] = num.get(other_mid, 0.0) + contrib
-                den[other_mid] = den.get(other_mid, 0.0) + abs(sim)
-
-                prev = best_seed.get(other_mid)
-                if prev is None or contrib > prev[1]:
-                    best_seed[other_mid] = (seed_mid, contrib)
+        num, den, best_seed = self._expand(hist, seen, exclude, deadline=deadline, trace=trace)
+        if timed:
+            t = trace.lap("candidates", t)
 
         scored = [(mid, n / max(den.get(mid, 1e-9), 1e-9)) for mid, n in num.items()]
         scored.sort(key=lambda x: x[1], reverse=True)
         window = scored[offset : offset + limit]
+        if timed:
+            t = trace.lap("rank", t)
 
         if not window:
-            return self._popular_fallback(limit=limit, offset=offset, exclude=exclude)
+            return self._popular_fallback(limit=limit, offset=offset, exclude=exclude, trace=trace)
+
+        out = self._explain_window(window, best_seed, offset, reason_user_id=-1, use_social=use_social)
+        if timed:
+            trace.lap("explain", t)
+        return out
 
+    def _explain_window(
+        self,
+        window: List[Tuple[int, float]],
+        best_seed: Dict[int, Tuple[int, float]],
+        offset: int,
+        reason_user_id: int,
+        use_social: bool,
+    ) -> List[Dict]:
         vals = [s for _, s in window]
         vmin, vmax = min(vals), max(vals)
 
@@ -367,14 +505,15 @@ class IBCFRecommender:
                 return 0.5
             return (x - vmin) / (vmax - vmin)
 
-        out: List[Dict] = []
-        for idx, (mid, pred) in enumerate(window, start=1):
+        items: List[Dict] = []
+        for rank_idx, (mid, pred) in enumerate(window, start=1):
             seed_mid, _ = best_seed.get(mid, (None, 0.0))
 
+            # Explanation (Phase 3)
             if ReasonInput is not None:
                 reason = generate_reason(
                     ReasonInput(
-                        user_id=-1,
+                        user_id=reason_user_id,
                         rec_movie_id=int(mid),
                         seed_movie_id=int(seed_mid) if seed_mid else None,
                         movie_title=self.movie_title,
@@ -386,11 +525,11 @@ class IBCFRecommender:
             else:
                 reason = generate_reason()
 
-            out.append(
+            items.append(
                 {
                     "movie_id": int(mid),
                     "score": float(to01(pred)),
-                    "rank": int(offset + idx),
+                    "rank": int(offset + rank_idx),
                     "explanation": {
                         "primary_reason": reason["primary_reason"],
                         "confidence": float(reason["confidence"]),
@@ -399,10 +538,60 @@ class IBCFRecommender:
                     },
                 }
             )
-        return out
+        return items
+
+    def _expand(
+        self,
+        hist: List[Tuple[int, float]],
+        seen: set[int],
+        exclude: set[int],
+        deadline: Optional[float] = None,
+        trace: Optional[RecommendTrace] = None,
+    ) -> Tuple[Dict[int, float], Dict[int, float], Dict[int, Tuple[int, float]]]:
+        """Accumulate sim-weighted ratings over the neighbours of each history seed."""
+        num: Dict[int, float] = {}
+        den: Dict[int, float] = {}
+        best_seed: Dict[int, Tuple[int, float]] = {}
+
+        cutoff = None
+        if deadline is not None:
+            cutoff = deadline - self.cfg.deadline_reserve_ms / 1000.0
+            # under a deadline, expand the most informative seeds first
+            hist = sorted(hist, key=lambda x: x[1], reverse=True)
+        check_every = max(1, self.cfg.deadline_check_every)
 
-    def _popular_fallback(self, limit: int, offset: int, exclude: set[int]) -> List[Dict]:
+        expanded = 0
+        for seed_mid, seed_r in hist:
+            if cutoff is not None and expanded % check_every == 0 and time.monotonic() >= cutoff:
+                if trace is not None:
+                    trace.degraded = True
+                break
+            expanded += 1
+            for other_mid, sim, _common in self.item_sims.get(seed_mid, []):
+                if other_mid in seen or other_mid in exclude:
+                    continue
+                contrib = sim * seed_r
+                num[other_mid] = num.get(other_mid, 0.0) + contrib
+                den[other_mid] = den.get(other_mid, 0.0) + abs(sim)
+
+                prev = best_seed.get(other_mid)
+                if prev is None or contrib > prev[1]:
+                    best_seed[other_mid] = (seed_mid, contrib)
+
+        if trace is not None:
+            trace.seeds_expanded = expanded
+            trace.candidates = len(num)
+        return num, den, best_seed
+
+    def _popular_fallback(
+        self, limit: int, offset: int, exclude: set[int], trace: Optional[RecommendTrace] = None
+    ) -> List[Dict]:
         assert self.popular is not None
+        timed = trace is not None and trace.timed
+        t = time.perf_counter() if timed else 0.0
+        if trace is not None:
+            trace.path = "popular"
+
         rows = self.popular[~self.popular["movie_id"].isin(list(exclude))].iloc[offset : offset + limit]
         items = []
         for idx, r in enumerate(rows.itertuples(index=False), start=1):
@@ -425,4 +614,6 @@ class IBCFRecommender:
                     },
                 }
             )
+        if timed:
+            trace.lap("fallback", t)
         return items
@@ -1,17 +1,42 @@
 # aii/serving/app.py
 from __future__ import annotations
 
+import asyncio
 import os
 import time
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
-from aii.models.ibcf import IBCFRecommender, ModelConfig
+from aii.models.ibcf import IBCFRecommender, ModelConfig, RecommendTrace
+from aii.serving import metrics as ai_metrics
+from aii.serving.executor import Overloaded, ScoringExecutor
+from aii.serving.responses import FastJSONResponse, negotiate
 
 INTERNAL_TOKEN = os.environ.get("AI_INTERNAL_TOKEN", "dev-internal-token")
 
+# Scoring concurrency: workers default to the core count; the queue bounds how
+# many requests may wait for a worker before we fast-fail with 503 OVERLOADED.
+SCORING_WORKERS = int(os.environ.get("AI_SCORING_WORKERS", "0")) or None
+SCORING_QUEUE = int(os.environ["AI_SCORING_QUEUE"]) if os.environ.get("AI_SCORING_QUEUE") else None
+
+# Per-stage timers inside recommend(); counts and /metrics histograms are kept either way
+STAGE_TIMINGS = os.environ.get("AI_STAGE_TIMINGS", "true").lower() == "true"
+
+# Start-up warm-up: rank the N most active users into the model's ranking cache.
+# Batches run on the scoring executor only while it is idle; one batch is the
+# longest a request can wait behind the warm-up, so they stay small.
+WARMUP_USERS = int(os.environ.get("AI_WARMUP_USERS", "500"))
+WARMUP_BUDGET_S = float(os.environ.get("AI_WARMUP_BUDGET_S", "60"))
+WARMUP_BATCH = 5
+
+# Ranking cache: room for the warmed users and as many again ranked online
+# (the model also caps it at ranked_cache_mb)
+RANKED_CACHE_USERS = int(os.environ.get("AI_RANKED_CACHE_USERS", "0")) or max(1024, 2 * WARMUP_USERS)
+RANKED_CACHE_MB = float(os.environ.get("AI_RANKED_CACHE_MB", "64"))
+
 
 def api_error(code: str, message: str, details: Optional[dict] = None, status_code: int = 400):
     raise HTTPException(
@@ -40,6 +65,7 @@ class RecommendRequest(BaseModel):
     offset: int = 0
     exclude_movie_ids: list[int] = Field(default_factory=list)
     context: Context = Field(default_factory=Context)
+    include_timings: bool = False
 
 
 class ExplainRequest(BaseModel):
@@ -49,20 +75,62 @@ class ExplainRequest(BaseModel):
     context: Context = Field(default_factory=Context)
 
 
-app = FastAPI(title="NUVIE AI Service", version="0.3.0")
+app = FastAPI(title="NUVIE AI Service", version="0.3.0", default_response_class=FastJSONResponse)
 
 model: Optional[IBCFRecommender] = None
+scoring = ScoringExecutor(max_workers=SCORING_WORKERS, max_queue=SCORING_QUEUE)
+warmup: Dict[str, Any] = {"state": "pending", "users_total": 0, "users_done": 0, "elapsed_ms": 0}
+_warmup_task: Optional[asyncio.Task] = None
+
+
+async def _warm_up(m: IBCFRecommender, n_users: int, budget_s: float) -> None:
+    """Rank the most active users in batches (low priority) until done or out of budget."""
+    t0 = time.monotonic()
+    deadline = t0 + budget_s
+    users = m.most_active_users(n_users)
+    warmup.update(state="running", users_total=len(users), users_done=0, budget_s=budget_s)
+    try:
+        for i in range(0, len(users), WARMUP_BATCH):
+            if time.monotonic() >= deadline:
+                warmup["state"] = "budget_exhausted"
+                break
+            batch = users[i : i + WARMUP_BATCH]
+            ranked = await scoring.run_background(m.rank_batch, batch, deadline=deadline)
+            warmup["users_done"] += ranked
+            warmup["elapsed_ms"] = int((time.monotonic() - t0) * 1000)
+            # short because the deadline cut the batch, not because users were skipped
+            if ranked < len(batch) and time.monotonic() >= deadline:
+                warmup["state"] = "budget_exhausted"
+                break
+        else:
+            warmup["state"] = "done"
+    except Exception as e:  # warm-up is best effort, never take the service down
+        warmup.update(state="failed", error=str(e))
+    warmup["elapsed_ms"] = int((time.monotonic() - t0) * 1000)
 
 
 @app.on_event("startup")
-def _startup():
-    global model
-    m = IBCFRecommender(ModelConfig())
+async def _startup():
+    global model, _warmup_task
+    m = IBCFRecommender(ModelConfig(ranked_cache_users=RANKED_CACHE_USERS, ranked_cache_mb=RANKED_CACHE_MB))
     m.load()
     # IMPORTANT: caches similarities to disk so startup is fast after first run
     m.load_or_fit()
     model = m
 
+    # serve immediately; the warm-up fills the ranking cache when the executor is idle
+    if WARMUP_USERS > 0 and WARMUP_BUDGET_S > 0:
+        _warmup_task = asyncio.get_running_loop().create_task(_warm_up(m, WARMUP_USERS, WARMUP_BUDGET_S))
+    else:
+        warmup["state"] = "disabled"
+
+
+@app.on_event("shutdown")
+def _shutdown():
+    if _warmup_task is not None:
+        _warmup_task.cancel()
+    scoring.shutdown()
+
 
 def _auth_or_401(x_internal_token: Optional[str]):
     if x_internal_token != INTERNAL_TOKEN:
@@ -70,16 +138,53 @@ def _auth_or_401(x_internal_token: Optional[str]):
     return True
 
 
+async def _run_scoring(fn, *args, **kwargs):
+    try:
+        return await scoring.run(fn, *args, **kwargs)
+    except Overloaded:
+        api_error(
+            "OVERLOADED",
+            "Scoring capacity exhausted, retry later",
+            details={"queue_depth": scoring.queue_depth, "capacity": scoring.capacity},
+            status_code=503,
+        )
+
+
 @app.get("/health")
 def health():
-    return {"ok": True, "model_loaded": model is not None}
+    return {"ok": True, "model_loaded": model is not None, "warmup": warmup}
+
+
+@app.get("/metrics")
+def metrics():
+    st = scoring.stats()
+    executor_series = [
+        ("ai_scoring_workers", "Scoring worker threads.", "max_workers", "gauge"),
+        ("ai_scoring_running", "Scoring calls currently running.", "running", "gauge"),
+        ("ai_scoring_background_running", "Low-priority calls (warm-up) running.", "background_running", "gauge"),
+        ("ai_scoring_queue_depth", "Scoring calls waiting for a worker.", "queue_depth", "gauge"),
+        ("ai_scoring_submitted_total", "Scoring calls admitted.", "submitted_total", "counter"),
+        ("ai_scoring_rejected_total", "Scoring calls rejected as OVERLOADED.", "rejected_total", "counter"),
+        ("ai_scoring_wait_seconds_total", "Time spent queued for a worker.", "wait_seconds_total", "counter"),
+        ("ai_scoring_wait_seconds_max", "Longest queue wait seen.", "wait_seconds_max", "gauge"),
+    ]
+    extra = []
+    for name, help_text, key, kind in executor_series:
+        extra.extend(ai_metrics.gauge_lines(name, help_text, st[key], kind))
+    return Response(content=ai_metrics.render(ai_metrics.ALL, extra), media_type=ai_metrics.PROMETHEUS_CONTENT_TYPE)
 
 
 @app.post("/ai/recommend")
-def recommend(
+async def recommend(
     req: RecommendRequest,
     x_internal_token: Optional[str] = Header(default=None, alias="X-Internal-Token"),
+    x_deadline_ms: Optional[int] = Header(default=None, alias="X-Deadline-Ms"),
+    accept: Optional[str] = Header(default=None),
 ):
+    # X-Deadline-Ms is the caller's remaining budget, relative so clock skew
+    # between hosts doesn't matter; it starts counting on arrival (queue wait included)
+    deadline = time.monotonic() + x_deadline_ms / 1000.0 if x_deadline_ms is not None else None
+
     _auth_or_401(x_internal_token)
 
     if req.limit < 1:
@@ -93,44 +198,69 @@ def recommend(
         api_error("MODEL_NOT_READY", "Model not loaded", status_code=503)
 
     t0 = time.time()
+    trace = RecommendTrace(timed=STAGE_TIMINGS)
 
-    items = model.recommend(
+    items = await _run_scoring(
+        model.recommend,
         user_id=req.user_id,
         limit=req.limit,
         offset=req.offset,
         exclude_movie_ids=req.exclude_movie_ids,
         use_social=req.context.use_social,
         seed_movie_ids=req.context.seed_movie_ids,
+        deadline=deadline,
+        trace=trace,
     )
 
     # double safety
     excl = set(req.exclude_movie_ids or [])
     items = [it for it in items if int(it["movie_id"]) not in excl]
 
-    return {
+    elapsed = time.time() - t0
+    ai_metrics.REQUEST_LATENCY.observe(elapsed, endpoint="recommend")
+    ai_metrics.observe_recommend(trace)
+
+    meta = {"latency_ms": int(elapsed * 1000), "degraded": trace.degraded}
+    if req.include_timings:
+        meta["timings"] = {
+            "stages_ms": {k: round(v, 3) for k, v in trace.timings.items()},
+            "path": trace.path,
+            "cache_hit": trace.cache_hit,
+            "history_size": trace.history_size,
+            "seeds_expanded": trace.seeds_expanded,
+            "candidates": trace.candidates,
+        }
+
+    payload = {
         "request_id": req.request_id,
         "user_id": req.user_id,
         "model": {"name": "ibcf", "version": "v1", "trained_at": None},
         "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         "ttl_seconds": 900,
         "items": items,
-        "meta": {"latency_ms": int((time.time() - t0) * 1000)},
+        "meta": meta,
     }
+    return negotiate(payload, accept)
 
 
 @app.post("/ai/explain")
-def explain(
+async def explain(
     req: ExplainRequest,
     x_internal_token: Optional[str] = Header(default=None, alias="X-Internal-Token"),
+    accept: Optional[str] = Header(default=None),
 ):
     _auth_or_401(x_internal_token)
 
     if model is None:
         api_error("MODEL_NOT_READY", "Model not loaded", status_code=503)
 
-    out = model.explain(user_id=req.user_id, movie_id=req.movie_id, use_social=req.context.use_social)
+    t0 = time.time()
+    out = await _run_scoring(
+        model.explain, user_id=req.user_id, movie_id=req.movie_id, use_social=req.context.use_social
+    )
+    ai_metrics.REQUEST_LATENCY.observe(time.time() - t0, endpoint="explain")
 
-    return {
+    payload = {
         "request_id": req.request_id,
         "user_id": req.user_id,
         "movie_id": req.movie_id,
@@ -138,3 +268,4 @@ def explain(
         "explanation": out["explanation"],
         "social_signals": out.get("social_signals", {}),
     }
+    return negotiate(payload, accept)
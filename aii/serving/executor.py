@@ -0,0 +1,136 @@
+# aii/serving/executor.py
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Overloaded(Exception):
+    """Raised when the scoring queue is full and the request is rejected."""
+
+
+class ScoringExecutor:
+    """
+    Dedicated, bounded executor for CPU-bound scoring.
+
+    - `max_workers` threads run scoring (defaults to the core count, so we don't
+      oversubscribe the GIL the way Starlette's shared threadpool does)
+    - at most `max_queue` further calls may wait for a free worker
+    - anything beyond that is rejected immediately with `Overloaded`
+    - `run_background` is for low-priority work (the start-up warm-up): it
+      only takes a worker while no request is queued or running
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max(1, int(max_workers or os.cpu_count() or 1))
+        self.max_queue = max(0, int(self.max_workers * 4 if max_queue is None else max_queue))
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scoring")
+        self._lock = threading.Lock()
+
+        self._in_flight = 0  # queued + running
+        self._running = 0
+        self._submitted = 0
+        self._started = 0
+        self._rejected = 0
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+        self._background = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return self._in_flight - self._running
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise Overloaded(f"scoring queue full ({self._in_flight}/{self.capacity})")
+            self._in_flight += 1
+            self._submitted += 1
+
+        enqueued_at = time.perf_counter()
+        # whoever flips `claimed` first owns the slot release: the worker when it
+        # starts the task, or the caller if it is cancelled while still queued
+        claimed = [False]
+
+        def _task() -> Optional[T]:
+            waited = time.perf_counter() - enqueued_at
+            with self._lock:
+                if claimed[0]:
+                    return None
+                claimed[0] = True
+                self._running += 1
+                self._started += 1
+                self._wait_total_s += waited
+                if waited > self._wait_max_s:
+                    self._wait_max_s = waited
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._in_flight -= 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._pool, _task)  # type: ignore[return-value]
+        except asyncio.CancelledError:
+            with self._lock:
+                if not claimed[0]:
+                    claimed[0] = True
+                    self._in_flight -= 1
+            raise
+
+    async def run_background(self, fn: Callable[..., T], *args: Any, poll_s: float = 0.01, **kwargs: Any) -> T:
+        """
+        Run `fn` once the executor is idle. Not counted against the request
+        queue, so it never causes an OVERLOADED; a request that arrives while
+        it runs waits for it only if every other worker is busy. Keep each
+        call short: that is the longest such a request can wait.
+        """
+        while True:
+            with self._lock:
+                if self._in_flight == 0:
+                    self._background += 1
+                    break
+            await asyncio.sleep(poll_s)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._background -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self._started
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "background_running": self._background,
+                "queue_depth": self._in_flight - self._running,
+                "submitted_total": self._submitted,
+                "rejected_total": self._rejected,
+                "wait_seconds_total": round(self._wait_total_s, 6),
+                "wait_seconds_max": round(self._wait_max_s, 6),
+                "wait_ms_avg": round(1000.0 * self._wait_total_s / started, 3) if started else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
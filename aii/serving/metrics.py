@@ -0,0 +1,134 @@
+# aii/serving/metrics.py
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; tuned for a scoring path that is normally a few ms
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _fmt_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[key] = series
+            series[0][idx] += 1
+            series[1][0] += value
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, c in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += c
+                    lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', _fmt_value(bound)))} {cumulative}")
+                lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(total[0])}")
+                lines.append(f"{self.name}_count{_fmt_labels(key)} {cumulative}")
+        return lines
+
+
+def gauge_lines(name: str, help_text: str, value: float, kind: str = "gauge") -> List[str]:
+    """Render a value read at scrape time (e.g. executor stats)."""
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {_fmt_value(value)}"]
+
+
+def render(metrics: Iterable, extra_lines: Iterable[str] = ()) -> str:
+    lines: List[str] = []
+    for m in metrics:
+        lines.extend(m.collect())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# AI service metrics
+# -----------------------
+REQUEST_LATENCY = Histogram("ai_request_latency_seconds", "End-to-end handler latency by endpoint.")
+STAGE_LATENCY = Histogram("ai_recommend_stage_seconds", "Time spent per IBCFRecommender.recommend stage.")
+HISTORY_SIZE = Histogram("ai_recommend_history_size", "Ratings in the user's history.", COUNT_BUCKETS)
+SEEDS_EXPANDED = Histogram("ai_recommend_seeds_expanded", "History seeds expanded per call.", COUNT_BUCKETS)
+CANDIDATES = Histogram("ai_recommend_candidates", "Candidate movies scored per call.", COUNT_BUCKETS)
+RECOMMEND_PATH = Counter("ai_recommend_path_total", "Recommend calls by scoring path.")
+DEGRADED = Counter("ai_recommend_degraded_total", "Recommend calls degraded to meet the deadline.")
+RANKING_CACHE = Counter("ai_recommend_ranking_cache_total", "History-path lookups in the per-user ranking cache.")
+
+ALL = (
+    REQUEST_LATENCY,
+    STAGE_LATENCY,
+    HISTORY_SIZE,
+    SEEDS_EXPANDED,
+    CANDIDATES,
+    RECOMMEND_PATH,
+    DEGRADED,
+    RANKING_CACHE,
+)
+
+
+def observe_recommend(trace) -> None:
+    """Fold one RecommendTrace into the aggregate histograms."""
+    HISTORY_SIZE.observe(trace.history_size)
+    SEEDS_EXPANDED.observe(trace.seeds_expanded)
+    CANDIDATES.observe(trace.candidates)
+    RECOMMEND_PATH.inc(path=trace.path or "unknown")
+    if trace.degraded:
+        DEGRADED.inc()
+    if trace.path == "history":
+        RANKING_CACHE.inc(result="hit" if trace.cache_hit else "miss")
+    for stage, ms in trace.timings.items():
+        STAGE_LATENCY.observe(ms / 1000.0, stage=stage)
@@ -0,0 +1,52 @@
+# aii/serving/responses.py
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+# Optional fast encoders — fall back to stdlib json when they aren't installed
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None  # type: ignore
+
+try:
+    import msgpack
+except ModuleNotFoundError:
+    msgpack = None  # type: ignore
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when available.
+
+    Endpoints return this directly, which also skips FastAPI's
+    jsonable_encoder pass over the (already plain) payload.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    return msgpack is not None and bool(accept) and MSGPACK_MEDIA_TYPE in accept
+
+
+def negotiate(content: Any, accept: Optional[str] = None, status_code: int = 200) -> Response:
+    """Pick msgpack when the caller asks for it (and we can), JSON otherwise."""
+    if wants_msgpack(accept):
+        return MsgpackResponse(content=content, status_code=status_code)
+    return FastJSONResponse(content=content, status_code=status_code)
@@ -7,19 +7,44 @@ IMPROVEMENTS:
 - Added Redis caching for recommendations
 - Fixed function signature to include 'offset' parameter
 - Added proper error handling with custom exception
-- Added request_id for tracing
+- Added request_id for tracing (the inbound X-Request-ID when called from a request)
+- One cached ranked list per user, grown in chunks and sliced into pages
+- Upstream latency histogram by outcome (ok / timeout / unavailable / error)
+- One deadline per request: each AI call gets only the remaining budget
+  (X-Deadline-Ms and its HTTP timeout), and chunk fetches stop when it runs out
+- Stable user-id mapping (BLAKE2b) so every worker sends the AI service the same id
 """
 
+import functools
+import hashlib
 import logging
+import math
 import os
+import threading
+import time
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 from circuitbreaker import CircuitBreakerError
 
-from .cache import cache, get_cached_recommendations, set_cached_recommendations
+try:
+    import msgpack
+except ModuleNotFoundError:  # optional: JSON is always supported
+    msgpack = None  # type: ignore
+
+from .cache import (
+    RankedList,
+    StaleList,
+    aget_or_compute_recommendations,
+    aset_cached_recommendations,
+    cache,
+    get_or_compute_recommendations,
+    set_cached_recommendations,
+)
 from .circuit_breaker import ai_service_circuit
+from .metrics import AI_REQUEST_LATENCY
+from .tracing import current_request_id, span
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +52,29 @@ logger = logging.getLogger(__name__)
 AI_BASE_URL: str = os.getenv("AI_BASE_URL", "")
 AI_INTERNAL_TOKEN: str = os.getenv("AI_INTERNAL_TOKEN", "")
 AI_TIMEOUT_SECONDS: float = float(os.getenv("AI_TIMEOUT_SECONDS", "5"))
+# Headroom kept out of the deadline we hand the AI service (network + JSON decode)
+AI_DEADLINE_MARGIN_MS: int = int(os.getenv("AI_DEADLINE_MARGIN_MS", "250"))
+# Wire format for the backend<->AI hop: "json" (default) or "msgpack" (needs the msgpack package)
+AI_WIRE_FORMAT: str = os.getenv("AI_WIRE_FORMAT", "json").lower()
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Connection pool for the backend->AI hop (shared by every request in this worker)
+AI_MAX_CONNECTIONS: int = int(os.getenv("AI_MAX_CONNECTIONS", "100"))
+AI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("AI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+AI_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("AI_KEEPALIVE_EXPIRY_SECONDS", "30"))
+AI_HTTP2: bool = os.getenv("AI_HTTP2", "false").lower() == "true"
+
+# Ranked-list cache: one list per user, fetched in chunks of the AI page cap
+# and sliced into whatever limit/offset the caller asks for. Windows deeper
+# than AI_RANKED_LIST_MAX go straight to the AI service.
+RANKED_CHUNK: int = 50
+AI_RANKED_LIST_MAX: int = int(os.getenv("AI_RANKED_LIST_MAX", "500"))
+
+# Backend user ids (UUIDs) hash into [2^62, 2^63): stable, fits a signed
+# 64-bit int, and clear of the AI service's native numeric user ids
+HASHED_USER_ID_BASE: int = 1 << 62
+AI_USER_ID_CACHE_SIZE: int = int(os.getenv("AI_USER_ID_CACHE_SIZE", "65536"))
 
 
 class AIServiceError(Exception):
@@ -38,15 +86,208 @@ class AIServiceError(Exception):
         self.status_code = status_code
 
 
+# -----------------------
+# Pooled HTTP clients
+# -----------------------
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_client_lock = threading.Lock()
+
+
+def _client_options() -> Dict[str, Any]:
+    http2 = AI_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ModuleNotFoundError:
+            logger.warning("AI_HTTP2 enabled but the 'h2' package is missing; using HTTP/1.1")
+            http2 = False
+
+    return {
+        "timeout": AI_TIMEOUT_SECONDS,
+        "limits": httpx.Limits(
+            max_connections=AI_MAX_CONNECTIONS,
+            max_keepalive_connections=AI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=AI_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        "http2": http2,
+    }
+
+
+def get_sync_client() -> httpx.Client:
+    """Shared keep-alive client for sync callers (created on first use)."""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        with _client_lock:
+            if _sync_client is None or _sync_client.is_closed:
+                _sync_client = httpx.Client(**_client_options())
+    return _sync_client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for async callers (created on first use)."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(**_client_options())
+    return _async_client
+
+
+async def close_ai_clients() -> None:
+    """Close pooled connections; called from the app lifespan on shutdown."""
+    global _sync_client, _async_client
+    with _client_lock:
+        sync_client, _sync_client = _sync_client, None
+    async_client, _async_client = _async_client, None
+
+    if sync_client is not None:
+        sync_client.close()
+    if async_client is not None:
+        await async_client.aclose()
+
+
+@functools.lru_cache(maxsize=AI_USER_ID_CACHE_SIZE)
 def _convert_user_id(user_id: str) -> int:
-    """Convert user_id string to integer for AI service."""
-    try:
-        # If it's a UUID or long string, hash it
-        if len(user_id) > 10:
-            return abs(hash(user_id)) % (10**9)
-        return int(user_id)
-    except (ValueError, TypeError):
-        return abs(hash(str(user_id))) % (10**9)
+    """
+    Convert user_id string to integer for AI service.
+
+    Short numeric ids pass through. Anything else (UUIDs) maps to a stable
+    62-bit BLAKE2b hash offset by HASHED_USER_ID_BASE: the same in every
+    worker and across restarts (unlike hash(), which is salted per
+    process), and never equal to a native numeric id.
+    """
+    user_id = str(user_id)
+    if len(user_id) <= 10:
+        try:
+            return int(user_id)
+        except ValueError:
+            pass
+    digest = hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest()
+    return HASHED_USER_ID_BASE | (int.from_bytes(digest, "big") >> 2)
+
+
+def _request_deadline() -> float:
+    """perf_counter() time by which a recommendation request must be answered (set once per request)."""
+    return time.perf_counter() + AI_TIMEOUT_SECONDS
+
+
+def _remaining(deadline: float) -> float:
+    """Seconds left before the request's deadline."""
+    return deadline - time.perf_counter()
+
+
+def _deadline_ms(deadline: float) -> int:
+    """Budget the AI service may spend on this call: what's left of the request's, less the margin."""
+    return max(1, int(_remaining(deadline) * 1000) - AI_DEADLINE_MARGIN_MS)
+
+
+def _budget_left(deadline: float) -> bool:
+    """Whether another AI call still fits before the deadline."""
+    return _remaining(deadline) * 1000 > AI_DEADLINE_MARGIN_MS
+
+
+def _accept_header() -> str:
+    if AI_WIRE_FORMAT == "msgpack" and msgpack is not None:
+        return f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.9"
+    return "application/json"
+
+
+def _decode(response: httpx.Response) -> Dict[str, Any]:
+    """Decode an AI service body according to the content type it negotiated."""
+    if msgpack is not None and response.headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE):
+        return msgpack.unpackb(response.content, raw=False)
+    return response.json()
+
+
+def _recommend_request(
+    user_id: str,
+    limit: int,
+    offset: int,
+    exclude_movie_ids: Optional[List[int]],
+    deadline: float,
+) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+    """Build (request_id, body, headers) for a POST /ai/recommend call."""
+    # Validate and clamp parameters
+    limit = max(1, min(limit, 50))
+    offset = max(0, offset)
+
+    # the inbound X-Request-ID when there is one, so both services' logs line up
+    request_id = current_request_id() or str(uuid.uuid4())
+    body = {
+        "request_id": request_id,
+        "user_id": _convert_user_id(user_id),
+        "limit": limit,
+        "offset": offset,
+        "exclude_movie_ids": exclude_movie_ids or [],
+        "context": {"use_social": True, "seed_movie_ids": [], "locale": "en-US"},
+    }
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": _accept_header(),
+        "X-Internal-Token": AI_INTERNAL_TOKEN,
+        "X-Request-ID": request_id,
+        "X-Deadline-Ms": str(_deadline_ms(deadline)),
+    }
+    return request_id, body, headers
+
+
+def _parse_recommend_response(
+    response: httpx.Response, request_id: str, user_id: str
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Turn an /ai/recommend response into (items, meta), raising AIServiceError on non-2xx."""
+    # Handle non-2xx responses
+    if response.status_code == 401:
+        raise AIServiceError("AI service authentication failed", 401)
+    elif response.status_code == 503:
+        raise AIServiceError("AI model not ready", 503)
+    elif not response.is_success:
+        error_detail = "Unknown error"
+        try:
+            error_data = response.json()
+            if "detail" in error_data:
+                if isinstance(error_data["detail"], dict):
+                    error_detail = error_data["detail"].get("message", str(error_data["detail"]))
+                else:
+                    error_detail = str(error_data["detail"])
+        except Exception:
+            error_detail = response.text[:200] if response.text else "No response body"
+
+        raise AIServiceError(f"AI service error: {error_detail}", response.status_code)
+
+    # Parse response
+    data = _decode(response)
+    items = data.get("items", [])
+    meta = data.get("meta", {})
+
+    logger.info(
+        f"AI recommendations fetched: request_id={request_id}, "
+        f"user_id={user_id}, count={len(items)}, "
+        f"latency_ms={meta.get('latency_ms', 'N/A')}, degraded={meta.get('degraded', False)}"
+    )
+
+    return items, meta
+
+
+def _as_ai_service_error(e: Exception, user_id: str) -> AIServiceError:
+    """Map transport/unexpected errors onto AIServiceError (same mapping for sync and async)."""
+    if isinstance(e, AIServiceError):
+        return e
+    if isinstance(e, httpx.TimeoutException):
+        logger.warning(f"AI service timeout: user_id={user_id}")
+        return AIServiceError("AI service timeout", 504)
+    if isinstance(e, httpx.ConnectError):
+        logger.error(f"AI service connection error: {e}")
+        return AIServiceError("AI service unavailable", 503)
+    if isinstance(e, httpx.HTTPError):
+        logger.error(f"AI service HTTP error: {e}")
+        return AIServiceError(f"AI service request failed: {str(e)}")
+    logger.exception(f"Unexpected error calling AI service: {e}")
+    return AIServiceError(f"Unexpected error: {str(e)}")
+
+
+def _outcome(error: Optional[AIServiceError]) -> str:
+    if error is None:
+        return "ok"
+    return {504: "timeout", 503: "unavailable"}.get(error.status_code, "error")
 
 
 def _call_ai_service(
@@ -54,91 +295,167 @@ def _call_ai_service(
     limit: int,
     offset: int,
     exclude_movie_ids: Optional[List[int]] = None,
-) -> List[Dict[str, Any]]:
+    deadline: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Internal function to call AI service (wrapped by circuit breaker).
 
     This function contains the actual HTTP call logic and is protected
-    by the circuit breaker pattern.
+    by the circuit breaker pattern. Returns (items, meta).
     """
     if not AI_BASE_URL:
         raise AIServiceError("AI_BASE_URL not configured")
 
-    # Validate and clamp parameters
-    limit = max(1, min(limit, 50))
-    offset = max(0, offset)
+    if deadline is None:
+        deadline = _request_deadline()
+    request_id, body, headers = _recommend_request(user_id, limit, offset, exclude_movie_ids, deadline)
 
-    user_id_int = _convert_user_id(user_id)
-    request_id = str(uuid.uuid4())
+    started = time.perf_counter()
+    error: Optional[AIServiceError] = None
+    try:
+        with span("ai"):
+            response = get_sync_client().post(
+                f"{AI_BASE_URL}/ai/recommend", json=body, headers=headers, timeout=max(0.001, _remaining(deadline))
+            )
+            return _parse_recommend_response(response, request_id, user_id)
+    except Exception as e:
+        error = _as_ai_service_error(e, user_id)
+        raise error from e
+    finally:
+        AI_REQUEST_LATENCY.observe(time.perf_counter() - started, outcome=_outcome(error))
+
+
+async def _call_ai_service_async(
+    user_id: str,
+    limit: int,
+    offset: int,
+    exclude_movie_ids: Optional[List[int]] = None,
+    deadline: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Async twin of _call_ai_service (wrapped by the same circuit breaker)."""
+    if not AI_BASE_URL:
+        raise AIServiceError("AI_BASE_URL not configured")
+
+    if deadline is None:
+        deadline = _request_deadline()
+    request_id, body, headers = _recommend_request(user_id, limit, offset, exclude_movie_ids, deadline)
 
+    started = time.perf_counter()
+    error: Optional[AIServiceError] = None
     try:
-        with httpx.Client(timeout=AI_TIMEOUT_SECONDS) as client:
-            response = client.post(
-                f"{AI_BASE_URL}/ai/recommend",
-                json={
-                    "request_id": request_id,
-                    "user_id": user_id_int,
-                    "limit": limit,
-                    "offset": offset,
-                    "exclude_movie_ids": exclude_movie_ids or [],
-                    "context": {"use_social": True, "seed_movie_ids": [], "locale": "en-US"},
-                },
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Internal-Token": AI_INTERNAL_TOKEN,
-                    "X-Request-ID": request_id,
-                },
+        with span("ai"):
+            response = await get_async_client().post(
+                f"{AI_BASE_URL}/ai/recommend", json=body, headers=headers, timeout=max(0.001, _remaining(deadline))
             )
+            return _parse_recommend_response(response, request_id, user_id)
+    except Exception as e:
+        error = _as_ai_service_error(e, user_id)
+        raise error from e
+    finally:
+        AI_REQUEST_LATENCY.observe(time.perf_counter() - started, outcome=_outcome(error))
 
-        # Handle non-2xx responses
-        if response.status_code == 401:
-            raise AIServiceError("AI service authentication failed", 401)
-        elif response.status_code == 503:
-            raise AIServiceError("AI model not ready", 503)
-        elif not response.is_success:
-            error_detail = "Unknown error"
-            try:
-                error_data = response.json()
-                if "detail" in error_data:
-                    if isinstance(error_data["detail"], dict):
-                        error_detail = error_data["detail"].get("message", str(error_data["detail"]))
-                    else:
-                        error_detail = str(error_data["detail"])
-            except Exception:
-                error_detail = response.text[:200] if response.text else "No response body"
-
-            raise AIServiceError(f"AI service error: {error_detail}", response.status_code)
-
-        # Parse response
-        data = response.json()
-        items = data.get("items", [])
-
-        logger.info(
-            f"AI recommendations fetched: request_id={request_id}, "
-            f"user_id={user_id}, count={len(items)}, "
-            f"latency_ms={data.get('meta', {}).get('latency_ms', 'N/A')}"
-        )
 
-        return items
+# -----------------------
+# Ranked list helpers
+# -----------------------
+def _ranked_depth(limit: int, offset: int, exclude_movie_ids: Optional[List[int]]) -> int:
+    """How deep the ranked list must go to cover a window, in whole chunks."""
+    needed = offset + limit + len(exclude_movie_ids or ())
+    return min(AI_RANKED_LIST_MAX, math.ceil(needed / RANKED_CHUNK) * RANKED_CHUNK)
 
-    except httpx.TimeoutException:
-        logger.warning(f"AI service timeout: user_id={user_id}")
-        raise AIServiceError("AI service timeout", 504)
 
-    except httpx.ConnectError as e:
-        logger.error(f"AI service connection error: {e}")
-        raise AIServiceError("AI service unavailable", 503)
+def _ranked_complete(ranked: RankedList) -> bool:
+    """The AI service had nothing more to rank, or the list is as deep as we keep."""
+    return ranked.complete or ranked.depth >= AI_RANKED_LIST_MAX
 
-    except httpx.HTTPError as e:
-        logger.error(f"AI service HTTP error: {e}")
-        raise AIServiceError(f"AI service request failed: {str(e)}")
 
-    except AIServiceError:
-        raise
+def _ranked_window(
+    ranked: List[Dict[str, Any]],
+    limit: int,
+    offset: int,
+    exclude_movie_ids: Optional[List[int]],
+    force: bool = False,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Slice one page out of the ranked list, after exclusions.
+
+    Returns None when the list isn't deep enough yet (and isn't complete),
+    unless force is set. Pages of a stale list stay marked as stale.
+    """
+    excluded = set(exclude_movie_ids or ())
+    visible = [item for item in ranked if item.get("movie_id") not in excluded] if excluded else ranked
+    if len(visible) < offset + limit and not (force or _ranked_complete(ranked)):
+        return None
+    window = visible[offset : offset + limit]
+    return StaleList(window) if getattr(ranked, "stale", False) else window
 
-    except Exception as e:
-        logger.exception(f"Unexpected error calling AI service: {e}")
-        raise AIServiceError(f"Unexpected error: {str(e)}")
+
+def _extension_depth(ranked: RankedList, depth: int) -> int:
+    """Fetch at least one chunk past the cached depth: dropped repeats can leave it short of the window."""
+    return min(AI_RANKED_LIST_MAX, max(depth, ranked.depth + RANKED_CHUNK))
+
+
+def _extend_ranked(ranked: RankedList, more: Dict[str, Any]) -> RankedList:
+    """Append a deeper chunk; the AI may have re-ranked meanwhile, so skip repeats."""
+    seen = {item.get("movie_id") for item in ranked}
+    items = list(ranked) + [item for item in more["items"] if item.get("movie_id") not in seen]
+    return RankedList(items, max(ranked.depth, more["depth"]), more["complete"], ranked.stale)
+
+
+def _fetch_ranked(user_id: str, start: int, depth: int, state: Dict[str, bool], deadline: float) -> Dict[str, Any]:
+    """
+    Fetch ranked chunks [start, depth) until the AI service runs out, or the
+    request's deadline leaves no budget for another call (a timeout if that
+    happens before the first chunk).
+
+    Returns RankedList.to_dict() for the fetched part: depth is the AI rank
+    reached, complete is set when a chunk came back short. The AI may
+    re-rank between chunks, so repeats are dropped.
+    """
+    items: List[Dict[str, Any]] = []
+    seen: set = set()
+    reached, complete = start, False
+    for chunk_offset in range(start, depth, RANKED_CHUNK):
+        if not _budget_left(deadline):
+            if chunk_offset == start:
+                raise AIServiceError("AI service timeout", 504)
+            break
+        chunk, meta = ai_service_circuit.call(
+            _call_ai_service, user_id=user_id, limit=RANKED_CHUNK, offset=chunk_offset, deadline=deadline
+        )
+        items.extend(item for item in chunk if item.get("movie_id") not in seen)
+        seen.update(item.get("movie_id") for item in chunk)
+        reached = chunk_offset + RANKED_CHUNK
+        state["degraded"] = state["degraded"] or bool(meta.get("degraded"))
+        if len(chunk) < RANKED_CHUNK:
+            complete = True
+            break
+    return {"items": items, "depth": reached, "complete": complete}
+
+
+async def _fetch_ranked_async(
+    user_id: str, start: int, depth: int, state: Dict[str, bool], deadline: float
+) -> Dict[str, Any]:
+    """Async _fetch_ranked."""
+    items: List[Dict[str, Any]] = []
+    seen: set = set()
+    reached, complete = start, False
+    for chunk_offset in range(start, depth, RANKED_CHUNK):
+        if not _budget_left(deadline):
+            if chunk_offset == start:
+                raise AIServiceError("AI service timeout", 504)
+            break
+        chunk, meta = await ai_service_circuit.call_async(
+            _call_ai_service_async, user_id=user_id, limit=RANKED_CHUNK, offset=chunk_offset, deadline=deadline
+        )
+        items.extend(item for item in chunk if item.get("movie_id") not in seen)
+        seen.update(item.get("movie_id") for item in chunk)
+        reached = chunk_offset + RANKED_CHUNK
+        state["degraded"] = state["degraded"] or bool(meta.get("degraded"))
+        if len(chunk) < RANKED_CHUNK:
+            complete = True
+            break
+    return {"items": items, "depth": reached, "complete": complete}
 
 
 def get_ai_recommendations(
@@ -152,7 +469,8 @@ def get_ai_recommendations(
     Fetch personalized recommendations from the AI service.
 
     Features:
-    - Redis caching (5 minute TTL)
+    - Redis caching (5 minute TTL) with stampede protection: one ranked list
+      per user, so every page size and offset is a slice of the same entry
     - Circuit breaker protection
     - Automatic retry on transient failures
 
@@ -174,28 +492,43 @@ def get_ai_recommendations(
         AIServiceError: If the AI service is unavailable or returns an error
         CircuitBreakerError: If the circuit breaker is open
     """
-    # Check cache first
-    if use_cache and cache.is_available:
-        cached = get_cached_recommendations(user_id, limit, offset)
-        if cached is not None:
-            logger.debug(f"Cache hit for recommendations: user_id={user_id}")
-            return cached
+    limit = max(1, min(limit, RANKED_CHUNK))
+    offset = max(0, offset)
+    depth = _ranked_depth(limit, offset, exclude_movie_ids)
+    deadline = _request_deadline()
 
     # Call AI service with circuit breaker protection
     try:
-        items = ai_service_circuit.call(
-            _call_ai_service,
-            user_id=user_id,
-            limit=limit,
-            offset=offset,
-            exclude_movie_ids=exclude_movie_ids,
+        if not (use_cache and cache.is_available) or offset + limit > AI_RANKED_LIST_MAX:
+            items, _ = ai_service_circuit.call(
+                _call_ai_service,
+                user_id=user_id,
+                limit=limit,
+                offset=offset,
+                exclude_movie_ids=exclude_movie_ids,
+                deadline=deadline,
+            )
+            return items
+
+        # Cache (with stampede protection) only complete, non-degraded lists
+        state = {"degraded": False}
+        ranked = get_or_compute_recommendations(
+            user_id,
+            lambda: _fetch_ranked(user_id, 0, depth, state, deadline),
+            lambda fetched: bool(fetched["items"]) and not state["degraded"],
         )
-
-        # Cache successful results
-        if use_cache and items:
-            set_cached_recommendations(user_id, limit, offset, items)
-
-        return items
+        window = _ranked_window(ranked, limit, offset, exclude_movie_ids)
+        if window is None:
+            # scrolled past the cached depth: fetch only the missing chunks. Own
+            # state: a background refresh of a stale list is still using `state`.
+            extend_state = {"degraded": False}
+            more = _fetch_ranked(user_id, ranked.depth, _extension_depth(ranked, depth), extend_state, deadline)
+            extended = _extend_ranked(ranked, more)
+            # saving would stamp a stale list fresh; the refresh replaces it instead
+            if more["items"] and not extend_state["degraded"] and not ranked.stale:
+                set_cached_recommendations(user_id, extended)
+            window = _ranked_window(extended, limit, offset, exclude_movie_ids, force=True)
+        return window
 
     except CircuitBreakerError:
         logger.warning(f"AI circuit breaker open for user_id={user_id}")
@@ -212,57 +545,49 @@ async def get_ai_recommendations_async(
     """
     Async version of get_ai_recommendations.
 
-    Uses httpx async client for non-blocking IO.
+    Same behaviour (cache, circuit breaker, request-id/deadline headers,
+    error mapping) but never blocks the event loop: redis.asyncio for the
+    cache and the pooled httpx.AsyncClient for the AI call.
     """
-    # Check cache first
-    if use_cache and cache.is_available:
-        cached = get_cached_recommendations(user_id, limit, offset)
-        if cached is not None:
-            logger.debug(f"Cache hit for recommendations: user_id={user_id}")
-            return cached
-
-    if not AI_BASE_URL:
-        raise AIServiceError("AI_BASE_URL not configured")
-
-    limit = max(1, min(limit, 50))
+    limit = max(1, min(limit, RANKED_CHUNK))
     offset = max(0, offset)
-    user_id_int = _convert_user_id(user_id)
-    request_id = str(uuid.uuid4())
+    depth = _ranked_depth(limit, offset, exclude_movie_ids)
+    deadline = _request_deadline()
 
+    # Call AI service with circuit breaker protection
     try:
-        async with httpx.AsyncClient(timeout=AI_TIMEOUT_SECONDS) as client:
-            response = await client.post(
-                f"{AI_BASE_URL}/ai/recommend",
-                json={
-                    "request_id": request_id,
-                    "user_id": user_id_int,
-                    "limit": limit,
-                    "offset": offset,
-                    "exclude_movie_ids": exclude_movie_ids or [],
-                    "context": {"use_social": True},
-                },
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Internal-Token": AI_INTERNAL_TOKEN,
-                },
+        if not (use_cache and cache.is_available) or offset + limit > AI_RANKED_LIST_MAX:
+            items, _ = await ai_service_circuit.call_async(
+                _call_ai_service_async,
+                user_id=user_id,
+                limit=limit,
+                offset=offset,
+                exclude_movie_ids=exclude_movie_ids,
+                deadline=deadline,
             )
+            return items
 
-        if not response.is_success:
-            raise AIServiceError(f"AI service error: {response.status_code}", response.status_code)
-
-        data = response.json()
-        items = data.get("items", [])
-
-        # Cache results
-        if use_cache and items:
-            set_cached_recommendations(user_id, limit, offset, items)
-
-        return items
+        state = {"degraded": False}
+        ranked = await aget_or_compute_recommendations(
+            user_id,
+            lambda: _fetch_ranked_async(user_id, 0, depth, state, deadline),
+            lambda fetched: bool(fetched["items"]) and not state["degraded"],
+        )
+        window = _ranked_window(ranked, limit, offset, exclude_movie_ids)
+        if window is None:
+            extend_state = {"degraded": False}
+            more = await _fetch_ranked_async(
+                user_id, ranked.depth, _extension_depth(ranked, depth), extend_state, deadline
+            )
+            extended = _extend_ranked(ranked, more)
+            if more["items"] and not extend_state["degraded"] and not ranked.stale:
+                await aset_cached_recommendations(user_id, extended)
+            window = _ranked_window(extended, limit, offset, exclude_movie_ids, force=True)
+        return window
 
-    except httpx.TimeoutException:
-        raise AIServiceError("AI service timeout", 504)
-    except httpx.HTTPError as e:
-        raise AIServiceError(f"AI service error: {str(e)}", 503)
+    except CircuitBreakerError:
+        logger.warning(f"AI circuit breaker open for user_id={user_id}")
+        raise AIServiceError("AI service temporarily unavailable (circuit open)", 503)
 
 
 def get_ai_explanation(
@@ -289,26 +614,27 @@ def get_ai_explanation(
         raise AIServiceError("AI_BASE_URL not configured")
 
     user_id_int = _convert_user_id(user_id)
-    request_id = str(uuid.uuid4())
+    request_id = current_request_id() or str(uuid.uuid4())
 
     try:
-        with httpx.Client(timeout=AI_TIMEOUT_SECONDS) as client:
-            response = client.post(
-                f"{AI_BASE_URL}/ai/explain",
-                json={
-                    "request_id": request_id,
-                    "user_id": user_id_int,
-                    "movie_id": movie_id,
-                    "context": {"use_social": True},
-                },
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Internal-Token": AI_INTERNAL_TOKEN,
-                },
-            )
+        response = get_sync_client().post(
+            f"{AI_BASE_URL}/ai/explain",
+            json={
+                "request_id": request_id,
+                "user_id": user_id_int,
+                "movie_id": movie_id,
+                "context": {"use_social": True},
+            },
+            headers={
+                "Content-Type": "application/json",
+                "Accept": _accept_header(),
+                "X-Internal-Token": AI_INTERNAL_TOKEN,
+                "X-Request-ID": request_id,
+            },
+        )
 
         response.raise_for_status()
-        return response.json()
+        return _decode(response)
 
     except httpx.HTTPError as e:
         logger.error(f"AI explanation request error: {e}")
@@ -8,23 +8,50 @@ SECURITY IMPROVEMENTS:
 - Enhanced password validation (min 8 chars with letters and numbers)
 - Uses timezone-aware datetime
 - Generic error messages to prevent user enumeration
+
+PERFORMANCE:
+- Verified tokens are cached in-process by SHA-256 digest until they
+  expire, so repeat requests skip signature verification
+- User status (exists / active) is cached in L1 + Redis under the
+  versioned user:{id} key; any ORM commit that changes is_active or
+  deletes the user bumps the user's generation. The entry only lives
+  USER_STATUS_TTL seconds, which bounds how long a bump lost to a Redis
+  outage can leave a deactivated user signed in
+- bcrypt runs on a bounded process pool (auth_utils.password_pool); when
+  it is saturated login/register answer 503 at once instead of queueing
+  behind the burst and holding threadpool threads the feed needs
+- Token check and user lookup show up as auth / auth_db in Server-Timing
+- get_current_user is async (AsyncSession + redis.asyncio), so the async
+  feed handlers don't give up a threadpool slot just to authenticate
+- Login warms the first page of the user's feed in the background
 """
 
+import hashlib
+import logging
 import os
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Final
+from typing import Any, Dict, Final, Iterator, Optional, Set
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
 from backend.models.user import User
-from backend.session import get_db
+from backend.session import get_async_db, get_db
+
+from .auth_utils import PasswordPoolBusy, hash_password, verify_password
+from .cache import LocalCache, cache, invalidate_user_cache
+from .prefetch import prefetcher
+from .tracing import span
 
-from .auth_utils import hash_password, verify_password
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -48,6 +75,13 @@ if len(JWT_SECRET) < 32:
 JWT_ALGO: Final[str] = "HS256"
 JWT_EXPIRES_MINUTES: Final[int] = int(os.getenv("JWT_EXPIRES_MINUTES", "60"))
 
+# Verified-token cache (in-process only; tokens never go to Redis)
+TOKEN_CACHE_MAX_ENTRIES: Final[int] = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# User status in Redis. I keep this short on purpose: if Redis is down when a
+# user is deactivated, the generation bump is lost and the old entry would be
+# served until it expires.
+USER_STATUS_TTL: Final[int] = int(os.getenv("AUTH_USER_STATUS_TTL", "30"))
+
 
 # -----------------------
 # Schemas (Pydantic v2)
@@ -88,6 +122,20 @@ class MessageOut(BaseModel):
 # -----------------------
 # Routes
 # -----------------------
+@contextmanager
+def _password_pool_guard() -> Iterator[None]:
+    """Turn a saturated password pool into a fast 503."""
+    try:
+        yield
+    except PasswordPoolBusy as e:
+        logger.warning(f"Password pool saturated: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
 @router.post("/register", response_model=MessageOut, status_code=status.HTTP_201_CREATED)
 def register(user_data: AuthIn, db: Session = Depends(get_db)) -> MessageOut:
     """
@@ -104,7 +152,8 @@ def register(user_data: AuthIn, db: Session = Depends(get_db)) -> MessageOut:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
     # Hash password and create user
-    hashed_password = hash_password(user_data.password)
+    with _password_pool_guard():
+        hashed_password = hash_password(user_data.password)
 
     new_user = User(
         id=str(uuid.uuid4()),
@@ -119,17 +168,21 @@ def register(user_data: AuthIn, db: Session = Depends(get_db)) -> MessageOut:
 
 
 @router.post("/login", response_model=TokenOut)
-def login(user_data: AuthIn, db: Session = Depends(get_db)) -> TokenOut:
+def login(user_data: AuthIn, background_tasks: BackgroundTasks, db: Session = Depends(get_db)) -> TokenOut:
     """
     Authenticate user and return JWT token.
 
     - Validates credentials using constant-time comparison
     - Returns JWT with expiration claim
     - Generic error message to prevent user enumeration
+    - Warms the user's first feed page in the background (see prefetch.py)
     """
     user = db.query(User).filter(User.email == user_data.email.lower()).first()
 
-    if not user or not verify_password(user_data.password, user.password_hash):
+    with _password_pool_guard():
+        password_ok = user is not None and verify_password(user_data.password, user.password_hash)
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -147,62 +200,117 @@ def login(user_data: AuthIn, db: Session = Depends(get_db)) -> TokenOut:
 
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGO)
 
+    # I start the warm-up after the response; the app's next call is /feed/home
+    background_tasks.add_task(prefetcher.warm, str(user.id))
+
     return TokenOut(access_token=token, token_type="bearer", expires_in=JWT_EXPIRES_MINUTES * 60)
 
 
-def get_current_user(
+# -----------------------
+# Auth caches
+# -----------------------
+_token_cache = LocalCache(max_entries=TOKEN_CACHE_MAX_ENTRIES, ttls={"token": JWT_EXPIRES_MINUTES * 60.0})
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_user_id(token: str) -> str:
+    """Verify the token (or find it already verified) and return its subject."""
+    key = "token:" + hashlib.sha256(token.encode()).hexdigest()
+    user_id = _token_cache.get(key)
+    if user_id is not None:
+        return user_id
+
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO], options={"require_exp": True})
+    except JWTError:
+        raise _unauthorized("Invalid or expired token")
+
+    user_id = payload.get("sub")
+    if not user_id:
+        raise _unauthorized("Invalid token payload")
+
+    # never past its own expiry
+    _token_cache.set(key, user_id, ttl=float(payload["exp"]) - time.time())
+    return user_id
+
+
+async def _user_status(db: AsyncSession, user_id: str) -> Optional[Dict[str, Any]]:
+    """{"id", "email", "is_active"} for user_id, or None if there is no such user."""
+    key, entry = await cache.aget_user_scoped("user", user_id)
+    if entry is not None:
+        return entry
+
+    with span("auth_db"):
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+    if not user:
+        return None
+
+    entry = {"id": str(user.id), "email": user.email, "is_active": bool(getattr(user, "is_active", True))}
+    if cache.is_available:
+        await cache.aset_json(key, entry, USER_STATUS_TTL)
+    return entry
+
+
+def _mark_status_changed(target: User) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("user_status_changed", set()).add(str(target.id))
+
+
+@event.listens_for(User, "after_update")
+def _track_status_change(mapper, connection, target: User) -> None:
+    if inspect(target).attrs.is_active.history.has_changes():
+        _mark_status_changed(target)
+
+
+@event.listens_for(User, "after_delete")
+def _track_delete(mapper, connection, target: User) -> None:
+    _mark_status_changed(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    # after commit, so a concurrent miss can't re-cache the old status
+    changed: Set[str] = session.info.pop("user_status_changed", set())
+    for user_id in changed:
+        invalidate_user_cache(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop("user_status_changed", None)
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
     """
     Dependency to get the current authenticated user from JWT token.
 
-    - Validates token signature and expiration
+    - Validates token signature and expiration (cached per token)
+    - Checks the user exists and is active (cached per user)
     - Returns user dict with id and email
     - Raises 401 for any authentication failure
     """
     if credentials is None or not credentials.credentials:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing authentication token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    token = credentials.credentials
-
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO], options={"require_exp": True})
-        user_id = payload.get("sub")
+        raise _unauthorized("Missing authentication token")
 
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    user = db.query(User).filter(User.id == user_id).first()
+    with span("auth"):
+        user = await _user_status(db, _token_user_id(credentials.credentials))
 
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("User not found")
 
-    # Check if user is active (if model supports it)
-    if hasattr(user, "is_active") and not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Account is deactivated",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    if not user["is_active"]:
+        raise _unauthorized("Account is deactivated")
 
-    return {"id": str(user.id), "email": user.email}
+    return {"id": user["id"], "email": user["email"]}
@@ -1,15 +1,129 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
 from passlib.context import CryptContext
 
 # I create a password hashing context
 # bcrypt is a safe default hashing algorithm for passwords
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# I run bcrypt in a small process pool instead of the request thread
+# so a login burst can't eat the threadpool (and the GIL) that feed requests need
+# PASSWORD_POOL_WORKERS=0 hashes inline like before
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# I cap how many hashes may be queued or running; past that callers get PasswordPoolBusy
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", str(max(1, PASSWORD_POOL_WORKERS) * 4)))
+PASSWORD_POOL_TIMEOUT = float(os.getenv("PASSWORD_POOL_TIMEOUT_SECONDS", "5"))
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password pool is saturated (callers answer 503)."""
+
+
+# I keep the worker functions at module level so they can be pickled
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    return pwd_context.verify(password, password_hash)
+
+
+class PasswordPool:
+    """Size-limited process pool with a bounded queue in front of it."""
+
+    def __init__(self, workers: int = PASSWORD_POOL_WORKERS, max_pending: int = PASSWORD_POOL_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._peak = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs threads isn't safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordPoolBusy(f"{self._pending} password operations pending")
+            self._pending += 1
+            self._peak = max(self._peak, self._pending)
+
+    def _release(self, _future: Any = None) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) on the pool, or raise PasswordPoolBusy right away when full."""
+        self._admit()
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._release()
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._release()
+            self._reset()
+            raise PasswordPoolBusy("password pool restarting")
+        # I release the slot when the work finishes, even if the caller gave up waiting
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=PASSWORD_POOL_TIMEOUT)
+        except FutureTimeoutError:
+            raise PasswordPoolBusy("password operation timed out")
+        except BrokenProcessPool:
+            self._reset()
+            raise PasswordPoolBusy("password pool restarting")
+
+    def _reset(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self._reset()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "peak_pending": self._peak,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+
+password_pool = PasswordPool()
+
 
 # I hash a plain text password before storing it
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_pool.run(_hash, password)
 
 
 # I verify a plain password against the stored hash
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    return password_pool.run(_verify, password, password_hash)
@@ -3,21 +3,51 @@ Redis Cache Module for Nuvie Backend.
 
 Provides:
 - Connection management with health checks
+- Background availability prober (exponential backoff while Redis is down)
+  plus passive failure detection on real commands, so `is_available` is a
+  flag read and an outage doesn't add a timeout to every request
 - Typed cache operations with TTL
-- Recommendation caching (5 min TTL)
-- Movie metadata caching (1 hour TTL)
+- Recommendation caching (5 min TTL): one ranked list per user, sliced
+  into pages by the caller
+- Movie metadata caching (1 hour TTL), single and batched (MGET /
+  pipelined SETEX)
 - Graceful fallback when Redis unavailable
+- Async (redis.asyncio) variants for handlers running on the event loop
+- In-process L1 LRU in front of Redis for JSON values, with per-namespace
+  TTLs, optional cross-worker invalidation over pub/sub and per-tier hit
+  ratios
+- Stampede protection for computed values (get_or_compute): XFetch-style
+  probabilistic early refresh plus a short Redis lock, so one worker
+  recomputes while the others keep serving the current value or wait
+- Stale-while-revalidate: entries can outlive their freshness TTL by a
+  separate stale TTL; stale hits are served at once and refreshed in the
+  background
+- Versioned per-user namespaces: user-scoped keys embed a generation
+  counter, so invalidating a user is one INCR and old entries age out
+- Read round trips are timed as the `redis` stage of the request trace
 """
 
+import asyncio
 import json
 import logging
+import math
 import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Callable, Dict, List, Optional, TypeVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import redis
+import redis.asyncio as aioredis
 from redis.exceptions import ConnectionError as RedisConnectionError
 from redis.exceptions import RedisError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from . import metrics
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -34,17 +64,229 @@ REDIS_ENABLED = os.getenv("REDIS_ENABLED", "true").lower() == "true"
 TTL_RECOMMENDATIONS = int(os.getenv("CACHE_TTL_RECOMMENDATIONS", "300"))  # 5 minutes
 TTL_MOVIE_METADATA = int(os.getenv("CACHE_TTL_MOVIE_METADATA", "3600"))  # 1 hour
 TTL_USER_PROFILE = int(os.getenv("CACHE_TTL_USER_PROFILE", "600"))  # 10 minutes
-TTL_TRENDING = int(os.getenv("CACHE_TTL_TRENDING", "900"))  # 15 minutes
+# How long past freshness a recommendation list may still be served
+TTL_RECOMMENDATIONS_STALE = int(os.getenv("CACHE_TTL_RECOMMENDATIONS_STALE", "3600"))  # 1 hour
+
+# Availability tracking (in seconds)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "0.5"))
+REDIS_PROBE_INTERVAL = float(os.getenv("REDIS_PROBE_INTERVAL_SECONDS", "5"))
+REDIS_PROBE_BACKOFF_MIN = float(os.getenv("REDIS_PROBE_BACKOFF_MIN_SECONDS", "0.5"))
+REDIS_PROBE_BACKOFF_MAX = float(os.getenv("REDIS_PROBE_BACKOFF_MAX_SECONDS", "30"))
+
+# Errors that mean "Redis is unreachable", as opposed to a bad command
+_CONNECTION_ERRORS = (RedisConnectionError, RedisTimeoutError)
+
+# In-process L1 (in seconds). Kept shorter than the Redis TTLs: L1 entries
+# aren't refreshed by other workers' writes unless invalidation is enabled.
+L1_ENABLED = os.getenv("CACHE_L1_ENABLED", "true").lower() == "true"
+L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "10000"))
+L1_TTLS: Dict[str, float] = {
+    "recs": float(os.getenv("CACHE_L1_TTL_RECOMMENDATIONS", "30")),
+    "movie": float(os.getenv("CACHE_L1_TTL_MOVIE_METADATA", "300")),
+    "user": float(os.getenv("CACHE_L1_TTL_USER_PROFILE", "30")),
+    # how long another worker's invalidation can go unnoticed without pub/sub
+    "gen": float(os.getenv("CACHE_L1_TTL_GENERATION", "5")),
+}
+# Publish set/delete on this channel so other workers drop their L1 copy
+L1_INVALIDATION = os.getenv("CACHE_L1_INVALIDATION", "false").lower() == "true"
+L1_INVALIDATION_CHANNEL = os.getenv("CACHE_L1_INVALIDATION_CHANNEL", "cache:invalidate")
+
+# Stampede protection. beta > 1 refreshes earlier, 0 disables early refresh.
+XFETCH_BETA = float(os.getenv("CACHE_XFETCH_BETA", "1.0"))
+# Upper bound on one recompute; the lock expires on its own if a worker dies
+LOCK_TTL_MS = int(os.getenv("CACHE_LOCK_TTL_MS", "5000"))
+# How long a worker that lost the lock waits for the winner's value
+LOCK_WAIT_MS = int(os.getenv("CACHE_LOCK_WAIT_MS", "300"))
+LOCK_POLL_MS = 25
+
+# Compare-and-delete, so a worker never releases a lock it no longer holds
+_UNLOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+# Per-user generations. Outlives every user-scoped entry, so a counter that
+# expires (and restarts at 0) can't resurrect an old generation's values.
+TTL_GENERATION = int(os.getenv("CACHE_TTL_GENERATION", "86400"))  # 1 day
+
+# Generation + value in one round trip: KEYS[1] = gen key, ARGV[1] = key prefix.
+# The data key isn't declared in KEYS, which Redis Cluster only tolerates when
+# it hashes to the gen key's slot: both carry the same {user_id} hash tag (see
+# generation_key / user_key), so all of a user's keys live in one slot.
+_VERSIONED_GET_SCRIPT = "local g = redis.call('get', KEYS[1]) or '0' return {g, redis.call('get', ARGV[1] .. g)}"
+_BUMP_GENERATION_SCRIPT = "local g = redis.call('incr', KEYS[1]) redis.call('expire', KEYS[1], ARGV[1]) return g"
+
+
+# -----------------------
+# In-process L1
+# -----------------------
+class LocalCache:
+    """
+    Bounded LRU of decoded JSON values with per-namespace TTLs.
+
+    The namespace is the key prefix before the first ':' (see the key
+    generators below); keys in a namespace without an L1 TTL are not kept.
+    Values are shared between callers, so treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = L1_MAX_ENTRIES, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = L1_TTLS if ttls is None else ttls
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, key: str, ttl: Optional[float] = None) -> float:
+        """L1 TTL for a key, never longer than the Redis TTL it was written with."""
+        l1_ttl = self.ttls.get(key.split(":", 1)[0], 0.0)
+        return min(l1_ttl, ttl) if ttl is not None else l1_ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        l1_ttl = self.ttl_for(key, ttl)
+        if l1_ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + l1_ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# -----------------------
+# Stampede protection helpers
+# -----------------------
+# get_or_compute stores {"__xf": 1, "v": value, "d": compute seconds,
+# "e": expiry epoch}. Plain values (written before, or by set_json) are
+# still readable; they just never refresh early.
+_MISSING = object()
+
+
+def _wrap(value: Any, delta: float, ttl: int) -> Dict[str, Any]:
+    return {"__xf": 1, "v": value, "d": round(delta, 4), "e": time.time() + ttl}
+
+
+def _unwrap(entry: Any) -> Tuple[Any, float, Optional[float]]:
+    """Return (value, compute seconds, expiry epoch or None)."""
+    if isinstance(entry, dict) and entry.get("__xf") == 1:
+        return entry.get("v"), float(entry.get("d", 0.0)), entry.get("e")
+    return entry, 0.0, None
+
+
+def _refresh_early(delta: float, expiry: Optional[float], beta: float = XFETCH_BETA) -> bool:
+    """
+    XFetch (Vattani et al.): refresh with a probability that rises as expiry
+    nears, scaled by how long the value takes to compute. Spreads refreshes
+    out instead of every worker missing at the same instant.
+    """
+    if expiry is None or delta <= 0 or beta <= 0:
+        return False
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= expiry
+
+
+class StaleList(list):
+    """A cached list served past its freshness TTL (stale-while-revalidate)."""
+
+    stale = True
+
+
+class StaleDict(dict):
+    """A cached dict served past its freshness TTL."""
+
+    stale = True
+
+
+def _is_stale(expiry: Optional[float]) -> bool:
+    return expiry is not None and time.time() >= expiry
+
+
+def _serve(entry: Any) -> Any:
+    """Unwrap an entry, marking lists and dicts that are past their freshness TTL."""
+    value, _, expiry = _unwrap(entry)
+    if _is_stale(expiry) and isinstance(value, list):
+        return StaleList(value)
+    if _is_stale(expiry) and isinstance(value, dict):
+        return StaleDict(value)
+    return value
+
+
+# Keeps background refresh tasks referenced until they finish
+_refresh_tasks: set = set()
+
+
+def _lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+
+def _not_none(value: Any) -> bool:
+    return value is not None
 
 
 # -----------------------
 # Redis Connection
 # -----------------------
 class RedisCache:
-    """Redis cache client with connection pooling and health checks."""
+    """
+    Redis cache client with connection pooling and health checks.
+
+    Availability is a flag maintained off the request path: a daemon thread
+    PINGs every REDIS_PROBE_INTERVAL while Redis is up, and with exponential
+    backoff (REDIS_PROBE_BACKOFF_MIN..MAX) while it is down. Commands that
+    fail with a connection/timeout error flip the flag immediately, so
+    requests stop touching Redis until the prober sees it again.
+
+    get_json/set_json (and the async variants) go through an in-process L1
+    first, so hot keys are served without a network round trip or JSON
+    decode. With CACHE_L1_INVALIDATION=true, set_json/delete publish the key
+    and every worker drops its L1 copy.
+    """
 
     _instance: Optional["RedisCache"] = None
     _client: Optional[redis.Redis] = None
+    _aclient: Optional[aioredis.Redis] = None
+    _available: bool = False
+    _last_error: Optional[str] = None
+    _down_since: Optional[float] = None
+    _prober: Optional[threading.Thread] = None
+    _state_lock = threading.Lock()
+    _l1: Optional[LocalCache] = None
+    _l2_hits: int = 0
+    _l2_misses: int = 0
+    _subscriber: Optional[threading.Thread] = None
+    _nonce: str = uuid.uuid4().hex
+    _stampede: Optional[Dict[str, int]] = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -52,92 +294,762 @@ class RedisCache:
         return cls._instance
 
     def __init__(self):
+        if self._l1 is None and L1_ENABLED:
+            self._l1 = LocalCache()
         if self._client is None and REDIS_ENABLED:
             self._connect()
 
     def _connect(self) -> None:
-        """Establish connection to Redis."""
+        """Create the client, probe it once and start the background prober."""
         try:
             self._client = redis.from_url(
                 REDIS_URL,
                 decode_responses=True,
-                socket_timeout=2.0,
-                socket_connect_timeout=2.0,
-                retry_on_timeout=True,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                # no in-line retries: the prober owns recovery
+                retry_on_timeout=False,
                 health_check_interval=30,
             )
-            # Test connection
-            self._client.ping()
-            logger.info(f"Redis connected: {REDIS_URL.split('@')[-1]}")
-        except RedisConnectionError as e:
-            logger.warning(f"Redis connection failed: {e}")
-            self._client = None
         except Exception as e:
             logger.error(f"Redis initialization error: {e}")
             self._client = None
+            return
+
+        if self._probe():
+            logger.info(f"Redis connected: {REDIS_URL.split('@')[-1]}")
+        else:
+            logger.warning(f"Redis connection failed: {self._last_error}")
+        self._start_prober()
+        if L1_INVALIDATION and self._l1 is not None:
+            self._start_subscriber()
+
+    # -----------------------
+    # Availability tracking
+    # -----------------------
+    def _mark_up(self) -> None:
+        with self._state_lock:
+            if self._available:
+                return
+            was_down = self._down_since is not None
+            self._available = True
+            self._down_since = None
+            self._last_error = None
+        if was_down:
+            logger.info("Redis available again")
+
+    def _mark_down(self, error: Exception) -> None:
+        with self._state_lock:
+            self._last_error = str(error)
+            if not self._available and self._down_since is not None:
+                return
+            self._available = False
+            self._down_since = time.monotonic()
+        logger.warning(f"Redis marked unavailable: {error}")
+
+    def _probe(self) -> bool:
+        """PING once and update the availability flag."""
+        try:
+            self._client.ping()
+        except RedisError as e:
+            self._mark_down(e)
+            return False
+        self._mark_up()
+        return True
+
+    def _command_failed(self, op: str, key: str, error: RedisError) -> None:
+        """Passive detection: connection-level failures take Redis out of use."""
+        logger.warning(f"Redis {op} error for {key}: {error}")
+        if isinstance(error, _CONNECTION_ERRORS):
+            self._mark_down(error)
+
+    def report_error(self, op: str, key: str, error: RedisError) -> None:
+        """For modules issuing their own commands through client/aclient."""
+        self._command_failed(op, key, error)
+
+    def _next_probe(self, backoff: float) -> Tuple[float, float]:
+        """Return (seconds until the next probe, backoff to carry forward)."""
+        if self._available:
+            return REDIS_PROBE_INTERVAL, REDIS_PROBE_BACKOFF_MIN
+        return backoff, min(backoff * 2, REDIS_PROBE_BACKOFF_MAX)
+
+    def _probe_loop(self) -> None:
+        backoff = REDIS_PROBE_BACKOFF_MIN
+        while True:
+            delay, backoff = self._next_probe(backoff)
+            time.sleep(delay)
+            self._probe()
+
+    def _start_prober(self) -> None:
+        if self._prober is not None:
+            return
+        self._prober = threading.Thread(target=self._probe_loop, name="redis-prober", daemon=True)
+        self._prober.start()
+
+    # -----------------------
+    # L1 invalidation
+    # -----------------------
+    @property
+    def _origin(self) -> str:
+        # pid included so forked workers sharing the import-time nonce differ
+        return f"{self._nonce}.{os.getpid()}"
+
+    def _publish_invalidation(self, key: str) -> None:
+        if not (L1_INVALIDATION and self._available):
+            return
+        try:
+            self._client.publish(L1_INVALIDATION_CHANNEL, f"{self._origin}|{key}")
+        except RedisError as e:
+            self._command_failed("publish", key, e)
+
+    def _on_invalidation(self, message: str) -> None:
+        origin, _, key = message.partition("|")
+        if origin != self._origin and self._l1 is not None:
+            self._l1.delete(key)
+
+    def _subscribe_loop(self) -> None:
+        backoff = REDIS_PROBE_BACKOFF_MIN
+        while True:
+            if not self._available:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, REDIS_PROBE_BACKOFF_MAX)
+                continue
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(L1_INVALIDATION_CHANNEL)
+                backoff = REDIS_PROBE_BACKOFF_MIN
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._on_invalidation(message["data"])
+            except RedisError as e:
+                # we may have missed invalidations while disconnected
+                logger.warning(f"Redis invalidation subscriber error: {e}")
+                self._l1.clear()
+            finally:
+                try:
+                    pubsub.close()
+                except RedisError:
+                    pass
+
+    def _start_subscriber(self) -> None:
+        if self._subscriber is not None:
+            return
+        self._subscriber = threading.Thread(target=self._subscribe_loop, name="redis-l1-invalidation", daemon=True)
+        self._subscriber.start()
+
+    def _count_l2(self, hit: bool) -> None:
+        with self._state_lock:
+            if hit:
+                self._l2_hits += 1
+            else:
+                self._l2_misses += 1
+
+    def tier_stats(self) -> Dict[str, Any]:
+        """Hit ratios per tier (l1 = in-process, l2 = Redis)."""
+        with self._state_lock:
+            l2_hits, l2_misses = self._l2_hits, self._l2_misses
+        lookups = l2_hits + l2_misses
+        return {
+            "l1": self._l1.stats() if self._l1 is not None else {"enabled": False},
+            "l2": {
+                "hits": l2_hits,
+                "misses": l2_misses,
+                "hit_ratio": round(l2_hits / lookups, 4) if lookups else None,
+            },
+            "invalidation": L1_INVALIDATION,
+            "stampede": dict(self._stampede or {}),
+        }
+
+    def _count(self, event: str) -> None:
+        with self._state_lock:
+            if self._stampede is None:
+                self._stampede = {}
+            self._stampede[event] = self._stampede.get(event, 0) + 1
 
     @property
     def client(self) -> Optional[redis.Redis]:
         return self._client
 
+    @property
+    def aclient(self) -> Optional[aioredis.Redis]:
+        """
+        Async client, created on first use inside the running event loop.
+
+        Only handed out while Redis is marked available, so an outage doesn't
+        cost every async request a connect timeout.
+        """
+        if not self._available:
+            return None
+        if self._aclient is None:
+            self._aclient = aioredis.from_url(
+                REDIS_URL,
+                decode_responses=True,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                retry_on_timeout=False,
+                health_check_interval=30,
+            )
+        return self._aclient
+
+    async def aclose(self) -> None:
+        """Close the async connection pool (app shutdown)."""
+        if self._aclient is not None:
+            aclient, self._aclient = self._aclient, None
+            await aclient.aclose()
+
     @property
     def is_available(self) -> bool:
-        """Check if Redis is available."""
-        if not self._client:
-            return False
-        try:
-            self._client.ping()
-            return True
-        except RedisError:
-            return False
+        """Whether Redis is currently usable (flag read, no round trip)."""
+        return self._available
 
     def get(self, key: str) -> Optional[str]:
         """Get value from cache."""
-        if not self._client:
+        if not self._available:
             return None
         try:
-            return self._client.get(key)
+            with span("redis"):
+                return self._client.get(key)
         except RedisError as e:
-            logger.warning(f"Redis get error for {key}: {e}")
+            self._command_failed("get", key, e)
             return None
 
     def set(self, key: str, value: str, ttl: int = 300) -> bool:
         """Set value in cache with TTL."""
-        if not self._client:
+        if self._l1 is not None:
+            self._l1.delete(key)
+        if not self._available:
             return False
         try:
             return self._client.setex(key, ttl, value)
         except RedisError as e:
-            logger.warning(f"Redis set error for {key}: {e}")
+            self._command_failed("set", key, e)
             return False
 
     def delete(self, key: str) -> bool:
-        """Delete key from cache."""
-        if not self._client:
+        """Delete key from cache (both tiers, and other workers' L1 if enabled)."""
+        if self._l1 is not None:
+            self._l1.delete(key)
+        if not self._available:
             return False
         try:
-            return bool(self._client.delete(key))
+            deleted = bool(self._client.delete(key))
         except RedisError as e:
-            logger.warning(f"Redis delete error for {key}: {e}")
+            self._command_failed("delete", key, e)
             return False
+        self._publish_invalidation(key)
+        return deleted
 
     def get_json(self, key: str) -> Optional[Any]:
-        """Get JSON value from cache."""
+        """Get JSON value from cache (L1, then Redis)."""
+        hit = self._l1_lookup(key)
+        if hit is not None:
+            return hit
         value = self.get(key)
+        return self._decode_l2(key, value)
+
+    def set_json(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set JSON value in cache."""
+        try:
+            stored = self.set(key, json.dumps(value), ttl)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"JSON serialization error for {key}: {e}")
+            return False
+        self._after_set_json(key, value, ttl)
+        return stored
+
+    def _l1_lookup(self, key: str) -> Optional[Any]:
+        if self._l1 is None:
+            return None
+        hit = self._l1.get(key)
+        metrics.cache_lookup(key, "l1", hit is not None)
+        return hit
+
+    def _decode_l2(self, key: str, value: Optional[str]) -> Optional[Any]:
+        if not self._available:
+            return None
+        self._count_l2(bool(value))
+        metrics.cache_lookup(key, "l2", bool(value))
         if value:
             try:
-                return json.loads(value)
+                decoded = json.loads(value)
             except json.JSONDecodeError:
                 return None
+            if self._l1 is not None:
+                self._l1.set(key, decoded)
+            return decoded
         return None
 
-    def set_json(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Set JSON value in cache."""
+    def _after_set_json(self, key: str, value: Any, ttl: int) -> None:
+        if self._l1 is not None:
+            self._l1.set(key, value, ttl)
+        self._publish_invalidation(key)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Get value from cache without blocking the event loop."""
+        client = self.aclient
+        if not client:
+            return None
+        try:
+            with span("redis"):
+                return await client.get(key)
+        except RedisError as e:
+            self._command_failed("get", key, e)
+            return None
+
+    async def aset(self, key: str, value: str, ttl: int = 300) -> bool:
+        """Set value in cache with TTL without blocking the event loop."""
+        if self._l1 is not None:
+            self._l1.delete(key)
+        client = self.aclient
+        if not client:
+            return False
+        try:
+            return bool(await client.setex(key, ttl, value))
+        except RedisError as e:
+            self._command_failed("set", key, e)
+            return False
+
+    async def aget_json(self, key: str) -> Optional[Any]:
+        """Async get_json."""
+        hit = self._l1_lookup(key)
+        if hit is not None:
+            return hit
+        value = await self.aget(key)
+        return self._decode_l2(key, value)
+
+    async def aset_json(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Async set_json."""
         try:
-            return self.set(key, json.dumps(value), ttl)
+            stored = await self.aset(key, json.dumps(value), ttl)
         except (TypeError, ValueError) as e:
             logger.warning(f"JSON serialization error for {key}: {e}")
             return False
+        if self._l1 is not None:
+            self._l1.set(key, value, ttl)
+        client = self.aclient if L1_INVALIDATION else None
+        if client is not None:
+            try:
+                await client.publish(L1_INVALIDATION_CHANNEL, f"{self._origin}|{key}")
+            except RedisError as e:
+                self._command_failed("publish", key, e)
+        return stored
+
+    # -----------------------
+    # Batched JSON operations
+    # -----------------------
+    def _l1_many(self, keys: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """Split keys into (L1 hits, keys still to fetch)."""
+        found: Dict[str, Any] = {}
+        missing: List[str] = []
+        for key in keys:
+            hit = self._l1_lookup(key)
+            if hit is not None:
+                found[key] = hit
+            else:
+                missing.append(key)
+        return found, missing
+
+    def _decode_many(self, keys: List[str], values: List[Optional[str]], found: Dict[str, Any]) -> Dict[str, Any]:
+        for key, value in zip(keys, values):
+            decoded = self._decode_l2(key, value)
+            if decoded is not None:
+                found[key] = decoded
+        return found
+
+    def mget_json(self, keys: List[str]) -> Dict[str, Any]:
+        """Batch get_json: L1 first, then one MGET for the rest. Only found keys are returned."""
+        found, missing = self._l1_many(keys)
+        if not missing or not self._available:
+            return found
+        try:
+            with span("redis"):
+                values = self._client.mget(missing)
+        except RedisError as e:
+            self._command_failed("mget", missing[0], e)
+            return found
+        return self._decode_many(missing, values, found)
+
+    async def amget_json(self, keys: List[str]) -> Dict[str, Any]:
+        """Async mget_json."""
+        found, missing = self._l1_many(keys)
+        client = self.aclient if missing else None
+        if client is None:
+            return found
+        try:
+            with span("redis"):
+                values = await client.mget(missing)
+        except RedisError as e:
+            self._command_failed("mget", missing[0], e)
+            return found
+        return self._decode_many(missing, values, found)
+
+    def _encode_many(self, mapping: Dict[str, Any], ttl: int) -> Optional[Dict[str, str]]:
+        try:
+            encoded = {key: json.dumps(value) for key, value in mapping.items()}
+        except (TypeError, ValueError) as e:
+            logger.warning(f"JSON serialization error for batch of {len(mapping)}: {e}")
+            return None
+        if self._l1 is not None:
+            for key, value in mapping.items():
+                self._l1.set(key, value, ttl)
+        return encoded
+
+    def mset_json(self, mapping: Dict[str, Any], ttl: int = 300) -> bool:
+        """
+        Batch set_json: SETEX per key in one pipelined round trip (no
+        MULTI; each key stands alone). Meant for filling misses, so it
+        doesn't publish L1 invalidations.
+        """
+        encoded = self._encode_many(mapping, ttl)
+        if not encoded or not self._available:
+            return False
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key, value in encoded.items():
+                pipe.setex(key, ttl, value)
+            pipe.execute()
+            return True
+        except RedisError as e:
+            self._command_failed("mset", next(iter(encoded)), e)
+            return False
+
+    async def amset_json(self, mapping: Dict[str, Any], ttl: int = 300) -> bool:
+        """Async mset_json."""
+        encoded = self._encode_many(mapping, ttl)
+        client = self.aclient if encoded else None
+        if client is None:
+            return False
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key, value in encoded.items():
+                pipe.setex(key, ttl, value)
+            await pipe.execute()
+            return True
+        except RedisError as e:
+            self._command_failed("mset", next(iter(encoded)), e)
+            return False
+
+    # -----------------------
+    # Stampede protection
+    # -----------------------
+    def _try_lock(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            return token if self._client.set(_lock_key(key), token, nx=True, px=LOCK_TTL_MS) else None
+        except RedisError as e:
+            self._command_failed("lock", key, e)
+            return None
+
+    def _unlock(self, key: str, token: str) -> None:
+        try:
+            self._client.eval(_UNLOCK_SCRIPT, 1, _lock_key(key), token)
+        except RedisError as e:
+            self._command_failed("unlock", key, e)
+
+    def _read_l2(self, key: str) -> Optional[Any]:
+        """Read straight from Redis, refreshing the L1 copy."""
+        if self._l1 is not None:
+            self._l1.delete(key)
+        return self.get_json(key)
+
+    def _compute_and_store(self, key: str, ttl: int, compute: Callable[[], T], should_cache, stale_ttl: int = 0) -> T:
+        t0 = time.perf_counter()
+        value = compute()
+        if should_cache(value):
+            self.set_json(key, _wrap(value, time.perf_counter() - t0, ttl), ttl + stale_ttl)
+        return value
+
+    def _refresh_in_background(self, key: str, ttl: int, compute, should_cache, stale_ttl: int, token: str) -> None:
+        def run() -> None:
+            try:
+                self._compute_and_store(key, ttl, compute, should_cache, stale_ttl)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                self._unlock(key, token)
+
+        threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+
+    def get_or_compute(
+        self,
+        key: str,
+        ttl: int,
+        compute: Callable[[], T],
+        should_cache: Callable[[Any], bool] = _not_none,
+        stale_ttl: int = 0,
+        prefetched: Any = _MISSING,
+    ) -> T:
+        """
+        Return the cached value for key, computing it at most once across
+        workers when it is missing or about to expire.
+
+        - Fresh value: returned as is.
+        - Value close to expiry (XFetch says refresh): the worker that gets
+          the lock recomputes; everyone else keeps serving the current value.
+          A failed refresh also falls back to the current value.
+        - Stale value (past ttl, kept for another stale_ttl): returned at once
+          as a StaleList/StaleDict; the lock winner refreshes it in
+          a background thread.
+        - Missing value: the lock winner computes; the others poll for up to
+          LOCK_WAIT_MS and compute themselves only if nothing shows up.
+
+        prefetched is the entry when the caller already read it (see
+        get_user_scoped).
+        """
+        if not self._available:
+            return compute()
+
+        entry = self.get_json(key) if prefetched is _MISSING else prefetched
+        if entry is not None:
+            value, delta, expiry = _unwrap(entry)
+            stale = _is_stale(expiry)
+            if not stale and not _refresh_early(delta, expiry):
+                return value
+            # our L1 copy may be older than what another worker already wrote
+            latest = self._read_l2(key)
+            if latest is not None and _unwrap(latest)[2] != expiry:
+                return _serve(latest)
+            token = self._try_lock(key)
+            if stale:
+                self._count("stale_hit")
+                if token is not None:
+                    self._refresh_in_background(key, ttl, compute, should_cache, stale_ttl, token)
+                return _serve(entry)
+            if token is None:
+                self._count("refresh_in_progress")
+                return value
+            self._count("early_refresh")
+            try:
+                return self._compute_and_store(key, ttl, compute, should_cache, stale_ttl)
+            except Exception as e:
+                logger.warning(f"Early refresh failed for {key}, serving current value: {e}")
+                return value
+            finally:
+                self._unlock(key, token)
+
+        token = self._try_lock(key)
+        if token is None:
+            self._count("lock_wait")
+            deadline = time.monotonic() + LOCK_WAIT_MS / 1000.0
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_MS / 1000.0)
+                entry = self.get_json(key)
+                if entry is not None:
+                    return _serve(entry)
+            self._count("lock_wait_timeout")
+            return compute()
+        try:
+            # another worker may have filled it between our miss and our lock
+            entry = self._read_l2(key)
+            if entry is not None:
+                return _serve(entry)
+            self._count("recompute")
+            return self._compute_and_store(key, ttl, compute, should_cache, stale_ttl)
+        finally:
+            self._unlock(key, token)
+
+    async def _atry_lock(self, key: str) -> Optional[str]:
+        client = self.aclient
+        if client is None:
+            return None
+        token = uuid.uuid4().hex
+        try:
+            return token if await client.set(_lock_key(key), token, nx=True, px=LOCK_TTL_MS) else None
+        except RedisError as e:
+            self._command_failed("lock", key, e)
+            return None
+
+    async def _aunlock(self, key: str, token: str) -> None:
+        client = self.aclient
+        if client is None:
+            return
+        try:
+            await client.eval(_UNLOCK_SCRIPT, 1, _lock_key(key), token)
+        except RedisError as e:
+            self._command_failed("unlock", key, e)
+
+    async def _aread_l2(self, key: str) -> Optional[Any]:
+        if self._l1 is not None:
+            self._l1.delete(key)
+        return await self.aget_json(key)
+
+    async def _acompute_and_store(
+        self, key: str, ttl: int, compute: Callable[[], Awaitable[T]], should_cache, stale_ttl: int = 0
+    ) -> T:
+        t0 = time.perf_counter()
+        value = await compute()
+        if should_cache(value):
+            await self.aset_json(key, _wrap(value, time.perf_counter() - t0, ttl), ttl + stale_ttl)
+        return value
+
+    def _arefresh_in_background(self, key: str, ttl: int, compute, should_cache, stale_ttl: int, token: str) -> None:
+        async def run() -> None:
+            try:
+                await self._acompute_and_store(key, ttl, compute, should_cache, stale_ttl)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                await self._aunlock(key, token)
+
+        task = asyncio.get_running_loop().create_task(run())
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        ttl: int,
+        compute: Callable[[], Awaitable[T]],
+        should_cache: Callable[[Any], bool] = _not_none,
+        stale_ttl: int = 0,
+        prefetched: Any = _MISSING,
+    ) -> T:
+        """Async get_or_compute; compute is a coroutine function, stale refreshes run as tasks."""
+        if not self._available:
+            return await compute()
+
+        entry = await self.aget_json(key) if prefetched is _MISSING else prefetched
+        if entry is not None:
+            value, delta, expiry = _unwrap(entry)
+            stale = _is_stale(expiry)
+            if not stale and not _refresh_early(delta, expiry):
+                return value
+            latest = await self._aread_l2(key)
+            if latest is not None and _unwrap(latest)[2] != expiry:
+                return _serve(latest)
+            token = await self._atry_lock(key)
+            if stale:
+                self._count("stale_hit")
+                if token is not None:
+                    self._arefresh_in_background(key, ttl, compute, should_cache, stale_ttl, token)
+                return _serve(entry)
+            if token is None:
+                self._count("refresh_in_progress")
+                return value
+            self._count("early_refresh")
+            try:
+                return await self._acompute_and_store(key, ttl, compute, should_cache, stale_ttl)
+            except Exception as e:
+                logger.warning(f"Early refresh failed for {key}, serving current value: {e}")
+                return value
+            finally:
+                await self._aunlock(key, token)
+
+        token = await self._atry_lock(key)
+        if token is None:
+            self._count("lock_wait")
+            deadline = time.monotonic() + LOCK_WAIT_MS / 1000.0
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_MS / 1000.0)
+                entry = await self.aget_json(key)
+                if entry is not None:
+                    return _serve(entry)
+            self._count("lock_wait_timeout")
+            return await compute()
+        try:
+            entry = await self._aread_l2(key)
+            if entry is not None:
+                return _serve(entry)
+            self._count("recompute")
+            return await self._acompute_and_store(key, ttl, compute, should_cache, stale_ttl)
+        finally:
+            await self._aunlock(key, token)
+
+    # -----------------------
+    # Versioned per-user namespaces
+    # -----------------------
+    def _l1_versioned(self, namespace: str, user_id: str) -> Tuple[Optional[int], Any]:
+        """(generation, entry) from L1; entry is _MISSING unless both are cached."""
+        if self._l1 is None:
+            return None, _MISSING
+        generation = self._l1.get(generation_key(user_id))
+        if generation is None:
+            return None, _MISSING
+        hit = self._l1_lookup(user_key(namespace, user_id, generation))
+        return generation, (hit if hit is not None else _MISSING)
+
+    def _versioned_result(self, namespace: str, user_id: str, reply: Any) -> Tuple[str, Optional[Any]]:
+        generation = int(reply[0])
+        if self._l1 is not None:
+            self._l1.set(generation_key(user_id), generation)
+        key = user_key(namespace, user_id, generation)
+        return key, self._decode_l2(key, reply[1])
+
+    def get_user_scoped(self, namespace: str, user_id: str) -> Tuple[str, Optional[Any]]:
+        """
+        Resolve a user-scoped key and read it: (current key, JSON value or None).
+
+        The generation and the value come back in one round trip (a small
+        Lua script); both are kept in L1, so hot users skip Redis entirely.
+        """
+        generation, entry = self._l1_versioned(namespace, user_id)
+        if entry is not _MISSING:
+            return user_key(namespace, user_id, generation), entry
+        if not self._available:
+            return user_key(namespace, user_id, generation or 0), None
+        gen_key = generation_key(user_id)
+        try:
+            with span("redis"):
+                reply = self._client.eval(_VERSIONED_GET_SCRIPT, 1, gen_key, user_key(namespace, user_id, ""))
+        except RedisError as e:
+            self._command_failed("get", gen_key, e)
+            return user_key(namespace, user_id, generation or 0), None
+        return self._versioned_result(namespace, user_id, reply)
+
+    async def aget_user_scoped(self, namespace: str, user_id: str) -> Tuple[str, Optional[Any]]:
+        """Async get_user_scoped."""
+        generation, entry = self._l1_versioned(namespace, user_id)
+        if entry is not _MISSING:
+            return user_key(namespace, user_id, generation), entry
+        client = self.aclient
+        if client is None:
+            return user_key(namespace, user_id, generation or 0), None
+        gen_key = generation_key(user_id)
+        try:
+            with span("redis"):
+                reply = await client.eval(_VERSIONED_GET_SCRIPT, 1, gen_key, user_key(namespace, user_id, ""))
+        except RedisError as e:
+            self._command_failed("get", gen_key, e)
+            return user_key(namespace, user_id, generation or 0), None
+        return self._versioned_result(namespace, user_id, reply)
+
+    def generation(self, user_id: str) -> int:
+        """Current generation for user_id (L1, else one GET; 0 when unknown)."""
+        generation = self._l1.get(generation_key(user_id)) if self._l1 is not None else None
+        if generation is not None:
+            return generation
+        raw = self.get(generation_key(user_id))
+        generation = int(raw) if raw else 0
+        if self._l1 is not None and self._available:
+            self._l1.set(generation_key(user_id), generation)
+        return generation
+
+    async def ageneration(self, user_id: str) -> int:
+        """Async generation."""
+        generation = self._l1.get(generation_key(user_id)) if self._l1 is not None else None
+        if generation is not None:
+            return generation
+        raw = await self.aget(generation_key(user_id))
+        generation = int(raw) if raw else 0
+        if self._l1 is not None and self._available:
+            self._l1.set(generation_key(user_id), generation)
+        return generation
+
+    def bump_generation(self, user_id: str) -> Optional[int]:
+        """Invalidate everything user-scoped for user_id with a single INCR."""
+        gen_key = generation_key(user_id)
+        if self._l1 is not None:
+            self._l1.delete(gen_key)
+        if not self._available:
+            return None
+        try:
+            generation = int(self._client.eval(_BUMP_GENERATION_SCRIPT, 1, gen_key, TTL_GENERATION))
+        except RedisError as e:
+            self._command_failed("incr", gen_key, e)
+            return None
+        self._publish_invalidation(gen_key)
+        return generation
 
     def health_check(self) -> Dict[str, Any]:
         """Return health status of Redis connection."""
@@ -147,6 +1059,16 @@ class RedisCache:
         if not self._client:
             return {"status": "disconnected", "enabled": True, "connected": False}
 
+        if not self._available:
+            down_since = self._down_since
+            return {
+                "status": "disconnected",
+                "enabled": True,
+                "connected": False,
+                "error": self._last_error,
+                "down_seconds": round(time.monotonic() - down_since, 1) if down_since else None,
+            }
+
         try:
             info = self._client.info("server")
             return {
@@ -157,6 +1079,7 @@ class RedisCache:
                 "used_memory_human": info.get("used_memory_human", "unknown"),
             }
         except RedisError as e:
+            self._command_failed("info", "server", e)
             return {"status": "error", "enabled": True, "connected": False, "error": str(e)}
 
 
@@ -167,9 +1090,24 @@ cache = RedisCache()
 # -----------------------
 # Cache Key Generators
 # -----------------------
-def recommendations_key(user_id: str, limit: int, offset: int) -> str:
-    """Generate cache key for user recommendations."""
-    return f"recs:{user_id}:{limit}:{offset}"
+def generation_key(user_id: str) -> str:
+    """Generate key for a user's cache generation counter ({user_id} is a Cluster hash tag)."""
+    return f"gen:{{{user_id}}}"
+
+
+def user_key(namespace: str, user_id: str, generation: Any) -> str:
+    """
+    Generate a user-scoped cache key; bumping the generation orphans the old ones.
+
+    Same {user_id} hash tag as generation_key: _VERSIONED_GET_SCRIPT reads
+    both in one script, so they must map to the same Cluster slot.
+    """
+    return f"{namespace}:{{{user_id}}}:g{generation}"
+
+
+def recommendations_key(user_id: str, generation: int = 0) -> str:
+    """Generate cache key for a user's ranked recommendation list."""
+    return user_key("recs", user_id, generation)
 
 
 def movie_key(movie_id: int) -> str:
@@ -177,14 +1115,9 @@ def movie_key(movie_id: int) -> str:
     return f"movie:{movie_id}"
 
 
-def trending_key(limit: int, offset: int) -> str:
-    """Generate cache key for trending movies."""
-    return f"trending:{limit}:{offset}"
-
-
-def user_profile_key(user_id: str) -> str:
+def user_profile_key(user_id: str, generation: int = 0) -> str:
     """Generate cache key for user profile."""
-    return f"user:{user_id}"
+    return user_key("user", user_id, generation)
 
 
 # -----------------------
@@ -206,23 +1139,9 @@ def cached(key_func: Callable[..., str], ttl: int = 300, skip_cache: bool = Fals
             if skip_cache or not cache.is_available:
                 return func(*args, **kwargs)
 
-            # Generate cache key
+            # Generate cache key; get_or_compute handles early refresh and locking
             cache_key = key_func(*args, **kwargs)
-
-            # Try to get from cache
-            cached_value = cache.get_json(cache_key)
-            if cached_value is not None:
-                logger.debug(f"Cache hit: {cache_key}")
-                return cached_value
-
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-
-            if result is not None:
-                cache.set_json(cache_key, result, ttl)
-                logger.debug(f"Cache set: {cache_key}")
-
-            return result
+            return cache.get_or_compute(cache_key, ttl, lambda: func(*args, **kwargs))
 
         return wrapper
 
@@ -230,27 +1149,122 @@ def cached(key_func: Callable[..., str], ttl: int = 300, skip_cache: bool = Fals
 
 
 def invalidate_user_cache(user_id: str) -> None:
-    """Invalidate all cache entries for a user."""
-    if cache.is_available:
-        # Delete recommendation cache (we don't know all keys, so use pattern)
-        # In production, use Redis SCAN with pattern matching
-        cache.delete(user_profile_key(user_id))
-        logger.info(f"Invalidated cache for user: {user_id}")
+    """
+    Invalidate all cache entries for a user.
+
+    Bumps the user's generation: every user-scoped key embeds it, so the
+    old entries are never read again and age out through their TTLs.
+    """
+    # also drops this worker's L1 generation while Redis is down
+    generation = cache.bump_generation(user_id)
+    if generation is not None:
+        logger.info(f"Invalidated cache for user: {user_id} (generation {generation})")
 
 
 # -----------------------
 # Convenience Functions
 # -----------------------
+class RankedList(list):
+    """
+    A user's ranked list as cached: {"items": [...], "depth": n, "complete": bool}.
+
+    depth is how far into the AI ranking the list was fetched, which can be
+    more than len() once repeats are dropped; complete means the AI service
+    had nothing past it.
+    """
+
+    def __init__(self, items=(), depth: int = 0, complete: bool = False, stale: bool = False):
+        super().__init__(items)
+        self.depth = depth
+        self.complete = complete
+        self.stale = stale
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"items": list(self), "depth": self.depth, "complete": self.complete}
+
+
+def _ranked(value: Any) -> RankedList:
+    """Read a cached ranked list; bare lists (written before depth was stored) count as incomplete."""
+    stale = getattr(value, "stale", False)
+    if isinstance(value, dict):
+        items = value.get("items") or []
+        return RankedList(items, int(value.get("depth", len(items))), bool(value.get("complete")), stale)
+    if isinstance(value, list):
+        return RankedList(value, len(value), False, stale)
+    return RankedList()
+
+
+def _slice(ranked: Optional[List[Dict[str, Any]]], limit: int, offset: int) -> Optional[List[Dict[str, Any]]]:
+    """One page of a ranked list, keeping the stale marker."""
+    if not ranked:
+        return None
+    window = ranked[offset : offset + limit]
+    if not window:
+        return None
+    return StaleList(window) if getattr(ranked, "stale", False) else window
+
+
 def get_cached_recommendations(user_id: str, limit: int, offset: int) -> Optional[List[Dict[str, Any]]]:
-    """Get cached recommendations for a user."""
-    key = recommendations_key(user_id, limit, offset)
-    return cache.get_json(key)
+    """Get one page of a user's cached ranked list."""
+    _, entry = cache.get_user_scoped("recs", user_id)
+    return _slice(_ranked(_serve(entry)), limit, offset)
+
+
+async def aget_cached_recommendations(user_id: str, limit: int, offset: int) -> Optional[List[Dict[str, Any]]]:
+    """Async get_cached_recommendations (pages of a stale list come back as StaleList)."""
+    _, entry = await cache.aget_user_scoped("recs", user_id)
+    return _slice(_ranked(_serve(entry)), limit, offset)
+
+
+def set_cached_recommendations(user_id: str, ranked: RankedList) -> bool:
+    """Cache a user's ranked list (e.g. after extending it with another chunk)."""
+    return cache.set_json(
+        recommendations_key(user_id, cache.generation(user_id)),
+        _wrap(ranked.to_dict(), 0.0, TTL_RECOMMENDATIONS),
+        TTL_RECOMMENDATIONS + TTL_RECOMMENDATIONS_STALE,
+    )
+
+
+async def aset_cached_recommendations(user_id: str, ranked: RankedList) -> bool:
+    """Async set_cached_recommendations."""
+    return await cache.aset_json(
+        recommendations_key(user_id, await cache.ageneration(user_id)),
+        _wrap(ranked.to_dict(), 0.0, TTL_RECOMMENDATIONS),
+        TTL_RECOMMENDATIONS + TTL_RECOMMENDATIONS_STALE,
+    )
+
 
+def get_or_compute_recommendations(
+    user_id: str,
+    compute: Callable[[], Dict[str, Any]],
+    should_cache: Callable[[Any], bool] = bool,
+) -> RankedList:
+    """
+    A user's cached ranked list, with stampede protection. compute returns
+    RankedList.to_dict(); should_cache sees that dict. Lists past
+    TTL_RECOMMENDATIONS (but within the stale TTL) come back marked stale
+    and are refreshed in the background.
+    """
+    key, entry = cache.get_user_scoped("recs", user_id)
+    return _ranked(
+        cache.get_or_compute(
+            key, TTL_RECOMMENDATIONS, compute, should_cache, TTL_RECOMMENDATIONS_STALE, prefetched=entry
+        )
+    )
 
-def set_cached_recommendations(user_id: str, limit: int, offset: int, items: List[Dict[str, Any]]) -> bool:
-    """Cache recommendations for a user."""
-    key = recommendations_key(user_id, limit, offset)
-    return cache.set_json(key, items, TTL_RECOMMENDATIONS)
+
+async def aget_or_compute_recommendations(
+    user_id: str,
+    compute: Callable[[], Awaitable[Dict[str, Any]]],
+    should_cache: Callable[[Any], bool] = bool,
+) -> RankedList:
+    """Async get_or_compute_recommendations."""
+    key, entry = await cache.aget_user_scoped("recs", user_id)
+    return _ranked(
+        await cache.aget_or_compute(
+            key, TTL_RECOMMENDATIONS, compute, should_cache, TTL_RECOMMENDATIONS_STALE, prefetched=entry
+        )
+    )
 
 
 def get_cached_movie(movie_id: int) -> Optional[Dict[str, Any]]:
@@ -265,13 +1279,23 @@ def set_cached_movie(movie_id: int, data: Dict[str, Any]) -> bool:
     return cache.set_json(key, data, TTL_MOVIE_METADATA)
 
 
-def get_cached_trending(limit: int, offset: int) -> Optional[List[Dict[str, Any]]]:
-    """Get cached trending movies."""
-    key = trending_key(limit, offset)
-    return cache.get_json(key)
+def get_cached_movies(movie_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Get cached metadata for many movies with one MGET; misses are left out."""
+    found = cache.mget_json([movie_key(movie_id) for movie_id in movie_ids])
+    return {movie_id: found[movie_key(movie_id)] for movie_id in movie_ids if movie_key(movie_id) in found}
+
+
+def set_cached_movies(movies: Dict[int, Dict[str, Any]]) -> bool:
+    """Cache metadata for many movies with one pipelined round trip."""
+    return cache.mset_json({movie_key(movie_id): data for movie_id, data in movies.items()}, TTL_MOVIE_METADATA)
+
+
+async def aget_cached_movies(movie_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Async get_cached_movies."""
+    found = await cache.amget_json([movie_key(movie_id) for movie_id in movie_ids])
+    return {movie_id: found[movie_key(movie_id)] for movie_id in movie_ids if movie_key(movie_id) in found}
 
 
-def set_cached_trending(limit: int, offset: int, items: List[Dict[str, Any]]) -> bool:
-    """Cache trending movies."""
-    key = trending_key(limit, offset)
-    return cache.set_json(key, items, TTL_TRENDING)
+async def aset_cached_movies(movies: Dict[int, Dict[str, Any]]) -> bool:
+    """Async set_cached_movies."""
+    return await cache.amset_json({movie_key(movie_id): data for movie_id, data in movies.items()}, TTL_MOVIE_METADATA)
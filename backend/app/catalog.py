@@ -0,0 +1,166 @@
+"""
+In-process movie catalog snapshot for Nuvie Backend.
+
+The movies table is small (a few thousand rows) and rarely changes, so the
+DB fallback and trending feeds page through an in-memory copy instead of
+running LIMIT/OFFSET queries on every request.
+
+Features:
+- Immutable snapshots (movie_id array + pre-built item payloads), swapped
+  atomically; readers never lock
+- Periodic refresh on a daemon thread (CATALOG_REFRESH_INTERVAL)
+- Change signal: signal_change() bumps catalog:version in Redis, every
+  worker picks it up within CATALOG_POLL_INTERVAL
+- A failed refresh keeps the last good snapshot, so pages keep serving
+  while the DB is slow or down
+"""
+
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .cache import cache
+
+logger = logging.getLogger(__name__)
+
+# -----------------------
+# Configuration
+# -----------------------
+CATALOG_ENABLED = os.getenv("CATALOG_ENABLED", "true").lower() == "true"
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "300"))
+CATALOG_POLL_INTERVAL = float(os.getenv("CATALOG_POLL_INTERVAL", "5"))
+CATALOG_VERSION_KEY = "catalog:version"
+TTL_CATALOG_VERSION = 86400 * 30
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One immutable copy of the catalog, ordered by movie_id."""
+
+    movie_ids: array
+    items: Tuple[Dict[str, Any], ...]
+    version: Optional[str]
+    loaded_at: float
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def page(self, limit: int, offset: int, descending: bool = False) -> List[Dict[str, Any]]:
+        """Slice one page; payloads are shared, callers must not mutate them."""
+        if descending:
+            end = len(self.items) - offset
+            if end <= 0:
+                return []
+            return list(reversed(self.items[max(end - limit, 0) : end]))
+        return list(self.items[offset : offset + limit])
+
+    def page_after(self, limit: int, after: int, descending: bool = False) -> List[Dict[str, Any]]:
+        """Keyset page: the movies right after movie_id `after` in either direction."""
+        if descending:
+            end = bisect_left(self.movie_ids, after)
+            return list(reversed(self.items[max(end - limit, 0) : end]))
+        start = bisect_right(self.movie_ids, after)
+        return list(self.items[start : start + limit])
+
+    def get(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        """Payload for one movie, by binary search over movie_ids."""
+        i = bisect_left(self.movie_ids, movie_id)
+        if i < len(self.movie_ids) and self.movie_ids[i] == movie_id:
+            return self.items[i]
+        return None
+
+
+class Catalog:
+    """Holds the current snapshot and keeps it fresh."""
+
+    def __init__(self, load: Callable[[], Sequence[Dict[str, Any]]]):
+        # load() returns one payload per movie, each with a movie_id
+        self._load = load
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._changed = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._refresh_failures = 0
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    def page(self, limit: int, offset: int, descending: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Page from the snapshot, or None when none has loaded yet."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return snapshot.page(limit, offset, descending)
+
+    def page_after(self, limit: int, after: int, descending: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Keyset page from the snapshot, or None when none has loaded yet."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return snapshot.page_after(limit, after, descending)
+
+    def refresh(self, version: Optional[str] = None) -> bool:
+        """Load a new snapshot and swap it in. Keeps the old one on failure."""
+        with self._refresh_lock:
+            started = time.monotonic()
+            try:
+                rows = sorted(self._load(), key=lambda row: row["movie_id"])
+            except Exception as e:
+                self._refresh_failures += 1
+                logger.warning(f"Catalog refresh failed, keeping previous snapshot: {e}")
+                return False
+            self._snapshot = CatalogSnapshot(
+                movie_ids=array("q", (row["movie_id"] for row in rows)),
+                items=tuple(rows),
+                version=version,
+                loaded_at=time.time(),
+            )
+            logger.info(f"Catalog snapshot loaded: {len(rows)} movies in {(time.monotonic() - started) * 1000:.0f}ms")
+            return True
+
+    def mark_changed(self) -> None:
+        """Reload in this process as soon as the refresher wakes."""
+        self._changed.set()
+
+    def signal_change(self) -> None:
+        """Tell every worker the catalog changed (and reload here)."""
+        cache.set(CATALOG_VERSION_KEY, str(time.time_ns()), TTL_CATALOG_VERSION)
+        self.mark_changed()
+
+    def _refresh_loop(self) -> None:
+        last_refresh = time.monotonic()
+        while True:
+            changed = self._changed.wait(CATALOG_POLL_INTERVAL)
+            self._changed.clear()
+            version = cache.get(CATALOG_VERSION_KEY)
+            snapshot = self._snapshot
+            due = time.monotonic() - last_refresh >= CATALOG_REFRESH_INTERVAL
+            if changed or due or snapshot is None or version != snapshot.version:
+                self.refresh(version)
+                last_refresh = time.monotonic()
+
+    def start(self) -> None:
+        """Load the first snapshot and start the refresher thread."""
+        if not CATALOG_ENABLED or self._refresher is not None:
+            return
+        self.refresh(cache.get(CATALOG_VERSION_KEY))
+        self._refresher = threading.Thread(target=self._refresh_loop, name="catalog-refresher", daemon=True)
+        self._refresher.start()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"loaded": False, "refresh_failures": self._refresh_failures}
+        return {
+            "loaded": True,
+            "movies": len(snapshot),
+            "version": snapshot.version,
+            "age_seconds": round(time.time() - snapshot.loaded_at, 1),
+            "refresh_failures": self._refresh_failures,
+        }
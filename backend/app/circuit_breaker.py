@@ -16,7 +16,7 @@ from datetime import datetime, timezone
 from enum import Enum
 from functools import wraps
 from threading import Lock
-from typing import Any, Callable, Dict, Optional, Type, TypeVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Type, TypeVar
 
 from circuitbreaker import CircuitBreakerError
 
@@ -192,6 +192,28 @@ class ServiceCircuitBreaker:
             self._record_failure()
             raise
 
+    async def call_async(self, func: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """
+        Await a coroutine function with circuit breaker protection.
+
+        Same semantics as call(); state bookkeeping is cheap and lock-protected,
+        so it is safe to run on the event loop.
+        """
+        self._metrics.total_calls += 1
+
+        if self.state == CircuitState.OPEN:
+            self._metrics.rejected_calls += 1
+            logger.warning(f"Circuit {self.name} is OPEN, rejecting call")
+            raise CircuitBreakerError(f"Circuit {self.name} is open")
+
+        try:
+            result = await func(*args, **kwargs)
+            self._record_success()
+            return result
+        except self.expected_exception:
+            self._record_failure()
+            raise
+
     def reset(self) -> None:
         """Manually reset circuit breaker to closed state."""
         with self._lock:
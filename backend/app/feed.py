@@ -7,21 +7,37 @@ IMPROVEMENTS:
 - Added proper error handling with specific exceptions
 - Added logging for debugging
 - Added max limits to prevent abuse
+- Batched metadata hydration (one MGET, one DB query for the misses)
+- DB fallback and trending pages sliced from the in-memory catalog snapshot
+- Trending ranked by time-decayed activity (see trending.py)
+- Opaque cursors (after / next_cursor): keyset pagination on movie_id for
+  the DB fallback, rank-after-member for trending
+- Stages (ai, redis, hydrate, db, trending) reported in Server-Timing
+- The next AI page is prefetched in the background (see prefetch.py)
 """
 
+import base64
+import binascii
+import json
 import logging
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
-from sqlalchemy.sql import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import bindparam, text
 
-from backend.session import get_db
+from backend.session import SessionLocal, get_async_db
 
-from .ai_client import AIServiceError, get_ai_recommendations
+from .ai_client import AIServiceError, get_ai_recommendations_async
 from .auth import get_current_user
+from .cache import aget_cached_movies, aget_cached_recommendations, aset_cached_movies
+from .catalog import Catalog
+from .metrics import FEED_RESPONSES
+from .prefetch import prefetcher
+from .tracing import span
+from .trending import atrending_page, atrending_size
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +90,8 @@ class FeedResponse(BaseModel):
     user_id: str
     items: List[FeedItem]
     next_offset: int
+    # pass back as ?after= for the next page; None on the last page
+    next_cursor: Optional[str] = None
     total_count: Optional[int] = None
     source: str
 
@@ -105,6 +123,55 @@ def safe_year(release_date: Any) -> Optional[int]:
         return None
 
 
+def encode_cursor(**fields: Any) -> str:
+    """Opaque, URL-safe cursor for next_cursor."""
+    raw = json.dumps(fields, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Parse an ?after= cursor. Fields: o (position, always present), k (kind:
+    "id" keyset on movie_id, "trend" position in the trending set), m (last
+    movie_id), s (last trending score).
+    """
+    try:
+        fields = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(fields, dict) or not isinstance(fields.get("o"), int) or fields["o"] < 0:
+            raise ValueError("missing position")
+        if "m" in fields and not isinstance(fields["m"], int):
+            raise ValueError("bad movie_id")
+        if "s" in fields and not isinstance(fields["s"], (int, float)):
+            raise ValueError("bad score")
+        return fields
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _page_response(
+    endpoint: str,
+    user_id: str,
+    items: List[FeedItem],
+    limit: int,
+    offset: int,
+    source: str,
+    served_by: Optional[str] = None,
+    **cursor: Any,
+) -> FeedResponse:
+    """
+    FeedResponse with next_offset, plus next_cursor when the page was full.
+
+    Counts the response per endpoint and source (served_by overrides the
+    metric label where `source` alone doesn't tell a fallback apart).
+    """
+    FEED_RESPONSES.inc(endpoint=endpoint, source=served_by or source)
+    next_offset = offset + len(items)
+    next_cursor = encode_cursor(o=next_offset, **cursor) if len(items) == limit else None
+    return FeedResponse(
+        user_id=user_id, items=items, next_offset=next_offset, next_cursor=next_cursor, source=source
+    )
+
+
 def transform_ai_item(item: dict) -> FeedItem:
     """Transform AI service response item to FeedItem model."""
     explanation = None
@@ -134,134 +201,246 @@ def transform_ai_item(item: dict) -> FeedItem:
     )
 
 
+_MOVIE_METADATA_QUERY = text(
+    """
+    SELECT movie_id, title, poster_url, overview, release_date
+    FROM movies
+    WHERE movie_id IN :ids
+"""
+).bindparams(bindparam("ids", expanding=True))
+
+
+def _movie_metadata(row: Any) -> Dict[str, Any]:
+    """Cacheable metadata dict for one movies row."""
+    return {
+        "title": row.get("title"),
+        "year": safe_year(row.get("release_date")),
+        "poster_url": row.get("poster_url"),
+        "overview": row.get("overview"),
+        "release_date": str(row.get("release_date")) if row.get("release_date") else None,
+    }
+
+
+def _load_catalog() -> List[Dict[str, Any]]:
+    """Whole movies table as feed payloads (for the catalog snapshot)."""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text(
+                """
+            SELECT movie_id, title, poster_url, overview, release_date
+            FROM movies
+        """
+            )
+        ).mappings()
+        return [{"movie_id": row["movie_id"], **_movie_metadata(row)} for row in rows]
+    finally:
+        db.close()
+
+
+catalog = Catalog(_load_catalog)
+
+
+async def hydrate_items(db: AsyncSession, items: List[dict]) -> List[dict]:
+    """
+    Fill in title/poster/overview for AI items that lack them.
+
+    One MGET for the page's movie:{id} keys, one query for the misses,
+    one pipelined write-back. Items already carrying a title are left
+    alone. Returns new dicts; cached lists are shared and not mutated.
+    """
+    ids = list(dict.fromkeys(item["movie_id"] for item in items if item.get("movie_id") and not item.get("title")))
+    if not ids:
+        return items
+
+    with span("hydrate"):
+        metadata = await aget_cached_movies(ids)
+        misses = [movie_id for movie_id in ids if movie_id not in metadata]
+        if misses:
+            try:
+                with span("db"):
+                    result = await db.execute(_MOVIE_METADATA_QUERY, {"ids": misses})
+                    loaded = {row["movie_id"]: _movie_metadata(row) for row in result.mappings().all()}
+            except SQLAlchemyError as e:
+                logger.warning(f"Movie metadata lookup failed, serving items unhydrated: {e}")
+                loaded = {}
+            if loaded:
+                await aset_cached_movies(loaded)
+                metadata.update(loaded)
+
+    hydrated = []
+    for item in items:
+        extra = metadata.get(item.get("movie_id")) if not item.get("title") else None
+        if extra:
+            item = {**item, **{k: v for k, v in extra.items() if v is not None and item.get(k) is None}}
+        hydrated.append(item)
+    return hydrated
+
+
+async def _query_movie_page(
+    db: AsyncSession, limit: int, offset: int, after: Optional[int], descending: bool
+) -> List[Dict[str, Any]]:
+    """
+    One page of the movies table in movie_id order. With `after`, a keyset
+    query (WHERE movie_id > :after) that reads only the rows it returns.
+    """
+    order = "DESC" if descending else "ASC"
+    if after is None:
+        where, page = "", "LIMIT :limit OFFSET :offset"
+    else:
+        where, page = f"WHERE movie_id {'<' if descending else '>'} :after", "LIMIT :limit"
+    with span("db"):
+        result = await db.execute(
+            text(
+                f"""
+            SELECT movie_id, title, poster_url, overview, release_date
+            FROM movies
+            {where}
+            ORDER BY movie_id {order}
+            {page}
+        """
+            ),
+            {"limit": limit, "offset": offset, "after": after},
+        )
+    return [{"movie_id": row["movie_id"], **_movie_metadata(row)} for row in result.mappings().all()]
+
+
+async def _movie_page(
+    db: AsyncSession, limit: int, offset: int, after: Optional[int], descending: bool = False
+) -> List[Dict[str, Any]]:
+    """Catalog snapshot page, or the DB while no snapshot has loaded."""
+    if after is None:
+        rows = catalog.page(limit, offset, descending)
+    else:
+        rows = catalog.page_after(limit, after, descending)
+    if rows is None:
+        rows = await _query_movie_page(db, limit, offset, after, descending)
+    return rows
+
+
 # -----------------------
 # Endpoints
 # -----------------------
 @router.get("/home", response_model=FeedResponse)
-def home_feed(
+async def home_feed(
     limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Number of items to return (1-50)"),
     offset: int = Query(default=0, ge=0, le=MAX_OFFSET, description="Pagination offset"),
+    after: Optional[str] = Query(default=None, description="Cursor from next_cursor (takes precedence over offset)"),
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> FeedResponse:
     """
     Get personalized movie recommendations for the authenticated user.
 
     Returns AI-powered recommendations with automatic fallback to database
-    if the AI service is unavailable.
+    if the AI service is unavailable. Runs on the event loop end-to-end
+    (async AI client, redis.asyncio, async DB session).
     """
     user_id = user["id"]
+    cursor = decode_cursor(after) if after else {}
 
     # Clamp values for extra safety
     limit = min(max(limit, 1), MAX_LIMIT)
-    offset = min(max(offset, 0), MAX_OFFSET)
+    offset = min(max(cursor.get("o", offset), 0), MAX_OFFSET)
 
     # -----------------------
     # Try AI Service First
     # -----------------------
+    page: Optional[FeedResponse] = None
     try:
         logger.info(f"Fetching AI recommendations: user_id={user_id}, limit={limit}, offset={offset}")
 
-        ai_items = get_ai_recommendations(user_id=user_id, limit=limit, offset=offset)
-
-        items = [transform_ai_item(item) for item in ai_items]
+        # a prefetch for this page may still be running: wait for it rather than repeat it
+        await prefetcher.join(user_id, limit, offset)
+        ai_items = await get_ai_recommendations_async(user_id=user_id, limit=limit, offset=offset)
 
-        return FeedResponse(user_id=user_id, items=items, next_offset=offset + len(items), source="ai")
+        # stale cache hits are served as-is and refreshed in the background
+        source = "ai_stale" if getattr(ai_items, "stale", False) else "ai"
+        items = [transform_ai_item(item) for item in await hydrate_items(db, ai_items)]
+        page = _page_response("home", user_id, items, limit, offset, source)
 
     except AIServiceError as e:
-        logger.warning(f"AI service error, falling back to DB: {e.message}")
+        logger.warning(f"AI service error, trying stale recommendations: {e.message}")
 
     except Exception as e:
         logger.exception(f"Unexpected error from AI service: {e}")
 
+    if page is not None:
+        # outside the try: scheduling the next page never turns this page into a fallback
+        if page.source == "ai":
+            prefetcher.schedule(user_id, limit, offset)
+        return page
+
     # -----------------------
-    # Fallback to Database
+    # Stale personalized list
     # -----------------------
-    try:
-        logger.info(f"Using DB fallback: user_id={user_id}, limit={limit}, offset={offset}")
-
-        rows = (
-            db.execute(
-                text(
-                    """
-                SELECT movie_id, title, poster_url, overview, release_date
-                FROM movies
-                ORDER BY movie_id
-                LIMIT :limit OFFSET :offset
-            """
-                ),
-                {"limit": limit, "offset": offset},
-            )
-            .mappings()
-            .all()
-        )
-
-        items = []
-        for row in rows:
-            items.append(
-                FeedItem(
-                    movie_id=row["movie_id"],
-                    title=row.get("title"),
-                    year=safe_year(row.get("release_date")),
-                    poster_url=row.get("poster_url"),
-                    overview=row.get("overview"),
-                    release_date=str(row.get("release_date")) if row.get("release_date") else None,
-                    reason_chips=["Popular movies"],
-                )
-            )
-
-        return FeedResponse(user_id=user_id, items=items, next_offset=offset + len(items), source="db_fallback")
+    stale_items = await aget_cached_recommendations(user_id, limit, offset)
+    if stale_items:
+        logger.info(f"Serving stale recommendations: user_id={user_id}")
+        items = [transform_ai_item(item) for item in await hydrate_items(db, stale_items)]
+        return _page_response("home", user_id, items, limit, offset, "ai_stale")
 
+    # -----------------------
+    # Fallback to catalog / database
+    # -----------------------
+    after_id = cursor.get("m") if cursor.get("k") == "id" else None
+    try:
+        logger.info(f"Using DB fallback: user_id={user_id}, limit={limit}, offset={offset}, after={after_id}")
+        rows = await _movie_page(db, limit, offset, after_id)
     except SQLAlchemyError as e:
         logger.exception(f"Database error in home_feed: {e}")
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database temporarily unavailable")
 
+    items = [FeedItem(**row, reason_chips=["Popular movies"]) for row in rows]
+    last_id = items[-1].movie_id if items else None
+    return _page_response("home", user_id, items, limit, offset, "db_fallback", k="id", m=last_id)
+
 
 @router.get("/trending", response_model=FeedResponse)
-def trending_feed(
+async def trending_feed(
     limit: int = Query(default=20, ge=1, le=MAX_LIMIT),
     offset: int = Query(default=0, ge=0, le=MAX_OFFSET),
+    after: Optional[str] = Query(default=None, description="Cursor from next_cursor (takes precedence over offset)"),
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> FeedResponse:
     """
     Get trending movies based on recent activity.
+
+    Ranked by time-decayed rating/watch activity from Redis; newest movies
+    while there is no trend data (Redis down or no events yet). Paging past
+    the end of the trend set ends the feed.
     """
     user_id = user["id"]
-
+    cursor = decode_cursor(after) if after else {}
+    offset = min(max(cursor.get("o", offset), 0), MAX_OFFSET)
+
+    last: Optional[Tuple[int, float]] = None
+    if cursor.get("k") == "trend" and "m" in cursor and "s" in cursor:
+        last = (cursor["m"], float(cursor["s"]))
+    with span("trending"):
+        ranked = await atrending_page(limit, offset, last)
+    if ranked:
+        snapshot = catalog.snapshot
+        rows = [(snapshot.get(movie_id) if snapshot else None) or {"movie_id": movie_id} for movie_id, _ in ranked]
+        rows = await hydrate_items(db, rows)
+        items = [FeedItem(**row, rank=offset + i + 1, reason_chips=["Trending now"]) for i, row in enumerate(rows)]
+        last_id, last_score = ranked[-1]
+        return _page_response("trending", user_id, items, limit, offset, "trending", k="trend", m=last_id, s=last_score)
+
+    # past the end of the trend set: end of feed, not newest-by-id from the same offset
+    if cursor.get("k") == "trend" or (cursor.get("k") != "id" and offset > 0 and await atrending_size()):
+        return _page_response("trending", user_id, [], limit, offset, "trending")
+
+    after_id = cursor.get("m") if cursor.get("k") == "id" else None
     try:
-        rows = (
-            db.execute(
-                text(
-                    """
-                SELECT movie_id, title, poster_url, overview, release_date
-                FROM movies
-                ORDER BY movie_id DESC
-                LIMIT :limit OFFSET :offset
-            """
-                ),
-                {"limit": limit, "offset": offset},
-            )
-            .mappings()
-            .all()
-        )
-
-        items = []
-        for row in rows:
-            items.append(
-                FeedItem(
-                    movie_id=row["movie_id"],
-                    title=row.get("title"),
-                    year=safe_year(row.get("release_date")),
-                    poster_url=row.get("poster_url"),
-                    overview=row.get("overview"),
-                    release_date=str(row.get("release_date")) if row.get("release_date") else None,
-                    reason_chips=["Trending now"],
-                )
-            )
-
-        return FeedResponse(user_id=user_id, items=items, next_offset=offset + len(items), source="trending")
-
+        rows = await _movie_page(db, limit, offset, after_id, descending=True)
     except SQLAlchemyError as e:
         logger.exception(f"Database error in trending_feed: {e}")
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database temporarily unavailable")
+
+    items = [FeedItem(**row, reason_chips=["Trending now"]) for row in rows]
+    last_id = items[-1].movie_id if items else None
+    return _page_response(
+        "trending", user_id, items, limit, offset, "trending", served_by="newest_fallback", k="id", m=last_id
+    )
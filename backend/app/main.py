@@ -9,27 +9,45 @@ IMPROVEMENTS:
 - Added proper health/ready endpoints with Redis check
 - Added OpenAPI documentation configuration
 - Added logging configuration
+- Security headers and request IDs as pure ASGI middleware (headers added
+  on http.response.start; no per-request task or body re-streaming)
+- Prometheus /metrics: per-route latency, cache lookups, AI upstream
+  latency, feed sources, plus circuit/cache/catalog/pool gauges
+- Per-stage tracing: Server-Timing response header, sampled JSONL export
+- Background trending rebuild (one worker per TRENDING_REBUILD_INTERVAL)
 """
 
+import asyncio
 import logging
 import os
+import time
 import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Callable
+from typing import Any, Dict, List, Tuple
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from backend.session import SessionLocal, dispose_async_engine
+
+from . import trending
+from .ai_client import close_ai_clients
 from .auth import router as auth_router
+from .auth_utils import password_pool
 from .cache import cache
 from .circuit_breaker import get_circuit_status
+from .feed import catalog
 from .feed import router as feed_router
+from .metrics import ALL as METRICS
+from .metrics import PROMETHEUS_CONTENT_TYPE, REQUEST_LATENCY, gauge_lines, render
+from .prefetch import prefetcher
+from .tracing import SERVER_TIMING_ENABLED, end_trace, exporter, start_trace
 
 # -----------------------
 # Logging Configuration
@@ -85,10 +103,19 @@ async def lifespan(app: FastAPI):
     redis_status = cache.health_check()
     logger.info(f"Redis status: {redis_status.get('status')}")
 
+    # Catalog snapshot for the fallback/trending feeds (kept fresh in the background)
+    await asyncio.to_thread(catalog.start)
+    # Trending sorted set, rebuilt from ratings / watch_events by one worker per interval
+    trending.start_rebuilder(SessionLocal)
+
     yield
 
     # Shutdown
     logger.info("Shutting down Nuvie Backend API")
+    await close_ai_clients()
+    await cache.aclose()
+    await dispose_async_engine()
+    password_pool.shutdown()
 
 
 # -----------------------
@@ -112,42 +139,150 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 # -----------------------
 # Security Headers Middleware
 # -----------------------
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+def _raw_headers(headers: List[Tuple[str, str]]) -> List[Tuple[bytes, bytes]]:
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+
+def _set_headers(message: Message, headers: List[Tuple[bytes, bytes]]) -> None:
+    """Set (replace) raw headers on an http.response.start message."""
+    names = {name for name, _ in headers}
+    message["headers"] = [h for h in message.get("headers", []) if h[0] not in names] + headers
+
+
+SECURITY_HEADERS = [
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "1; mode=block"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    ("Permissions-Policy", "geolocation=(), microphone=(), camera=()"),
+    ("Cache-Control", "no-store, max-age=0"),
+]
+
+# HSTS in production
+if ENVIRONMENT == "production":
+    SECURITY_HEADERS += [
+        ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+        ("Content-Security-Policy", "default-src 'self'"),
+    ]
+
+
+class SecurityHeadersMiddleware:
     """Add security headers to all responses."""
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.headers = _raw_headers(SECURITY_HEADERS)
 
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        response.headers["Cache-Control"] = "no-store, max-age=0"
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # HSTS in production
-        if ENVIRONMENT == "production":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-            response.headers["Content-Security-Policy"] = "default-src 'self'"
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                _set_headers(message, self.headers)
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
 
 
 # -----------------------
 # Request ID Middleware
 # -----------------------
-class RequestIDMiddleware(BaseHTTPMiddleware):
+class RequestIDMiddleware:
     """Add unique request ID to each request for tracing."""
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-        request.state.request_id = request_id
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == b"x-request-id"), None
+        ) or str(uuid.uuid4())
+        # read back as request.state.request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        header = [(b"x-request-id", request_id.encode("latin-1"))]
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                _set_headers(message, header)
+            await send(message)
+
+        await self.app(scope, receive, send_with_request_id)
+
+
+# -----------------------
+# Tracing Middleware
+# -----------------------
+class TracingMiddleware:
+    """Collect per-stage spans; report them in Server-Timing and export a sample."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # RequestIDMiddleware runs first and leaves the id in scope state
+        trace, token = start_trace(scope.get("state", {}).get("request_id", ""))
+        status_code = 500
 
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    _set_headers(message, [(b"server-timing", trace.server_timing().encode("latin-1"))])
+            await send(message)
 
-        return response
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_trace(token)
+            if exporter.sampled():
+                exporter.export(trace.to_dict(method=scope["method"], path=scope["path"], status=status_code))
+
+
+# -----------------------
+# Request Metrics Middleware
+# -----------------------
+class MetricsMiddleware:
+    """Record request latency by method, route template and status class."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # the template (/feed/home), not the raw path, keeps label cardinality bounded
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=f"{status_code // 100}xx",
+            )
 
 
 # -----------------------
@@ -161,16 +296,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["X-Request-ID", "X-Total-Count", "X-RateLimit-Limit", "X-RateLimit-Remaining"],
+    expose_headers=["X-Request-ID", "Server-Timing", "X-Total-Count", "X-RateLimit-Limit", "X-RateLimit-Remaining"],
     max_age=600,  # Cache preflight for 10 minutes
 )
 
 # Security headers
 app.add_middleware(SecurityHeadersMiddleware)
 
+# Stage tracing (inside request ID, so traces carry it)
+app.add_middleware(TracingMiddleware)
+
 # Request ID tracking
 app.add_middleware(RequestIDMiddleware)
 
+# Latency metrics - outermost, so it times the whole stack
+app.add_middleware(MetricsMiddleware)
+
 
 # -----------------------
 # Exception Handlers
@@ -264,16 +405,76 @@ def root():
     }
 
 
+def _labels(**labels: Any) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _scrape_lines() -> List[str]:
+    """Gauges read at scrape time from the components' own stats."""
+    lines: List[str] = []
+    for name, circuit in get_circuit_status().items():
+        states = {_labels(circuit=name, state=s): float(circuit["state"] == s) for s in ("closed", "open", "half_open")}
+        lines += gauge_lines("backend_circuit_state", "Circuit breaker state (1 for the current one).", states)
+        lines += gauge_lines(
+            "backend_circuit_calls_total",
+            "Circuit breaker calls by result.",
+            {_labels(circuit=name, result=r): circuit[f"{r}_calls"] for r in ("successful", "failed", "rejected")},
+            kind="counter",
+        )
+
+    lines += gauge_lines("backend_redis_up", "1 while Redis is reachable.", {(): float(cache.is_available)})
+    l1 = cache.tier_stats()["l1"]
+    if l1.get("entries") is not None:
+        lines += gauge_lines("backend_cache_l1_entries", "Entries in the in-process L1 cache.", {(): l1["entries"]})
+        lines += gauge_lines(
+            "backend_cache_l1_evictions_total", "L1 LRU evictions.", {(): l1["evictions"]}, kind="counter"
+        )
+
+    catalog_stats = catalog.stats()
+    movies = {(): catalog_stats.get("movies", 0)}
+    lines += gauge_lines("backend_catalog_movies", "Movies in the catalog snapshot.", movies)
+    if catalog_stats["loaded"]:
+        lines += gauge_lines(
+            "backend_catalog_age_seconds", "Age of the catalog snapshot.", {(): catalog_stats["age_seconds"]}
+        )
+    lines += gauge_lines(
+        "backend_catalog_refresh_failures_total",
+        "Failed catalog refreshes.",
+        {(): catalog_stats["refresh_failures"]},
+        kind="counter",
+    )
+
+    inflight = {(): prefetcher.stats()["inflight"]}
+    lines += gauge_lines("backend_prefetch_inflight", "Next-page prefetches running in this worker.", inflight)
+
+    pool: Dict[str, Any] = password_pool.stats()
+    lines += gauge_lines("backend_password_pool_pending", "Password hashes queued or running.", {(): pool["pending"]})
+    for field in ("completed", "rejected"):
+        lines += gauge_lines(
+            f"backend_password_pool_{field}_total", f"Password operations {field}.", {(): pool[field]}, kind="counter"
+        )
+    return lines
+
+
 @app.get("/metrics", tags=["System"])
 @limiter.exempt
-def metrics():
+def metrics(format: str = Query(default="prometheus", pattern="^(prometheus|json)$")):
     """
     Metrics endpoint for monitoring.
 
-    Returns circuit breaker and cache metrics.
+    Prometheus text by default: request latency per route, cache lookups
+    per namespace/tier, AI upstream latency, feed sources, and circuit,
+    cache, catalog and password pool gauges. ?format=json returns the
+    component stats as JSON.
     """
-    return {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "circuits": get_circuit_status(),
-        "cache": cache.health_check(),
-    }
+    if format == "json":
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "circuits": get_circuit_status(),
+            "cache": cache.health_check(),
+            "cache_tiers": cache.tier_stats(),
+            "catalog": catalog.stats(),
+            "password_pool": password_pool.stats(),
+            "prefetch": prefetcher.stats(),
+        }
+    return Response(content=render(METRICS, _scrape_lines()), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,206 @@
+"""
+Prometheus metrics for Nuvie Backend.
+
+Provides:
+- Counter / Histogram with labels, rendered in Prometheus text format
+- Per-thread shards: the hot path writes only to its own thread's dicts,
+  without taking a lock; shards are merged at scrape time. Handlers on the
+  event loop share one shard, each threadpool thread has its own. A thread's
+  shard is folded into a shared one when the thread exits.
+- The backend's metric set: per-route latency, cache lookups by
+  namespace/tier, AI upstream latency by outcome, feed responses by
+  source, next-page prefetch events
+"""
+
+import bisect
+import threading
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; request handling is normally milliseconds, the AI hop up to the timeout
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _fmt_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _ShardOwner:
+    """Lives in a thread's threading.local; collected when the thread exits."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Sharded:
+    """Per-thread dicts of label key -> value, merged on collect."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._local = threading.local()
+        # id(shard) -> shard, for live threads only
+        self._shards: Dict[int, Dict[LabelKey, Any]] = {}
+        # what exited threads counted, folded in by _retire
+        self._retired: Dict[LabelKey, Any] = {}
+        # reentrant: a finalizer may run _retire on a thread that holds it
+        self._shards_lock = threading.RLock()
+
+    def _shard(self) -> Dict[LabelKey, Any]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._shards_lock:
+                self._shards[id(shard)] = shard
+            # short-lived threads (threadpool turnover, refresh threads) must
+            # not leave a shard behind for every scrape to walk
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard: Dict[LabelKey, Any]) -> None:
+        """Fold an exited thread's shard into _retired (its owner no longer writes)."""
+        with self._shards_lock:
+            self._shards.pop(id(shard), None)
+            for key, value in shard.items():
+                self._merge(self._retired, key, value)
+
+    def _merge(self, target: Dict[LabelKey, Any], key: LabelKey, value: Any) -> None:
+        raise NotImplementedError
+
+    def _snapshot(self) -> List[Tuple[LabelKey, Any]]:
+        """(label key, value) from every shard; keys are sorted here, not on the hot path."""
+        with self._shards_lock:
+            shards = [self._retired, *list(self._shards.values())]
+            # list(dict.items()) runs without releasing the GIL, so it's safe
+            # against the owning thread adding a key meanwhile
+            items = [(key, value) for shard in shards for key, value in list(shard.items())]
+        return [(tuple(sorted(key)), value) for key, value in items]
+
+
+class Counter(_Sharded):
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        shard = self._shard()
+        key = tuple(labels.items())
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def _merge(self, target: Dict[LabelKey, Any], key: LabelKey, value: float) -> None:
+        target[key] = target.get(key, 0.0) + value
+
+    def values(self) -> Dict[LabelKey, float]:
+        totals: Dict[LabelKey, float] = {}
+        for key, v in self._snapshot():
+            self._merge(totals, key, v)
+        return totals
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, v in sorted(self.values().items()):
+            lines.append(f"{self.name}{_fmt_labels(key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram(_Sharded):
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        shard = self._shard()
+        key = tuple(labels.items())
+        series = shard.get(key)
+        if series is None:
+            # per-bucket counts incl. +Inf, then the sum
+            series = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _merge(self, target: Dict[LabelKey, Any], key: LabelKey, value: List[float]) -> None:
+        total = target.get(key)
+        if total is None:
+            target[key] = list(value)
+        else:
+            for i, v in enumerate(list(value)):
+                total[i] += v
+
+    def series(self) -> Dict[LabelKey, List[float]]:
+        merged: Dict[LabelKey, List[float]] = {}
+        for key, series in self._snapshot():
+            self._merge(merged, key, series)
+        return merged
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series().items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), series):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', _fmt_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(series[-1])}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {cumulative}")
+        return lines
+
+
+def gauge_lines(name: str, help_text: str, values: Dict[LabelKey, float], kind: str = "gauge") -> List[str]:
+    """Render values read at scrape time (circuit state, pool stats, ...)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for key, v in sorted(values.items()):
+        lines.append(f"{name}{_fmt_labels(key)} {_fmt_value(v)}")
+    return lines
+
+
+def render(metrics: Iterable, extra_lines: Iterable[str] = ()) -> str:
+    lines: List[str] = []
+    for m in metrics:
+        lines.extend(m.collect())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# Backend metrics
+# -----------------------
+REQUEST_LATENCY = Histogram(
+    "backend_request_duration_seconds", "HTTP request latency by route template, method and status."
+)
+CACHE_LOOKUPS = Counter("backend_cache_lookups_total", "JSON cache lookups by key namespace, tier and result.")
+AI_REQUEST_LATENCY = Histogram("backend_ai_request_duration_seconds", "AI service /ai/recommend calls by outcome.")
+FEED_RESPONSES = Counter("backend_feed_responses_total", "Feed responses by endpoint and source (ai, fallback, ...).")
+PREFETCH_EVENTS = Counter(
+    "backend_prefetch_events_total",
+    "Prefetches by kind (next_page, login): scheduled, completed, failed, used, skipped_*.",
+)
+
+ALL = (REQUEST_LATENCY, CACHE_LOOKUPS, AI_REQUEST_LATENCY, FEED_RESPONSES, PREFETCH_EVENTS)
+
+
+def cache_lookup(key: str, tier: str, hit: bool) -> None:
+    """Count one cache lookup; the namespace is the key prefix before ':'."""
+    CACHE_LOOKUPS.inc(namespace=key.split(":", 1)[0], tier=tier, result="hit" if hit else "miss")
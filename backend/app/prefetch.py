@@ -0,0 +1,148 @@
+"""
+Next-page prefetch and login warm-up for the home feed.
+
+After /feed/home serves page N from the AI service, the ranked list for
+page N+1 is fetched in the background, so the next scroll is a cache hit
+instead of a cold AI call. Likewise, a login warms the first chunk of the
+user's ranked list before the app asks for its first feed page.
+
+Features:
+- Only when the next page needs a deeper chunk of the cached ranked list
+  (pages inside an already cached chunk need nothing)
+- Respects the circuit breaker: nothing is prefetched unless it is closed,
+  so prefetches never spend a half-open probe
+- Bounded per worker (PREFETCH_MAX_CONCURRENCY) and deduplicated per user;
+  over the cap the prefetch is simply skipped
+- A request that arrives while its user's prefetch is still running waits
+  for it instead of issuing the same AI call
+- Login warm-up is skipped while a fresh ranked list is cached
+- Metrics: backend_prefetch_events_total{kind,event} with kind next_page or
+  login; hit rate = used / completed
+"""
+
+import asyncio
+import contextvars
+import logging
+import math
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .ai_client import AI_RANKED_LIST_MAX, RANKED_CHUNK, get_ai_recommendations_async
+from .cache import aget_cached_recommendations, cache
+from .circuit_breaker import CircuitState, ai_service_circuit
+from .metrics import PREFETCH_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# -----------------------
+# Configuration
+# -----------------------
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_MAX_CONCURRENCY = int(os.getenv("PREFETCH_MAX_CONCURRENCY", "4"))
+# Warm the first ranked chunk (the first pages of /feed/home) right after login
+WARMUP_ON_LOGIN = os.getenv("WARMUP_ON_LOGIN", "true").lower() == "true"
+# How many users' completed prefetches are remembered for hit accounting
+PREFETCH_TRACKED_USERS = int(os.getenv("PREFETCH_TRACKED_USERS", "10000"))
+
+
+def _depth(limit: int, offset: int) -> int:
+    """Ranked-list depth (whole AI chunks) that covers a page."""
+    return min(AI_RANKED_LIST_MAX, math.ceil((offset + limit) / RANKED_CHUNK) * RANKED_CHUNK)
+
+
+class Prefetcher:
+    """Per-worker scheduler for next-page prefetches and login warm-ups (event loop only)."""
+
+    def __init__(self, max_concurrency: int = PREFETCH_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # user_id -> (kind, from, to): ranked depths a finished prefetch added
+        self._prefetched: "OrderedDict[str, Tuple[str, int, int]]" = OrderedDict()
+
+    def _admit(self, user_id: str, kind: str) -> bool:
+        """Circuit closed, nothing running for this user, a free slot."""
+        if ai_service_circuit.state != CircuitState.CLOSED:
+            PREFETCH_EVENTS.inc(kind=kind, event="skipped_circuit")
+            return False
+        if user_id in self._inflight:
+            PREFETCH_EVENTS.inc(kind=kind, event="skipped_duplicate")
+            return False
+        if len(self._inflight) >= self.max_concurrency:
+            PREFETCH_EVENTS.inc(kind=kind, event="skipped_busy")
+            return False
+        return True
+
+    def _start(self, user_id: str, kind: str, limit: int, offset: int, depths: Tuple[int, int]) -> asyncio.Task:
+        # a fresh context: the prefetch is not part of the request's trace
+        # (create_task(context=...) needs 3.11; the task copies the context it's created in)
+        task = contextvars.Context().run(
+            asyncio.get_running_loop().create_task, self._run(user_id, kind, limit, offset, depths)
+        )
+        # also the task's strong reference until it finishes
+        self._inflight[user_id] = task
+        PREFETCH_EVENTS.inc(kind=kind, event="scheduled")
+        return task
+
+    def schedule(self, user_id: str, limit: int, offset: int) -> Optional[asyncio.Task]:
+        """Prefetch the page after (limit, offset) if it isn't cached yet. Never blocks."""
+        if not PREFETCH_ENABLED or not cache.is_available:
+            return None
+        next_offset = offset + limit
+        have, depth = _depth(limit, offset), _depth(limit, next_offset)
+        if next_offset + limit > AI_RANKED_LIST_MAX or depth <= have:
+            return None
+        if not self._admit(user_id, "next_page"):
+            return None
+        return self._start(user_id, "next_page", limit, next_offset, (have, depth))
+
+    async def warm(self, user_id: str) -> Optional[asyncio.Task]:
+        """
+        Warm the first chunk of the user's ranked list (after login), unless
+        a fresh one is cached. Returns once the fetch is started.
+        """
+        if not WARMUP_ON_LOGIN or not cache.is_available or not self._admit(user_id, "login"):
+            return None
+        cached = await aget_cached_recommendations(user_id, RANKED_CHUNK, 0)
+        if cached and not getattr(cached, "stale", False):
+            PREFETCH_EVENTS.inc(kind="login", event="skipped_fresh")
+            return None
+        # the cache read yielded; another request may have started one meanwhile
+        if not self._admit(user_id, "login"):
+            return None
+        return self._start(user_id, "login", RANKED_CHUNK, 0, (0, RANKED_CHUNK))
+
+    async def _run(self, user_id: str, kind: str, limit: int, offset: int, depths: Tuple[int, int]) -> None:
+        try:
+            await get_ai_recommendations_async(user_id, limit=limit, offset=offset)
+        except Exception as e:
+            PREFETCH_EVENTS.inc(kind=kind, event="failed")
+            logger.debug(f"Prefetch ({kind}) failed for user_id={user_id}: {e}")
+        else:
+            PREFETCH_EVENTS.inc(kind=kind, event="completed")
+            self._prefetched[user_id] = (kind, *depths)
+            self._prefetched.move_to_end(user_id)
+            while len(self._prefetched) > PREFETCH_TRACKED_USERS:
+                self._prefetched.popitem(last=False)
+        finally:
+            self._inflight.pop(user_id, None)
+
+    async def join(self, user_id: str, limit: int, offset: int) -> None:
+        """
+        Before serving a page: wait for the user's running prefetch, and
+        count the page as a prefetch hit if a prefetch made it available.
+        """
+        task = self._inflight.get(user_id)
+        if task is not None:
+            # shield: a cancelled request must not cancel the prefetch
+            await asyncio.shield(task)
+        prefetched = self._prefetched.get(user_id)
+        if prefetched is not None and prefetched[1] < _depth(limit, offset) <= prefetched[2]:
+            del self._prefetched[user_id]
+            PREFETCH_EVENTS.inc(kind=prefetched[0], event="used")
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "max_concurrency": self.max_concurrency}
+
+
+prefetcher = Prefetcher()
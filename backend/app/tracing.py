@@ -0,0 +1,163 @@
+"""
+Per-request stage tracing for Nuvie Backend.
+
+Features:
+- span("name") records how long a stage took on the current request's
+  trace (a ContextVar, so it follows the request into threadpool
+  dependencies); outside a request it is a no-op
+- Server-Timing header built from the spans (same-name spans are summed),
+  e.g. `auth;dur=1.2, redis;dur=0.4, ai;dur=38.0, total;dur=41.3`
+- current_request_id() lets outbound calls reuse the inbound X-Request-ID
+- Sampled export: TRACE_SAMPLE_RATE of requests are appended as JSON lines
+  to TRACE_EXPORT_PATH by a background writer (dropped, never blocking,
+  when the writer falls behind)
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# -----------------------
+# Configuration
+# -----------------------
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+TRACE_EXPORT_QUEUE = int(os.getenv("TRACE_EXPORT_QUEUE", "1000"))
+
+
+class Trace:
+    """Stage timings for one request."""
+
+    __slots__ = ("request_id", "started", "spans")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        # (name, start offset, duration), seconds
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds per stage name, in first-seen order."""
+        totals: Dict[str, float] = {}
+        for name, _, duration in list(self.spans):
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.totals().items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self, **extra: Any) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            **extra,
+            "duration_ms": round(self.elapsed() * 1000, 3),
+            "spans": [
+                {"name": name, "start_ms": round(start * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+                for name, start, duration in list(self.spans)
+            ],
+        }
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("nuvie_trace", default=None)
+
+
+def start_trace(request_id: str) -> Tuple[Trace, Any]:
+    """Make a new trace current; returns (trace, token for end_trace)."""
+    trace = Trace(request_id)
+    return trace, _current.set(trace)
+
+
+def end_trace(token: Any) -> None:
+    _current.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current.get()
+    return trace.request_id if trace is not None else None
+
+
+class span:
+    """`with span("ai"): ...` times a stage on the current trace."""
+
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace = _current.get()
+
+    def __enter__(self) -> "span":
+        if self.trace is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        trace = self.trace
+        if trace is not None:
+            now = time.perf_counter()
+            # list.append is atomic, so threadpool dependencies can add spans too
+            trace.spans.append((self.name, self.started - trace.started, now - self.started))
+
+
+# -----------------------
+# Sampled export
+# -----------------------
+class TraceExporter:
+    """Appends sampled traces to a JSONL file from a daemon thread."""
+
+    def __init__(self, path: str = TRACE_EXPORT_PATH, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=TRACE_EXPORT_QUEUE)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.dropped = 0
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def export(self, record: Dict[str, Any]) -> None:
+        self._start_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="trace-exporter", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            records = [self._queue.get()]
+            while not self._queue.empty() and len(records) < 100:
+                records.append(self._queue.get_nowait())
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(record) + "\n" for record in records)
+            except OSError as e:
+                logger.warning(f"Trace export to {self.path} failed: {e}")
+
+
+exporter = TraceExporter()
@@ -0,0 +1,280 @@
+"""
+Trending engine for Nuvie Backend.
+
+Per-movie popularity with exponential time decay, kept in a Redis sorted
+set that is rebuilt from the ratings and watch_events tables.
+
+Features:
+- Forward decay: each event is weighted by exp(lambda * (t - landmark)),
+  with the landmark at the rebuild time, so ranking by score equals
+  ranking by decayed popularity
+- Pages are one ZREVRANGE (or ZREVRANK + ZREVRANGE after a cursor):
+  O(log n + limit)
+- Rebuild from historical ratings / watch_events (rebuild_from_db), written
+  to a scratch key and swapped in with RENAME
+- Periodic rebuild in the app: every worker runs a daemon thread, a Redis
+  lock lets one of them rebuild per TRENDING_REBUILD_INTERVAL
+  (scripts/rebuild_trending.py does the same on demand, e.g. after loading data)
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from .cache import cache
+
+logger = logging.getLogger(__name__)
+
+# -----------------------
+# Configuration
+# -----------------------
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))
+TRENDING_LAMBDA = math.log(2) / (TRENDING_HALF_LIFE_HOURS * 3600)
+# Members decayed below this (in landmark units) are left out of a rebuild
+TRENDING_MIN_SCORE = float(os.getenv("TRENDING_MIN_SCORE", "0.001"))
+# Rebuild ignores events older than this many half-lives (< 0.1% weight)
+TRENDING_REBUILD_HALF_LIVES = float(os.getenv("TRENDING_REBUILD_HALF_LIVES", "10"))
+# In-app rebuild, once per interval across all workers (0 disables)
+TRENDING_REBUILD_INTERVAL = float(os.getenv("TRENDING_REBUILD_INTERVAL", "3600"))
+# How often each worker checks whether a rebuild is due (retries after a failed one)
+TRENDING_REBUILD_POLL = float(os.getenv("TRENDING_REBUILD_POLL", "60"))
+# "now", or "latest" to decay relative to the newest rating (historical datasets)
+TRENDING_REBUILD_AS_OF = os.getenv("TRENDING_REBUILD_AS_OF", "now")
+
+TRENDING_SCORES_KEY = "trending:scores"
+TRENDING_LANDMARK_KEY = "trending:landmark"
+TRENDING_REBUILD_LOCK_KEY = "lock:trending:rebuild"
+
+# Event weights: a rating counts rating/5 of RATING, watch events by type
+RATING_WEIGHT = 1.0
+WATCH_WEIGHTS: Dict[str, float] = {"started": 0.5, "completed": 1.0, "paused": 0.1}
+
+
+def rating_weight(rating: float) -> float:
+    return RATING_WEIGHT * float(rating) / 5.0
+
+
+def watch_weight(event_type: str) -> float:
+    return WATCH_WEIGHTS.get(event_type, 0.0)
+
+
+# -----------------------
+# Reads
+# -----------------------
+# Page after (movie, score): continue right after the movie's current rank, or
+# below its score if it has since dropped out of the set.
+# KEYS[1] = scores, ARGV = movie_id, score, limit
+_PAGE_AFTER_SCRIPT = """
+local rank = redis.call('zrevrank', KEYS[1], ARGV[1])
+if rank then
+  return redis.call('zrevrange', KEYS[1], rank + 1, rank + tonumber(ARGV[3]), 'WITHSCORES')
+end
+return redis.call('zrevrangebyscore', KEYS[1], '(' .. ARGV[2], '-inf', 'WITHSCORES', 'LIMIT', 0, ARGV[3])
+"""
+
+
+def _pairs(reply: List[Any]) -> List[Tuple[int, float]]:
+    """Flat [member, score, ...] or [(member, score), ...] into (movie_id, score)."""
+    if reply and not isinstance(reply[0], (list, tuple)):
+        reply = list(zip(reply[::2], reply[1::2]))
+    return [(int(member), float(score)) for member, score in reply]
+
+
+def _page_call(client: Any, limit: int, offset: int, after: Optional[Tuple[int, float]]) -> Any:
+    if after is None:
+        return client.zrevrange(TRENDING_SCORES_KEY, offset, offset + limit - 1, withscores=True)
+    movie_id, score = after
+    return client.eval(_PAGE_AFTER_SCRIPT, 1, TRENDING_SCORES_KEY, str(movie_id), repr(score), limit)
+
+
+def trending_page(limit: int, offset: int = 0, after: Optional[Tuple[int, float]] = None) -> List[Tuple[int, float]]:
+    """
+    (movie_id, score) for one page, hottest first: by offset, or after the
+    (movie_id, score) that ended the previous page. Empty when Redis is
+    unavailable.
+    """
+    if not cache.is_available:
+        return []
+    try:
+        return _pairs(_page_call(cache.client, limit, offset, after))
+    except RedisError as e:
+        cache.report_error("trending page", TRENDING_SCORES_KEY, e)
+        return []
+
+
+async def atrending_page(
+    limit: int, offset: int = 0, after: Optional[Tuple[int, float]] = None
+) -> List[Tuple[int, float]]:
+    """Async trending_page."""
+    client = cache.aclient
+    if client is None:
+        return []
+    try:
+        return _pairs(await _page_call(client, limit, offset, after))
+    except RedisError as e:
+        cache.report_error("trending page", TRENDING_SCORES_KEY, e)
+        return []
+
+
+async def atrending_size() -> Optional[int]:
+    """Members in the trending set; None when Redis is unavailable."""
+    client = cache.aclient
+    if client is None:
+        return None
+    try:
+        return int(await client.zcard(TRENDING_SCORES_KEY))
+    except RedisError as e:
+        cache.report_error("trending size", TRENDING_SCORES_KEY, e)
+        return None
+
+
+# -----------------------
+# Rebuild
+# -----------------------
+def decayed_scores(events: Iterable[Tuple[int, float, float]], as_of: float) -> Dict[int, float]:
+    """Sum (movie_id, weight, unix ts) events into scores with landmark = as_of."""
+    scores: Dict[int, float] = {}
+    for movie_id, weight, ts in events:
+        if weight > 0:
+            scores[movie_id] = scores.get(movie_id, 0.0) + weight * math.exp(TRENDING_LAMBDA * (ts - as_of))
+    return {movie_id: score for movie_id, score in scores.items() if score >= TRENDING_MIN_SCORE}
+
+
+def replace_scores(scores: Dict[int, float], as_of: float, chunk: int = 1000) -> None:
+    """Swap in a freshly built score set and its landmark."""
+    client = cache.client
+    scratch = f"{TRENDING_SCORES_KEY}:rebuild"
+    client.delete(scratch)
+    members = [(str(movie_id), score) for movie_id, score in scores.items()]
+    for i in range(0, len(members), chunk):
+        client.zadd(scratch, dict(members[i : i + chunk]))
+    pipe = client.pipeline(transaction=True)
+    if members:
+        pipe.rename(scratch, TRENDING_SCORES_KEY)
+    else:
+        pipe.delete(TRENDING_SCORES_KEY)
+    pipe.set(TRENDING_LANDMARK_KEY, repr(as_of))
+    pipe.execute()
+
+
+def _unix(ts: Any) -> float:
+    if isinstance(ts, str):  # drivers without a TIMESTAMP type (sqlite)
+        ts = datetime.fromisoformat(ts)
+    if isinstance(ts, datetime):
+        return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp()
+    return float(ts)
+
+
+def _naive_utc(ts: float) -> datetime:
+    # watch_events.timestamp is TIMESTAMP WITHOUT TIME ZONE, in UTC
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+def _historical_events(db: Session, since: float, until: float) -> Iterable[Tuple[int, float, float]]:
+    ratings = db.execute(
+        text("""
+            SELECT movie_id, rating, timestamp
+            FROM ratings
+            WHERE timestamp >= :since AND timestamp <= :until
+        """),
+        {"since": int(since), "until": int(until)},
+    )
+    for row in ratings.yield_per(10000):
+        yield row.movie_id, rating_weight(row.rating), float(row.timestamp)
+
+    watches = db.execute(
+        text("""
+            SELECT movie_id, event_type, timestamp
+            FROM watch_events
+            WHERE timestamp >= :since AND timestamp <= :until
+        """),
+        {"since": _naive_utc(since), "until": _naive_utc(until)},
+    )
+    for row in watches.yield_per(10000):
+        yield row.movie_id, watch_weight(row.event_type), _unix(row.timestamp)
+
+
+def rebuild_from_db(db: Session, as_of: Optional[float] = None) -> int:
+    """
+    Recompute all scores from ratings and watch_events up to as_of (default
+    now) and replace the live set. Returns the number of movies scored.
+    """
+    if not cache.is_available:
+        raise RuntimeError("Redis is unavailable")
+    as_of = time.time() if as_of is None else as_of
+    since = as_of - TRENDING_REBUILD_HALF_LIVES * TRENDING_HALF_LIFE_HOURS * 3600
+    scores = decayed_scores(_historical_events(db, since, as_of), as_of)
+    replace_scores(scores, as_of)
+    as_of_utc = datetime.fromtimestamp(as_of, timezone.utc)
+    logger.info(f"Trending rebuilt: {len(scores)} movies as of {as_of_utc:%Y-%m-%d %H:%M}")
+    return len(scores)
+
+
+def resolve_as_of(db: Session, as_of: str) -> float:
+    """ "now", "latest" (newest rating, for historical datasets) or a unix timestamp."""
+    if as_of == "now":
+        return time.time()
+    if as_of == "latest":
+        return float(db.execute(text("SELECT MAX(timestamp) FROM ratings")).scalar() or time.time())
+    return float(as_of)
+
+
+# -----------------------
+# Periodic rebuild
+# -----------------------
+def rebuild_if_due(session_factory: Callable[[], Session]) -> bool:
+    """
+    Rebuild unless another worker did within TRENDING_REBUILD_INTERVAL.
+    Returns True if this call rebuilt the set.
+    """
+    if not cache.is_available:
+        return False
+    try:
+        # held for the whole interval: it marks the rebuild as done, not running
+        ttl_ms = int(TRENDING_REBUILD_INTERVAL * 1000)
+        if not cache.client.set(TRENDING_REBUILD_LOCK_KEY, str(os.getpid()), nx=True, px=ttl_ms):
+            return False
+    except RedisError as e:
+        cache.report_error("trending rebuild lock", TRENDING_REBUILD_LOCK_KEY, e)
+        return False
+
+    db = session_factory()
+    try:
+        rebuild_from_db(db, resolve_as_of(db, TRENDING_REBUILD_AS_OF))
+        return True
+    except Exception as e:
+        logger.warning(f"Trending rebuild failed, keeping the current set: {e}")
+        # let the next poll (on any worker) try again
+        try:
+            cache.client.delete(TRENDING_REBUILD_LOCK_KEY)
+        except RedisError as e:
+            cache.report_error("trending rebuild unlock", TRENDING_REBUILD_LOCK_KEY, e)
+        return False
+    finally:
+        db.close()
+
+
+def _rebuild_loop(session_factory: Callable[[], Session]) -> None:
+    while True:
+        rebuild_if_due(session_factory)
+        time.sleep(TRENDING_REBUILD_POLL)
+
+
+_rebuilder: Optional[threading.Thread] = None
+
+
+def start_rebuilder(session_factory: Callable[[], Session]) -> None:
+    """Start this worker's periodic rebuild thread (no-op when disabled)."""
+    global _rebuilder
+    if TRENDING_REBUILD_INTERVAL <= 0 or _rebuilder is not None:
+        return
+    _rebuilder = threading.Thread(target=_rebuild_loop, args=(session_factory,), name="trending-rebuilder", daemon=True)
+    _rebuilder.start()
@@ -1,5 +1,8 @@
 import os
+from typing import Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # I create a Base class for SQLAlchemy models
@@ -35,3 +38,46 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# I map the sync DATABASE_URL to its async driver
+# psycopg 3 serves both modes, sqlite needs aiosqlite
+def _async_database_url(url: str) -> str:
+    if url.startswith("postgresql+psycopg://"):
+        return url
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+# I create the async engine lazily
+# so sync-only tools (scripts, migrations) never need the async driver
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_engine(_async_database_url(DATABASE_URL), pool_pre_ping=True)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+    return _async_engine
+
+
+# I provide an async session for endpoints that run on the event loop
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+# I dispose the async pool on shutdown so connections close cleanly
+async def dispose_async_engine() -> None:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
@@ -2,28 +2,38 @@
 Pytest configuration and fixtures for Nuvie backend tests.
 
 Provides:
-- Test database setup with SQLite in-memory
+- Test database setup with SQLite (one file per test, shared by the sync
+  and async sessions)
 - Test client for API integration tests
 - Authentication fixtures for protected endpoints
 - Mock fixtures for external services
 """
 
 import os
+import threading
 import pytest
 from typing import Generator, Dict, Any
 from datetime import datetime, timezone, timedelta
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError as RedisConnectionError
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
 
 # Set test environment before importing app modules
 os.environ["JWT_SECRET"] = "test-secret-key-that-is-at-least-32-characters-long"
 os.environ["ENVIRONMENT"] = "testing"
-
-from backend.session import Base, get_db
+os.environ["CATALOG_ENABLED"] = "false"
+# Keep the background Redis prober asleep: a PING to the real (absent) Redis
+# finishing mid-test would mark the fake_redis-backed cache down
+os.environ["REDIS_PROBE_BACKOFF_MIN_SECONDS"] = "3600"
+os.environ["REDIS_PROBE_INTERVAL_SECONDS"] = "3600"
+# no background trending rebuild against the test database
+os.environ["TRENDING_REBUILD_INTERVAL"] = "0"
+
+from backend.session import Base, get_async_db, get_db
 from backend.app.main import app
 from backend.models.user import User
 
@@ -33,16 +43,22 @@ from backend.models.user import User
 # -----------------------
 
 @pytest.fixture(scope="function")
-def test_engine():
-    """Create a test database engine using SQLite in-memory."""
+def test_db_path(tmp_path) -> str:
+    """SQLite file behind both the sync and the async test sessions."""
+    return str(tmp_path / "test.db")
+
+
+@pytest.fixture(scope="function")
+def test_engine(test_db_path: str):
+    """Create a test database engine using SQLite."""
     engine = create_engine(
-        "sqlite:///:memory:",
+        f"sqlite:///{test_db_path}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
 
 
 @pytest.fixture(scope="function")
@@ -61,8 +77,8 @@ def db_session(test_engine) -> Generator[Session, None, None]:
 
 
 @pytest.fixture(scope="function")
-def client(db_session: Session) -> Generator[TestClient, None, None]:
-    """Create a test client with database dependency override."""
+def client(db_session: Session, test_db_path: str) -> Generator[TestClient, None, None]:
+    """Create a test client with database dependency overrides (sync and async)."""
 
     def override_get_db():
         try:
@@ -70,7 +86,17 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
         finally:
             pass
 
+    # Async endpoints (and the auth dependency) see the same SQLite file
+    # through aiosqlite; the engine connects inside the app's event loop
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{test_db_path}")
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -136,10 +162,147 @@ def expired_token(test_user: User) -> str:
 # Mock Fixtures
 # -----------------------
 
+class FakeRedis:
+    """Stands in for redis.Redis; raises ConnectionError while `down`."""
+
+    def __init__(self):
+        self.down = False
+        self.calls = {"ping": 0, "get": 0, "setex": 0, "set": 0, "eval": 0, "delete": 0, "mget": 0, "pipeline": 0}
+        self.store = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if self.down:
+            raise RedisConnectionError("Connection refused")
+
+    def ping(self):
+        self._call("ping")
+        return True
+
+    def get(self, key):
+        self._call("get")
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self._call("setex")
+        self.store[key] = value
+        return True
+
+    def mget(self, keys):
+        self._call("mget")
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def delete(self, key):
+        self._call("delete")
+        return 1 if self.store.pop(key, None) is not None else 0
+
+    def set(self, key, value, nx=False, px=None):
+        self._call("set")
+        with self._lock:
+            if nx and key in self.store:
+                return None
+            self.store[key] = value
+            return True
+
+    def eval(self, script, numkeys, key, arg):
+        # emulates the cache module's Lua scripts
+        from backend.app import cache as cache_module
+
+        self._call("eval")
+        with self._lock:
+            if script == cache_module._UNLOCK_SCRIPT:
+                if self.store.get(key) == arg:
+                    del self.store[key]
+                    return 1
+                return 0
+            if script == cache_module._VERSIONED_GET_SCRIPT:
+                generation = self.store.get(key) or "0"
+                return [generation, self.store.get(arg + generation)]
+            if script == cache_module._BUMP_GENERATION_SCRIPT:
+                self.store[key] = str(int(self.store.get(key) or 0) + 1)
+                return int(self.store[key])
+            raise NotImplementedError(script)
+
+
+class FakePipeline:
+    """Queues commands and applies them in one FakeRedis call."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, value))
+        return self
+
+    def execute(self):
+        self.redis._call("pipeline")
+        for key, value in self.commands:
+            self.redis.store[key] = value
+        return [True] * len(self.commands)
+
+
+class FakeAsyncPipeline(FakePipeline):
+    async def execute(self):
+        return super().execute()
+
+
+class FakeAsyncRedis:
+    """redis.asyncio view of a FakeRedis: same store, counters and `down` flag."""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def get(self, key):
+        return self.redis.get(key)
+
+    async def setex(self, key, ttl, value):
+        return self.redis.setex(key, ttl, value)
+
+    async def set(self, key, value, nx=False, px=None):
+        return self.redis.set(key, value, nx=nx, px=px)
+
+    async def mget(self, keys):
+        return self.redis.mget(keys)
+
+    async def eval(self, script, numkeys, key, arg):
+        return self.redis.eval(script, numkeys, key, arg)
+
+    async def publish(self, channel, message):
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakeAsyncPipeline(self.redis)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point the cache singleton at a FakeRedis (fresh L1 that only keeps movie:* keys)."""
+    from backend.app.cache import LocalCache, cache
+
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "_client", fake)
+    monkeypatch.setattr(cache, "_aclient", FakeAsyncRedis(fake))
+    monkeypatch.setattr(cache, "_available", True)
+    monkeypatch.setattr(cache, "_down_since", None)
+    monkeypatch.setattr(cache, "_last_error", None)
+    monkeypatch.setattr(cache, "_l1", LocalCache(max_entries=100, ttls={"movie": 60.0}))
+    monkeypatch.setattr(cache, "_l2_hits", 0)
+    monkeypatch.setattr(cache, "_l2_misses", 0)
+    return fake
+
+
 @pytest.fixture
 def mock_ai_service():
     """Mock the AI recommendation service."""
-    with patch("backend.app.ai_client.get_ai_recommendations") as mock:
+    with patch("backend.app.feed.get_ai_recommendations_async", new_callable=AsyncMock) as mock:
         mock.return_value = [
             {
                 "movie_id": 1,
@@ -165,7 +328,7 @@ def mock_ai_service_error():
     """Mock AI service to raise an error."""
     from backend.app.ai_client import AIServiceError
 
-    with patch("backend.app.ai_client.get_ai_recommendations") as mock:
+    with patch("backend.app.feed.get_ai_recommendations_async", new_callable=AsyncMock) as mock:
         mock.side_effect = AIServiceError("Service unavailable", status_code=503)
         yield mock
 
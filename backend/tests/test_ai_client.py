@@ -0,0 +1,191 @@
+"""
+AI client tests.
+
+Tests cover:
+- One cached ranked list per user, sliced into pages
+- Chunked growth of the ranked list while scrolling
+- Degraded AI results are not cached
+- Scrolling a stale list doesn't re-stamp it as fresh
+- Completeness comes from the stored AI depth, not the deduped length
+- Client-side exclusions on the cached list
+- One deadline per request, with chunk fetches stopping when it runs out
+- Stable user-id mapping across processes
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from backend.app import ai_client
+from backend.app.ai_client import AIServiceError
+from backend.app.cache import _wrap, cache, invalidate_user_cache
+
+UNIVERSE = [{"movie_id": i, "score": 1.0 - i / 1000, "rank": i} for i in range(1, 121)]
+
+
+@pytest.fixture
+def ai_calls(fake_redis, monkeypatch):
+    """Stub the AI call with a fixed 120-movie ranking; records (limit, offset)."""
+    calls = []
+
+    def fake_call(user_id, limit, offset, exclude_movie_ids=None, deadline=None):
+        calls.append((limit, offset))
+        return UNIVERSE[offset : offset + limit], {"degraded": False}
+
+    monkeypatch.setattr(ai_client, "_call_ai_service", fake_call)
+    return calls
+
+
+class TestRankedListCache:
+    """Tests for the per-user ranked list."""
+
+    def test_scrolling_reuses_one_list(self, ai_calls, fake_redis):
+        """Five pages of 20 cost two chunk fetches and one key."""
+        pages = [ai_client.get_ai_recommendations("u1", limit=20, offset=o) for o in range(0, 100, 20)]
+
+        assert ai_calls == [(50, 0), (50, 50)]
+        assert [item["movie_id"] for page in pages for item in page] == list(range(1, 101))
+        assert [k for k in fake_redis.store if k.startswith("recs:")] == ["recs:{u1}:g0"]
+
+    def test_other_page_sizes_slice_same_list(self, ai_calls):
+        """A different limit/offset is served from the cached list."""
+        ai_client.get_ai_recommendations("u1", limit=20, offset=0)
+        page = ai_client.get_ai_recommendations("u1", limit=7, offset=13)
+
+        assert [item["movie_id"] for item in page] == list(range(14, 21))
+        assert len(ai_calls) == 1
+
+    def test_end_of_ranking(self, ai_calls):
+        """A short chunk marks the list complete; deeper pages come back short."""
+        page = ai_client.get_ai_recommendations("u1", limit=50, offset=100)
+        assert [item["movie_id"] for item in page] == list(range(101, 121))
+
+        assert ai_client.get_ai_recommendations("u1", limit=20, offset=120) == []
+        assert ai_calls == [(50, 0), (50, 50), (50, 100)]
+
+    def test_degraded_results_not_cached(self, ai_calls, fake_redis, monkeypatch):
+        """Deadline-truncated rankings are served but not stored."""
+
+        def degraded_call(user_id, limit, offset, exclude_movie_ids=None, deadline=None):
+            ai_calls.append((limit, offset))
+            return UNIVERSE[offset : offset + limit], {"degraded": True}
+
+        monkeypatch.setattr(ai_client, "_call_ai_service", degraded_call)
+        assert len(ai_client.get_ai_recommendations("u1", limit=20, offset=0)) == 20
+        assert "recs:{u1}:g0" not in fake_redis.store
+
+    def test_scrolling_a_stale_list_keeps_its_expiry(self, ai_calls, fake_redis, monkeypatch):
+        """Extending a stale list serves the deeper page but doesn't re-stamp it as fresh."""
+        monkeypatch.setattr(cache, "_refresh_in_background", lambda *args: None)
+        cache.set_json("recs:{u1}:g0", _wrap(UNIVERSE[:50], 0.1, -1), 600)
+        before = cache.get_json("recs:{u1}:g0")
+
+        page = ai_client.get_ai_recommendations("u1", limit=20, offset=60)
+
+        assert getattr(page, "stale", False)
+        assert [item["movie_id"] for item in page] == list(range(61, 81))
+        assert ai_calls == [(50, 50)]
+        assert cache.get_json("recs:{u1}:g0") == before
+
+    def test_repeats_across_chunks_dont_end_the_list(self, ai_calls, fake_redis, monkeypatch):
+        """Dropped repeats leave the list short of its AI depth, not complete."""
+        reranked = UNIVERSE[:50] + UNIVERSE[45:]
+
+        def reranking_call(user_id, limit, offset, exclude_movie_ids=None, deadline=None):
+            ai_calls.append((limit, offset))
+            return reranked[offset : offset + limit], {"degraded": False}
+
+        monkeypatch.setattr(ai_client, "_call_ai_service", reranking_call)
+        page = ai_client.get_ai_recommendations("u1", limit=20, offset=80)
+
+        assert [item["movie_id"] for item in page] == list(range(81, 101))
+        assert ai_calls == [(50, 0), (50, 50), (50, 100)]
+        cached = cache.get_json("recs:{u1}:g0")["v"]
+        assert (len(cached["items"]), cached["depth"], cached["complete"]) == (120, 150, True)
+
+    def test_exclusions_filter_cached_list(self, ai_calls):
+        """Excluded movies are dropped from the cached list before slicing."""
+        ai_client.get_ai_recommendations("u1", limit=20, offset=0)
+        page = ai_client.get_ai_recommendations("u1", limit=5, offset=0, exclude_movie_ids=[1, 3])
+
+        assert [item["movie_id"] for item in page] == [2, 4, 5, 6, 7]
+        assert len(ai_calls) == 1
+
+    def test_invalidation_is_one_key(self, ai_calls, fake_redis):
+        """Invalidating a user drops their whole ranked list."""
+        ai_client.get_ai_recommendations("u1", limit=20, offset=0)
+        invalidate_user_cache("u1")
+        ai_client.get_ai_recommendations("u1", limit=20, offset=20)
+
+        assert ai_calls == [(50, 0), (50, 0)]
+
+
+class TestDeadlineBudget:
+    """Tests for the per-request deadline."""
+
+    def test_deadline_header_is_the_remaining_budget(self, monkeypatch):
+        monkeypatch.setattr(ai_client, "AI_DEADLINE_MARGIN_MS", 250)
+        deadline = time.perf_counter() + 1.0
+        _, _, headers = ai_client._recommend_request("u1", 20, 0, None, deadline)
+
+        assert 700 <= int(headers["X-Deadline-Ms"]) <= 750
+        assert ai_client._deadline_ms(time.perf_counter() - 1) == 1
+
+    def test_chunks_share_one_deadline(self, ai_calls, monkeypatch):
+        deadlines = []
+
+        def fake_call(user_id, limit, offset, exclude_movie_ids=None, deadline=None):
+            deadlines.append(deadline)
+            return UNIVERSE[offset : offset + limit], {"degraded": False}
+
+        monkeypatch.setattr(ai_client, "_call_ai_service", fake_call)
+        ai_client.get_ai_recommendations("u1", limit=20, offset=60)
+
+        assert len(deadlines) == 2 and len(set(deadlines)) == 1
+
+    def test_fetching_stops_when_the_budget_runs_out(self, ai_calls, fake_redis, monkeypatch):
+        """Chunks already fetched are kept; the page the budget couldn't reach is a timeout."""
+        monkeypatch.setattr(ai_client, "AI_TIMEOUT_SECONDS", 0.3)
+        monkeypatch.setattr(ai_client, "AI_DEADLINE_MARGIN_MS", 250)
+
+        def slow_call(user_id, limit, offset, exclude_movie_ids=None, deadline=None):
+            ai_calls.append((limit, offset))
+            time.sleep(0.06)
+            return UNIVERSE[offset : offset + limit], {"degraded": False}
+
+        monkeypatch.setattr(ai_client, "_call_ai_service", slow_call)
+        with pytest.raises(AIServiceError) as exc:
+            ai_client.get_ai_recommendations("u1", limit=20, offset=60)
+
+        assert exc.value.status_code == 504
+        assert ai_calls == [(50, 0)]
+        cached = cache.get_json("recs:{u1}:g0")["v"]
+        assert (len(cached["items"]), cached["depth"], cached["complete"]) == (50, 50, False)
+
+
+class TestUserIdMapping:
+    """Tests for the backend -> AI user id mapping."""
+
+    UUID = "5f1c2a9e-8d3b-4c1a-9e6f-2b7d8c0a1e34"
+
+    def test_numeric_ids_pass_through(self):
+        assert ai_client._convert_user_id("42") == 42
+
+    def test_hashed_ids_clear_of_numeric_range(self):
+        """UUIDs map into [2^62, 2^63): a signed 64-bit int no numeric id can equal."""
+        mapped = ai_client._convert_user_id(self.UUID)
+        assert ai_client.HASHED_USER_ID_BASE <= mapped < 2**63
+        assert ai_client._convert_user_id("not-a-number") != mapped
+
+    def test_stable_across_processes(self):
+        """Differently salted interpreters (like separate workers) agree on the id."""
+        code = f"from backend.app.ai_client import _convert_user_id; print(_convert_user_id({self.UUID!r}))"
+        seen = set()
+        for seed in ("1", "2"):
+            env = {**os.environ, "PYTHONHASHSEED": seed, "PYTHONPATH": os.getcwd()}
+            out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+            seen.add(int(out.stdout.strip().splitlines()[-1]))
+        assert seen == {ai_client._convert_user_id(self.UUID)}
@@ -7,8 +7,11 @@ Tests cover:
 - JWT token validation
 - Account lockout after failed attempts
 - Protected endpoint access
+- Token and user-status caching
 """
 
+from unittest.mock import AsyncMock, patch
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -92,6 +95,48 @@ class TestLogin:
         assert "access_token" in data
         assert data["token_type"] == "bearer"
 
+    def test_login_warms_feed(self, client: TestClient, test_user):
+        """A successful login starts the user's feed warm-up."""
+        with patch("backend.app.auth.prefetcher.warm", new_callable=AsyncMock) as warm:
+            response = client.post("/auth/login", json={"email": "test@example.com", "password": "TestPassword123"})
+
+        assert response.status_code == 200
+        warm.assert_awaited_once_with(test_user.id)
+
+    def test_login_warm_up_fetches_first_chunk(self, client: TestClient, test_user, fake_redis, monkeypatch):
+        """The real warm-up runs from the login background task and fetches the first ranked chunk."""
+        from backend.app import auth, prefetch
+        from backend.app.ai_client import RANKED_CHUNK
+
+        fetched = []
+
+        async def nothing_cached(user_id, limit, offset):
+            return None
+
+        async def fake_fetch(user_id, limit=20, offset=0):
+            fetched.append((user_id, limit, offset))
+            return []
+
+        warmer = prefetch.Prefetcher()
+        warm = warmer.warm
+
+        async def warm_and_wait(user_id):
+            # the test client's loop closes with the request; let the started fetch finish first
+            task = await warm(user_id)
+            await task
+            return task
+
+        monkeypatch.setattr(warmer, "warm", warm_and_wait)
+        monkeypatch.setattr(auth, "prefetcher", warmer)
+        monkeypatch.setattr(prefetch, "aget_cached_recommendations", nothing_cached)
+        monkeypatch.setattr(prefetch, "get_ai_recommendations_async", fake_fetch)
+
+        response = client.post("/auth/login", json={"email": "test@example.com", "password": "TestPassword123"})
+
+        assert response.status_code == 200
+        assert fetched == [(test_user.id, RANKED_CHUNK, 0)]
+        assert warmer.stats()["inflight"] == 0
+
     def test_login_wrong_password(self, client: TestClient, test_user):
         """Test login with incorrect password."""
         response = client.post(
@@ -170,3 +215,152 @@ class TestCurrentUser:
         data = response.json()
         assert data["email"] == test_user.email
         assert data["id"] == test_user.id
+
+
+class TestCachedAuth:
+    """Tests for the token and user-status caches behind get_current_user."""
+
+    @pytest.fixture
+    def async_engine(self, test_engine, test_db_path):
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import NullPool
+
+        # NullPool: every authenticate() runs on its own event loop
+        return create_async_engine(f"sqlite+aiosqlite:///{test_db_path}", poolclass=NullPool)
+
+    @pytest.fixture
+    def authenticate(self, async_engine, test_user_token, monkeypatch):
+        import asyncio
+
+        from fastapi.security import HTTPAuthorizationCredentials
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        from backend.app import auth
+        from backend.app.cache import LocalCache
+
+        monkeypatch.setattr(auth, "_token_cache", LocalCache(ttls={"token": 3600.0}))
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=test_user_token)
+
+        async def current_user():
+            async with AsyncSession(async_engine) as db:
+                return await auth.get_current_user(credentials, db)
+
+        return lambda: asyncio.run(current_user())
+
+    def test_repeat_requests_skip_verify_and_query(self, authenticate, async_engine, fake_redis):
+        """Only the first request verifies the signature and loads the user."""
+        from sqlalchemy import event
+
+        from backend.app import auth
+
+        queries = []
+        event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+        with patch.object(auth.jwt, "decode", wraps=auth.jwt.decode) as decode:
+            users = [authenticate() for _ in range(3)]
+
+        assert users == [{"id": "test-user-123", "email": "test@example.com"}] * 3
+        assert decode.call_count == 1
+        assert len(queries) == 1
+
+    def test_deactivation_invalidates(self, authenticate, db_session, test_user, fake_redis):
+        """Committing is_active=False takes effect on the next request."""
+        from fastapi import HTTPException
+
+        assert authenticate()["id"] == test_user.id
+
+        test_user.is_active = False
+        db_session.commit()
+
+        with pytest.raises(HTTPException) as exc:
+            authenticate()
+        assert exc.value.detail == "Account is deactivated"
+
+    def test_deactivation_while_redis_down(self, authenticate, db_session, test_user, fake_redis, monkeypatch):
+        """A bump lost to an outage only leaves the old status until its short TTL."""
+        from fastapi import HTTPException
+
+        from backend.app import auth
+        from backend.app.cache import generation_key
+
+        written = {}
+        setex = fake_redis.setex
+
+        def recording_setex(key, ttl, value):
+            written[key] = ttl
+            return setex(key, ttl, value)
+
+        monkeypatch.setattr(fake_redis, "setex", recording_setex)
+        assert authenticate()["id"] == test_user.id
+        [(status_key, ttl)] = written.items()
+        assert ttl == auth.USER_STATUS_TTL
+
+        fake_redis.down = True
+        test_user.is_active = False
+        db_session.commit()
+        with pytest.raises(HTTPException):
+            authenticate()  # Redis down: status comes from the DB
+
+        fake_redis.down = False
+        monkeypatch.setattr(auth.cache, "_available", True)
+        assert generation_key(test_user.id) not in fake_redis.store  # the bump was lost
+        fake_redis.store.pop(status_key)  # the old entry expires
+        with pytest.raises(HTTPException) as exc:
+            authenticate()
+        assert exc.value.detail == "Account is deactivated"
+
+
+class TestPasswordPool:
+    """Tests for the bounded bcrypt pool."""
+
+    def test_saturated_pool_rejects_at_once(self):
+        """Past max_pending, callers are turned away instead of queueing."""
+        import threading
+
+        from backend.app.auth_utils import PasswordPool, PasswordPoolBusy
+
+        pool = PasswordPool(workers=0, max_pending=1)
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(2)
+            return "done"
+
+        worker = threading.Thread(target=pool.run, args=(slow,))
+        worker.start()
+        assert started.wait(2)
+        with pytest.raises(PasswordPoolBusy):
+            pool.run(slow)
+        release.set()
+        worker.join()
+
+        assert pool.stats() == {
+            "workers": 0,
+            "max_pending": 1,
+            "pending": 0,
+            "peak_pending": 1,
+            "completed": 1,
+            "rejected": 1,
+        }
+
+    def test_hash_round_trip_on_pool(self):
+        """Hashing and verifying work across the process boundary."""
+        from backend.app.auth_utils import PasswordPool, _hash, _verify
+
+        pool = PasswordPool(workers=1, max_pending=2)
+        try:
+            hashed = pool.run(_hash, "TestPassword123")
+            assert pool.run(_verify, "TestPassword123", hashed)
+            assert not pool.run(_verify, "WrongPassword123", hashed)
+        finally:
+            pool.shutdown()
+
+    def test_login_returns_503_when_saturated(self, client: TestClient, test_user):
+        """A saturated pool answers 503 with Retry-After."""
+        from backend.app.auth_utils import PasswordPoolBusy
+
+        with patch("backend.app.auth.verify_password", side_effect=PasswordPoolBusy("full")):
+            response = client.post("/auth/login", json={"email": test_user.email, "password": "TestPassword123"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,280 @@
+"""
+Redis cache availability tests.
+
+Tests cover:
+- is_available is a flag read (no PING per check)
+- Passive failure detection on real commands
+- Prober recovery and backoff schedule
+- In-process L1 in front of Redis
+- Stampede protection (lock + XFetch early refresh)
+- Stale-while-revalidate
+- Versioned per-user namespaces
+- Batched movie metadata (MGET / pipelined SETEX)
+"""
+
+import threading
+import time
+
+from redis.crc import key_slot
+from redis.exceptions import ResponseError
+
+from backend.app import cache as cache_module
+from backend.app.cache import (
+    LocalCache,
+    StaleList,
+    _wrap,
+    cache,
+    generation_key,
+    get_cached_movies,
+    invalidate_user_cache,
+    set_cached_movies,
+    user_key,
+)
+
+
+class TestAvailability:
+    """Tests for availability tracking."""
+
+    def test_is_available_does_not_ping(self, fake_redis):
+        """Checking availability is free."""
+        for _ in range(10):
+            assert cache.is_available
+        assert fake_redis.calls["ping"] == 0
+
+    def test_connection_error_marks_unavailable(self, fake_redis):
+        """A failed command takes Redis out of use until a probe succeeds."""
+        fake_redis.down = True
+        assert cache.get("k") is None
+        assert not cache.is_available
+
+        # later calls short-circuit instead of hitting the dead connection
+        assert cache.set("k", "v") is False
+        assert cache.get("k") is None
+        assert (fake_redis.calls["get"], fake_redis.calls["setex"]) == (1, 0)
+        assert cache.health_check()["status"] == "disconnected"
+
+        fake_redis.down = False
+        assert cache._probe()
+        assert cache.is_available
+        assert cache.set("k", "v")
+        assert cache.get("k") == "v"
+
+    def test_command_error_keeps_available(self, fake_redis, monkeypatch):
+        """Errors that aren't about the connection don't flip the flag."""
+
+        def wrong_type(key):
+            raise ResponseError("WRONGTYPE")
+
+        monkeypatch.setattr(fake_redis, "get", wrong_type)
+        assert cache.get("k") is None
+        assert cache.is_available
+
+    def test_probe_backoff_schedule(self, fake_redis, monkeypatch):
+        """Probes back off exponentially while down and reset once up."""
+        monkeypatch.setattr(cache_module, "REDIS_PROBE_BACKOFF_MIN", 0.5)
+        monkeypatch.setattr(cache_module, "REDIS_PROBE_BACKOFF_MAX", 4.0)
+        monkeypatch.setattr(cache_module, "REDIS_PROBE_INTERVAL", 5.0)
+
+        monkeypatch.setattr(cache, "_available", False)
+        delays, backoff = [], 0.5
+        for _ in range(6):
+            delay, backoff = cache._next_probe(backoff)
+            delays.append(delay)
+        assert delays == [0.5, 1.0, 2.0, 4.0, 4.0, 4.0]
+
+        monkeypatch.setattr(cache, "_available", True)
+        assert cache._next_probe(backoff) == (5.0, 0.5)
+
+
+class TestLocalCache:
+    """Tests for the in-process L1 tier."""
+
+    def test_hot_key_served_without_redis(self, fake_redis):
+        """After one Redis read, the key comes from L1."""
+        fake_redis.store["movie:1"] = '{"title": "Heat"}'
+        for _ in range(5):
+            assert cache.get_json("movie:1") == {"title": "Heat"}
+        assert fake_redis.calls["get"] == 1
+
+        tiers = cache.tier_stats()
+        assert tiers["l1"]["hits"] == 4
+        assert tiers["l2"] == {"hits": 1, "misses": 0, "hit_ratio": 1.0}
+
+    def test_namespace_without_ttl_not_kept(self, fake_redis):
+        """Only namespaces with an L1 TTL are cached in-process."""
+        fake_redis.store["recs:u:20:0"] = "[1, 2]"
+        cache.get_json("recs:u:20:0")
+        cache.get_json("recs:u:20:0")
+        assert fake_redis.calls["get"] == 2
+
+    def test_set_and_delete_update_l1(self, fake_redis):
+        """Writes go through to L1; deletes drop it."""
+        cache.set_json("movie:2", {"title": "Alien"}, ttl=600)
+        assert cache.get_json("movie:2") == {"title": "Alien"}
+        assert fake_redis.calls["get"] == 0
+
+        cache._l1.delete("movie:2")
+        fake_redis.store.pop("movie:2")
+        assert cache.get_json("movie:2") is None
+
+    def test_l1_ttl_capped_by_redis_ttl(self):
+        """An L1 entry never outlives the Redis TTL it was written with."""
+        l1 = LocalCache(ttls={"movie": 60.0})
+        assert l1.ttl_for("movie:1") == 60.0
+        assert l1.ttl_for("movie:1", ttl=5) == 5
+        assert l1.ttl_for("trending:20:0") == 0.0
+
+    def test_lru_eviction(self):
+        """The least recently used key goes first."""
+        l1 = LocalCache(max_entries=2, ttls={"movie": 60.0})
+        l1.set("movie:1", 1)
+        l1.set("movie:2", 2)
+        l1.get("movie:1")
+        l1.set("movie:3", 3)
+        assert l1.get("movie:2") is None
+        assert l1.get("movie:1") == 1
+        assert l1.stats()["evictions"] == 1
+
+    def test_invalidation_from_other_worker(self, fake_redis):
+        """Invalidation messages drop the key unless we sent them."""
+        cache._l1.set("movie:1", {"title": "Heat"})
+        cache._on_invalidation(f"{cache._origin}|movie:1")
+        assert cache._l1.get("movie:1") is not None
+        cache._on_invalidation("other-worker|movie:1")
+        assert cache._l1.get("movie:1") is None
+
+
+class TestStampedeProtection:
+    """Tests for get_or_compute."""
+
+    def test_concurrent_misses_compute_once(self, fake_redis):
+        """Only the lock winner calls upstream; the rest wait for its value."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return [1, 2, 3]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("recs:u:20:0", 300, compute)))
+            for _ in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == [[1, 2, 3]] * 10
+        assert not any(k.startswith("lock:") for k in fake_redis.store)
+
+    def test_early_refresh_recomputes(self, fake_redis, monkeypatch):
+        """Close to expiry, the lock winner refreshes ahead of time."""
+        monkeypatch.setattr("backend.app.cache._refresh_early", lambda *_args: True)
+        cache.set_json("recs:u:20:0", _wrap([1], 0.5, 300))
+        assert cache.get_or_compute("recs:u:20:0", 300, lambda: [2]) == [2]
+        assert cache.get_or_compute("recs:u:20:0", 300, lambda: [3]) == [3]
+
+    def test_early_refresh_serves_current_while_locked(self, fake_redis, monkeypatch):
+        """Workers that lose the lock keep serving the current value."""
+        monkeypatch.setattr("backend.app.cache._refresh_early", lambda *_args: True)
+        cache.set_json("recs:u:20:0", _wrap([1], 0.5, 300))
+        fake_redis.store["lock:recs:u:20:0"] = "someone-else"
+
+        def compute():
+            raise AssertionError("should not recompute")
+
+        assert cache.get_or_compute("recs:u:20:0", 300, compute) == [1]
+
+    def test_failed_refresh_serves_current(self, fake_redis, monkeypatch):
+        """An upstream error during early refresh doesn't fail the request."""
+        monkeypatch.setattr("backend.app.cache._refresh_early", lambda *_args: True)
+        cache.set_json("recs:u:20:0", _wrap([1], 0.5, 300))
+
+        def compute():
+            raise RuntimeError("AI down")
+
+        assert cache.get_or_compute("recs:u:20:0", 300, compute) == [1]
+
+    def test_stale_hit_served_and_refreshed_in_background(self, fake_redis):
+        """Past freshness, the stale list comes back at once and a refresh follows."""
+        cache.set_json("recs:u:20:0", _wrap([1], 0.5, -1), 600)
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.set()
+            return [2]
+
+        value = cache.get_or_compute("recs:u:20:0", 300, compute, stale_ttl=600)
+        assert isinstance(value, StaleList)
+        assert value == [1]
+
+        assert refreshed.wait(2)
+        for _ in range(100):
+            if "lock:recs:u:20:0" not in fake_redis.store:
+                break
+            time.sleep(0.01)
+        assert cache.get_or_compute("recs:u:20:0", 300, compute, stale_ttl=600) == [2]
+
+
+class TestUserGenerations:
+    """Tests for versioned user-scoped keys."""
+
+    def test_read_is_one_round_trip(self, fake_redis):
+        """Generation and value come back from a single script call."""
+        fake_redis.store["gen:{u1}"] = "3"
+        fake_redis.store["recs:{u1}:g3"] = "[1, 2]"
+
+        assert cache.get_user_scoped("recs", "u1") == ("recs:{u1}:g3", [1, 2])
+        assert fake_redis.calls["eval"] == 1
+        assert fake_redis.calls["get"] == 0
+
+    def test_invalidation_is_one_incr(self, fake_redis):
+        """Invalidating bumps the generation; the old entry is left to expire."""
+        fake_redis.store["recs:{u1}:g0"] = "[1, 2]"
+        assert cache.get_user_scoped("recs", "u1") == ("recs:{u1}:g0", [1, 2])
+
+        invalidate_user_cache("u1")
+        assert fake_redis.calls["delete"] == 0
+        assert cache.get_user_scoped("recs", "u1") == ("recs:{u1}:g1", None)
+        assert "recs:{u1}:g0" in fake_redis.store
+
+    def test_user_keys_share_a_cluster_slot(self):
+        """The versioned-get script reads an undeclared key; it must be in the gen key's slot."""
+        assert key_slot(generation_key("u1").encode()) == key_slot(user_key("recs", "u1", 7).encode())
+
+    def test_l1_serves_hot_user(self, fake_redis, monkeypatch):
+        """With generation and value in L1, a read doesn't touch Redis."""
+        monkeypatch.setattr(cache, "_l1", LocalCache(ttls={"gen": 5.0, "recs": 30.0}))
+        fake_redis.store["recs:{u1}:g0"] = "[1, 2]"
+        cache.get_user_scoped("recs", "u1")
+        cache.get_user_scoped("recs", "u1")
+        assert fake_redis.calls["eval"] == 1
+
+
+class TestBatchedMovies:
+    """Tests for get_cached_movies / set_cached_movies."""
+
+    def test_one_round_trip_each_way(self, fake_redis):
+        """A page of ids is one MGET; writing misses back is one pipeline."""
+        fake_redis.store["movie:1"] = '{"title": "Heat"}'
+        assert get_cached_movies([1, 2, 3]) == {1: {"title": "Heat"}}
+        assert fake_redis.calls["mget"] == 1
+
+        assert set_cached_movies({2: {"title": "Alien"}, 3: {"title": "Ran"}})
+        assert fake_redis.calls["pipeline"] == 1
+        assert fake_redis.calls["setex"] == 0
+
+    def test_l1_hits_skip_redis(self, fake_redis):
+        """Keys already in L1 are left out of the MGET."""
+        set_cached_movies({1: {"title": "Heat"}, 2: {"title": "Alien"}})
+        assert get_cached_movies([1, 2]) == {1: {"title": "Heat"}, 2: {"title": "Alien"}}
+        assert fake_redis.calls["mget"] == 0
+
+    def test_unavailable_returns_nothing(self, fake_redis):
+        """A failed MGET degrades to all misses."""
+        fake_redis.down = True
+        assert get_cached_movies([1]) == {}
+        assert not cache.is_available
@@ -0,0 +1,113 @@
+"""
+Catalog snapshot tests.
+
+Tests cover:
+- Ascending and descending paging
+- Lookup by movie_id
+- Keyset paging after a movie_id
+- Failed refresh keeps the previous snapshot
+- Feeds served from the snapshot without touching the DB
+"""
+
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from backend.app.catalog import Catalog
+
+MOVIES = [{"movie_id": i, "title": f"Movie {i}", "year": 2000 + i} for i in (5, 1, 3, 2, 4)]
+
+
+class TestCatalogSnapshot:
+    """Tests for Catalog / CatalogSnapshot."""
+
+    def test_pages(self):
+        """Pages slice in movie_id order, either direction."""
+        catalog = Catalog(lambda: MOVIES)
+        assert catalog.page(2, 0) is None
+        assert catalog.refresh()
+
+        assert [m["movie_id"] for m in catalog.page(2, 0)] == [1, 2]
+        assert [m["movie_id"] for m in catalog.page(2, 4)] == [5]
+        assert [m["movie_id"] for m in catalog.page(2, 0, descending=True)] == [5, 4]
+        assert [m["movie_id"] for m in catalog.page(2, 4, descending=True)] == [1]
+        assert catalog.page(2, 5, descending=True) == []
+
+    def test_page_after(self):
+        """Keyset pages start right after the given movie_id, even if it's gone."""
+        catalog = Catalog(lambda: MOVIES)
+        catalog.refresh()
+        assert [m["movie_id"] for m in catalog.page_after(2, 2)] == [3, 4]
+        assert [m["movie_id"] for m in catalog.page_after(2, 4, descending=True)] == [3, 2]
+        assert [m["movie_id"] for m in catalog.page_after(2, 0)] == [1, 2]
+        assert catalog.page_after(2, 5) == []
+
+    def test_get(self):
+        """Lookups by id hit or miss."""
+        catalog = Catalog(lambda: MOVIES)
+        catalog.refresh()
+        assert catalog.snapshot.get(3)["title"] == "Movie 3"
+        assert catalog.snapshot.get(6) is None
+
+    def test_failed_refresh_keeps_snapshot(self):
+        """A DB error during refresh leaves the last good snapshot in place."""
+        rows = [MOVIES]
+
+        def load():
+            if rows[0] is None:
+                raise RuntimeError("DB down")
+            return rows[0]
+
+        catalog = Catalog(load)
+        catalog.refresh()
+        rows[0] = None
+        assert not catalog.refresh()
+        assert len(catalog.snapshot) == 5
+        assert catalog.stats()["refresh_failures"] == 1
+
+
+class TestCatalogFeeds:
+    """Fallback and trending feeds from the snapshot."""
+
+    def test_trending_from_snapshot(self, client: TestClient, auth_headers):
+        """Trending is the newest movies first, without a DB query."""
+        catalog = Catalog(lambda: MOVIES)
+        catalog.refresh()
+        with patch("backend.app.feed.catalog", catalog):
+            response = client.get("/feed/trending?limit=2", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["source"] == "trending"
+        assert [item["movie_id"] for item in data["items"]] == [5, 4]
+        assert data["items"][0]["reason_chips"] == ["Trending now"]
+
+    def test_home_fallback_from_snapshot(self, client: TestClient, auth_headers, mock_ai_service_error):
+        """With the AI down and no stale list, the fallback page comes from memory."""
+        catalog = Catalog(lambda: MOVIES)
+        catalog.refresh()
+        with patch("backend.app.feed.catalog", catalog):
+            response = client.get("/feed/home?limit=3&offset=1", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["source"] == "db_fallback"
+        assert [item["movie_id"] for item in data["items"]] == [2, 3, 4]
+        assert data["next_offset"] == 4
+
+    def test_cursor_walks_fallback_pages(self, client: TestClient, auth_headers, mock_ai_service_error):
+        """Following next_cursor visits every movie once, then stops."""
+        catalog = Catalog(lambda: MOVIES)
+        catalog.refresh()
+        seen, after = [], None
+        with patch("backend.app.feed.catalog", catalog):
+            for _ in range(5):
+                params = {"limit": 2} if after is None else {"limit": 2, "after": after}
+                data = client.get("/feed/home", params=params, headers=auth_headers).json()
+                seen += [item["movie_id"] for item in data["items"]]
+                after = data["next_cursor"]
+                if after is None:
+                    break
+
+        assert seen == [1, 2, 3, 4, 5]
+        assert data["next_offset"] == 5
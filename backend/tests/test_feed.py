@@ -4,13 +4,23 @@ Feed endpoint tests.
 Tests cover:
 - Home feed with AI recommendations
 - Fallback to database when AI unavailable
+- Stale personalized list when AI unavailable
+- Batched metadata hydration
+- Cursor pagination
 - Trending feed
 - Pagination and limits
 - Input validation
 """
 
+import asyncio
+from unittest.mock import AsyncMock, patch
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.app.feed import _query_movie_page, decode_cursor, encode_cursor, hydrate_items
 
 
 class TestHomeFeed:
@@ -42,6 +52,25 @@ class TestHomeFeed:
         # Will be 503 if no movies in test DB, or 200 with db_fallback
         assert response.status_code in [200, 503]
 
+    def test_home_feed_serves_stale_on_ai_error(
+        self,
+        client: TestClient,
+        auth_headers,
+        mock_ai_service_error
+    ):
+        """Test home feed serves the user's stale list instead of the DB fallback."""
+        from backend.app.cache import StaleList
+
+        stale = StaleList([{"movie_id": 7, "title": "Cached Movie", "score": 0.8, "rank": 1}])
+        with patch("backend.app.feed.aget_cached_recommendations", new_callable=AsyncMock) as mock_cache:
+            mock_cache.return_value = stale
+            response = client.get("/feed/home", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["source"] == "ai_stale"
+        assert data["items"][0]["movie_id"] == 7
+
     def test_home_feed_pagination(
         self,
         client: TestClient,
@@ -64,6 +93,92 @@ class TestHomeFeed:
         assert response.status_code == 401
 
 
+class TestHydration:
+    """Tests for batched movie metadata hydration."""
+
+    @staticmethod
+    def _hydrate(items, cached):
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text("CREATE TABLE movies (movie_id INTEGER PRIMARY KEY, title TEXT, poster_url TEXT, overview TEXT, release_date TEXT)")
+                )
+                await conn.execute(
+                    text("INSERT INTO movies VALUES (2, 'Alien', 'a.jpg', 'In space', '1979-05-25'), (3, 'Heat', NULL, NULL, '1995-12-15')")
+                )
+            with patch("backend.app.feed.aget_cached_movies", new_callable=AsyncMock) as mget, patch(
+                "backend.app.feed.aset_cached_movies", new_callable=AsyncMock
+            ) as mset:
+                mget.return_value = cached
+                async with AsyncSession(engine) as db:
+                    result = await hydrate_items(db, items)
+            await engine.dispose()
+            return result, mget, mset
+
+        return asyncio.run(run())
+
+    def test_cache_hits_and_db_misses_merged(self):
+        """One MGET for the page, one query for the misses, misses written back."""
+        items = [{"movie_id": 1, "score": 0.9}, {"movie_id": 2, "score": 0.8}, {"movie_id": 3, "score": 0.7}]
+        result, mget, mset = self._hydrate(items, {1: {"title": "Cached", "year": 2001}})
+
+        mget.assert_awaited_once_with([1, 2, 3])
+        (written,), _ = mset.call_args
+        assert set(written) == {2, 3}
+        assert [r["title"] for r in result] == ["Cached", "Alien", "Heat"]
+        assert result[1]["year"] == 1979 and result[1]["score"] == 0.8
+        assert "title" not in items[0]  # input dicts are not mutated
+
+    def test_items_with_titles_skip_lookup(self):
+        """Items that already carry metadata don't cost a lookup."""
+        items = [{"movie_id": 1, "title": "Given"}]
+        result, mget, mset = self._hydrate(items, {})
+        assert result == items
+        mget.assert_not_awaited()
+        mset.assert_not_awaited()
+
+
+class TestCursorPagination:
+    """Tests for after= / next_cursor."""
+
+    def test_cursor_round_trip(self):
+        """Cursors are opaque strings that decode to what was encoded."""
+        cursor = encode_cursor(o=40, k="trend", m=7, s=1.25)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == {"o": 40, "k": "trend", "m": 7, "s": 1.25}
+
+    def test_invalid_cursor_rejected(self, client: TestClient, auth_headers):
+        """Garbage cursors are a 400, not a 500."""
+        for bad in ("not-a-cursor", encode_cursor(m=3), encode_cursor(o=-1)):
+            response = client.get("/feed/trending", params={"after": bad}, headers=auth_headers)
+            assert response.status_code == 400
+
+    def test_db_keyset_query(self):
+        """The DB fallback reads the rows after the cursor in either direction."""
+
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text("CREATE TABLE movies (movie_id INTEGER PRIMARY KEY, title TEXT, poster_url TEXT, overview TEXT, release_date TEXT)")
+                )
+                await conn.execute(text("INSERT INTO movies (movie_id, title) VALUES (1, 'a'), (2, 'b'), (3, 'c'), (5, 'e')"))
+            async with AsyncSession(engine) as db:
+                pages = (
+                    await _query_movie_page(db, 2, 0, 2, descending=False),
+                    await _query_movie_page(db, 2, 0, 5, descending=True),
+                    await _query_movie_page(db, 2, 1, None, descending=False),
+                )
+            await engine.dispose()
+            return pages
+
+        after, before, by_offset = asyncio.run(run())
+        assert [row["movie_id"] for row in after] == [3, 5]
+        assert [row["movie_id"] for row in before] == [3, 2]
+        assert [row["movie_id"] for row in by_offset] == [2, 3]
+
+
 class TestFeedValidation:
     """Tests for feed input validation."""
 
@@ -6,7 +6,7 @@ Tests cover:
 - Readiness check endpoint
 - Root endpoint
 - Security headers
-- Request ID tracking
+- Request ID tracking (including streamed responses)
 """
 
 import pytest
@@ -87,6 +87,31 @@ class TestRequestTracking:
         )
         assert response.headers.get("X-Request-ID") == custom_id
 
+    def test_streaming_response_through_middleware(self):
+        """Streamed bodies pass through untouched, headers added once."""
+        from starlette.applications import Starlette
+        from starlette.middleware import Middleware
+        from starlette.requests import Request
+        from starlette.responses import StreamingResponse
+        from starlette.routing import Route
+
+        from backend.app.main import RequestIDMiddleware, SecurityHeadersMiddleware
+
+        def stream(request: Request):
+            chunks = [request.state.request_id.encode(), b"|", b"done"]
+            return StreamingResponse(iter(chunks), headers={"X-Frame-Options": "SAMEORIGIN"})
+
+        app = Starlette(
+            routes=[Route("/stream", stream)],
+            middleware=[Middleware(RequestIDMiddleware), Middleware(SecurityHeadersMiddleware)],
+        )
+        with TestClient(app) as test_client:
+            response = test_client.get("/stream", headers={"X-Request-ID": "req-1"})
+
+        assert response.text == "req-1|done"
+        assert response.headers.get_list("X-Frame-Options") == ["DENY"]
+        assert response.headers["X-Request-ID"] == "req-1"
+
 
 class TestCORS:
     """Tests for CORS configuration."""
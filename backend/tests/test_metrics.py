@@ -0,0 +1,139 @@
+"""
+Metrics tests.
+
+Tests cover:
+- Per-thread counter / histogram shards merged at scrape time
+- Shards of exited threads folded in, not kept per thread
+- Request latency labelled by route template
+- Cache lookups by namespace, AI upstream outcomes
+- /metrics in Prometheus text and JSON
+"""
+
+import threading
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import ai_client
+from backend.app.cache import cache, movie_key
+from backend.app.metrics import (
+    AI_REQUEST_LATENCY,
+    CACHE_LOOKUPS,
+    PROMETHEUS_CONTENT_TYPE,
+    Counter,
+    Histogram,
+)
+
+
+def _total(counter: Counter, **labels: str) -> float:
+    """Sum of the series matching labels."""
+    wanted = set(labels.items())
+    return sum(v for key, v in counter.values().items() if wanted <= set(key))
+
+
+class TestShardedMetrics:
+    """Tests for the per-thread metric primitives."""
+
+    def test_counter_merges_thread_shards(self):
+        """Increments from several threads all show up in one collect."""
+        counter = Counter("test_events_total", "Test events.")
+
+        def work():
+            for _ in range(1000):
+                counter.inc(kind="a")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        counter.inc(2, kind="b")
+
+        assert counter.values() == {(("kind", "a"),): 4000.0, (("kind", "b"),): 2.0}
+        assert 'test_events_total{kind="a"} 4000' in counter.collect()
+
+    def test_exited_threads_fold_their_shards(self):
+        """Short-lived threads don't leave a shard each; their counts are kept."""
+        counter = Counter("test_events_total", "Test events.")
+        histogram = Histogram("test_seconds", "Test latency.", buckets=(0.1, 1.0))
+
+        def work():
+            counter.inc(kind="a")
+            histogram.observe(0.5, op="x")
+
+        for _ in range(200):
+            t = threading.Thread(target=work)
+            t.start()
+            t.join()
+
+        assert len(counter._shards) == len(histogram._shards) == 0
+        assert counter.values() == {(("kind", "a"),): 200.0}
+        assert histogram.series()[(("op", "x"),)] == [0, 200, 0, 100.0]
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket lines are cumulative and upper bounds are inclusive."""
+        histogram = Histogram("test_seconds", "Test latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, op="x")
+
+        lines = histogram.collect()
+        assert 'test_seconds_bucket{op="x",le="0.1"} 2' in lines
+        assert 'test_seconds_bucket{op="x",le="1"} 3' in lines
+        assert 'test_seconds_bucket{op="x",le="+Inf"} 4' in lines
+        assert 'test_seconds_count{op="x"} 4' in lines
+        assert 'test_seconds_sum{op="x"} 3.65' in lines
+
+
+class TestInstrumentation:
+    """Tests for the hooks in the request, cache and AI paths."""
+
+    def test_cache_lookups_by_namespace(self, fake_redis):
+        """A miss then a hit on a movie key count under the movie namespace."""
+        misses = _total(CACHE_LOOKUPS, namespace="movie", result="miss")
+        hits = _total(CACHE_LOOKUPS, namespace="movie", tier="l2", result="hit")
+
+        assert cache.get_json(movie_key(7)) is None
+        cache.set_json(movie_key(7), {"movie_id": 7})
+        if cache._l1 is not None:
+            cache._l1.clear()
+        assert cache.get_json(movie_key(7)) == {"movie_id": 7}
+
+        assert _total(CACHE_LOOKUPS, namespace="movie", result="miss") > misses
+        assert _total(CACHE_LOOKUPS, namespace="movie", tier="l2", result="hit") == hits + 1
+
+    def test_ai_timeout_outcome(self, monkeypatch):
+        """A timed-out upstream call is observed under outcome=timeout."""
+
+        class TimingOut:
+            def post(self, *args, **kwargs):
+                raise httpx.ReadTimeout("slow")
+
+        monkeypatch.setattr(ai_client, "AI_BASE_URL", "http://ai")
+        monkeypatch.setattr(ai_client, "get_sync_client", lambda: TimingOut())
+        key = (("outcome", "timeout"),)
+        before = sum(AI_REQUEST_LATENCY.series().get(key, [0])[:-1])
+
+        with pytest.raises(ai_client.AIServiceError):
+            ai_client._call_ai_service("u1", 10, 0)
+
+        assert sum(AI_REQUEST_LATENCY.series()[key][:-1]) == before + 1
+
+    def test_metrics_endpoint_prometheus(self, client: TestClient):
+        """Routes are labelled by template; gauges are rendered at scrape time."""
+        client.get("/health")
+        client.get("/no-such-route")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == PROMETHEUS_CONTENT_TYPE
+        body = response.text
+        assert 'route="/health",status="2xx"' in body
+        assert 'route="unmatched",status="4xx"' in body
+        assert 'backend_circuit_state{circuit="ai_service",state="closed"} 1' in body
+        assert "backend_password_pool_pending" in body
+
+    def test_metrics_endpoint_json(self, client: TestClient):
+        """?format=json keeps the component stats available."""
+        data = client.get("/metrics", params={"format": "json"}).json()
+        assert set(data) >= {"circuits", "cache_tiers", "catalog", "password_pool"}
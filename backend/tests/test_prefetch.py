@@ -0,0 +1,183 @@
+"""
+Next-page prefetch tests.
+
+Tests cover:
+- Prefetch only when the next page needs a deeper ranked chunk
+- Circuit breaker, per-user dedup and per-worker cap
+- Prefetches run outside the scheduling request's trace
+- Requests wait for a running prefetch; used prefetches are counted
+- Login warm-up of the first ranked chunk
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+from backend.app import prefetch
+from backend.app.circuit_breaker import CircuitState
+from backend.app.metrics import PREFETCH_EVENTS
+from backend.app.prefetch import Prefetcher
+from backend.app.tracing import current_trace, end_trace, start_trace
+
+
+def _events(event: str, kind: str = "next_page") -> float:
+    return PREFETCH_EVENTS.values().get((("event", event), ("kind", kind)), 0.0)
+
+
+class _Release:
+    """Set from a test to let blocked fetches finish; the Event is made on the running loop (3.9)."""
+
+    def __init__(self):
+        self._event: Optional[asyncio.Event] = None
+
+    @property
+    def event(self) -> asyncio.Event:
+        if self._event is None:
+            self._event = asyncio.Event()
+        return self._event
+
+    def set(self) -> None:
+        self.event.set()
+
+    async def wait(self) -> None:
+        await self.event.wait()
+
+
+@pytest.fixture
+def ai_fetches(fake_redis, monkeypatch):
+    """Stub the AI fetch; each call blocks until `release` is set."""
+    calls = []
+    release = _Release()
+
+    async def fake_fetch(user_id, limit=20, offset=0):
+        calls.append((user_id, limit, offset))
+        await release.wait()
+        return []
+
+    monkeypatch.setattr(prefetch, "get_ai_recommendations_async", fake_fetch)
+    return SimpleNamespace(calls=calls, release=release)
+
+
+class TestScheduling:
+    """Tests for when a prefetch is started."""
+
+    def test_only_when_next_page_needs_a_new_chunk(self, ai_fetches):
+        """Page 1 (0-20) and page 2 (20-40) share the first 50-item chunk; page 3 doesn't."""
+
+        async def run():
+            prefetcher = Prefetcher()
+            assert prefetcher.schedule("u1", 20, 0) is None
+            task = prefetcher.schedule("u1", 20, 20)
+            assert task is not None
+            ai_fetches.release.set()
+            await task
+
+        asyncio.run(run())
+        assert ai_fetches.calls == [("u1", 20, 40)]
+
+    def test_dedup_and_cap(self, ai_fetches):
+        """One prefetch per user, max_concurrency per worker; extras are skipped."""
+        duplicate, busy = _events("skipped_duplicate"), _events("skipped_busy")
+
+        async def run():
+            prefetcher = Prefetcher(max_concurrency=1)
+            task = prefetcher.schedule("u1", 20, 20)
+            assert prefetcher.schedule("u1", 20, 20) is None
+            assert prefetcher.schedule("u2", 20, 20) is None
+            ai_fetches.release.set()
+            await task
+            assert prefetcher.stats()["inflight"] == 0
+
+        asyncio.run(run())
+        assert _events("skipped_duplicate") == duplicate + 1
+        assert _events("skipped_busy") == busy + 1
+
+    def test_runs_outside_request_trace(self, ai_fetches, monkeypatch):
+        """The prefetch's spans don't land on the request that scheduled it."""
+        seen = []
+
+        async def traced_fetch(user_id, limit=20, offset=0):
+            seen.append(current_trace())
+            return []
+
+        monkeypatch.setattr(prefetch, "get_ai_recommendations_async", traced_fetch)
+
+        async def run():
+            _, token = start_trace("req-1")
+            try:
+                await Prefetcher().schedule("u1", 20, 20)
+            finally:
+                end_trace(token)
+
+        asyncio.run(run())
+        assert seen == [None]
+
+    def test_circuit_not_closed(self, ai_fetches, monkeypatch):
+        """Nothing is prefetched while the breaker is open or half-open."""
+        monkeypatch.setattr(prefetch, "ai_service_circuit", SimpleNamespace(state=CircuitState.HALF_OPEN))
+
+        async def run():
+            return Prefetcher().schedule("u1", 20, 20)
+
+        assert asyncio.run(run()) is None
+        assert ai_fetches.calls == []
+
+
+class TestJoin:
+    """Tests for requests meeting their prefetch."""
+
+    def test_request_waits_for_prefetch_and_counts_hit(self, ai_fetches):
+        used = _events("used")
+
+        async def run():
+            prefetcher = Prefetcher()
+            prefetcher.schedule("u1", 20, 20)
+            join = asyncio.create_task(prefetcher.join("u1", 20, 40))
+            await asyncio.sleep(0)
+            assert not join.done()  # still waiting on the prefetch
+            ai_fetches.release.set()
+            await join
+            # a page inside the already cached chunk is not a prefetch hit
+            await prefetcher.join("u1", 20, 20)
+
+        asyncio.run(run())
+        assert _events("used") == used + 1
+
+
+class TestLoginWarmup:
+    """Tests for the post-login warm-up."""
+
+    def test_warms_first_chunk_and_counts_hit(self, ai_fetches, monkeypatch):
+        """The first feed page after login is served from the warmed chunk."""
+        used = _events("used", kind="login")
+
+        async def nothing_cached(user_id, limit, offset):
+            return None
+
+        monkeypatch.setattr(prefetch, "aget_cached_recommendations", nothing_cached)
+
+        async def run():
+            prefetcher = Prefetcher()
+            task = await prefetcher.warm("u1")
+            assert await prefetcher.warm("u1") is None  # deduplicated
+            ai_fetches.release.set()
+            await task
+            await prefetcher.join("u1", 20, 0)
+
+        asyncio.run(run())
+        assert ai_fetches.calls == [("u1", 50, 0)]
+        assert _events("used", kind="login") == used + 1
+
+    def test_skipped_when_cache_is_fresh(self, ai_fetches, monkeypatch):
+        fresh = _events("skipped_fresh", kind="login")
+
+        async def cached(user_id, limit, offset):
+            return [{"movie_id": 1}]
+
+        monkeypatch.setattr(prefetch, "aget_cached_recommendations", cached)
+
+        assert asyncio.run(Prefetcher().warm("u1")) is None
+        assert ai_fetches.calls == []
+        assert _events("skipped_fresh", kind="login") == fresh + 1
@@ -0,0 +1,103 @@
+"""
+Tracing tests.
+
+Tests cover:
+- Spans on the current trace (and no-op outside a request)
+- Server-Timing on responses, with the stages of /feed/home
+- Inbound X-Request-ID propagated to the AI service
+- Sampled JSONL export
+"""
+
+import json
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend.app import ai_client
+from backend.app.tracing import TraceExporter, current_request_id, end_trace, span, start_trace
+
+
+class TestSpans:
+    """Tests for the span API."""
+
+    def test_spans_sum_per_stage(self):
+        """Same-name spans are summed; total comes last."""
+        trace, token = start_trace("req-1")
+        try:
+            assert current_request_id() == "req-1"
+            for _ in range(2):
+                with span("redis"):
+                    time.sleep(0.002)
+            with span("ai"):
+                pass
+        finally:
+            end_trace(token)
+
+        assert [name for name, _, _ in trace.spans] == ["redis", "redis", "ai"]
+        assert list(trace.totals()) == ["redis", "ai"]
+        assert trace.totals()["redis"] >= 0.004
+        header = trace.server_timing()
+        assert header.startswith("redis;dur=") and ", ai;dur=" in header and header.split(", ")[-1].startswith("total")
+
+    def test_span_outside_request_is_noop(self):
+        """No current trace: nothing is recorded, no request id."""
+        with span("redis"):
+            pass
+        assert current_request_id() is None
+
+
+class TestServerTiming:
+    """Tests for the tracing middleware."""
+
+    def test_header_on_every_response(self, client: TestClient):
+        response = client.get("/health")
+        assert response.headers["Server-Timing"].startswith("total;dur=")
+
+    def test_feed_stages_and_request_id_propagation(self, client: TestClient, auth_headers, monkeypatch):
+        """/feed/home reports auth and ai stages and forwards the caller's request id."""
+        sent = []
+
+        class FakeAsyncClient:
+            async def post(self, url, json=None, headers=None, timeout=None):
+                sent.append((json, headers))
+                items = [{"movie_id": 1, "title": "A", "score": 0.9}]
+                return httpx.Response(200, json={"items": items, "meta": {}})
+
+        monkeypatch.setattr(ai_client, "AI_BASE_URL", "http://ai")
+        monkeypatch.setattr(ai_client, "get_async_client", lambda: FakeAsyncClient())
+
+        response = client.get("/feed/home", headers={**auth_headers, "X-Request-ID": "trace-me"})
+
+        assert response.status_code == 200
+        stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+        assert {"auth", "ai", "total"} <= set(stages)
+        body, headers = sent[0]
+        assert headers["X-Request-ID"] == "trace-me"
+        assert body["request_id"] == "trace-me"
+
+
+class TestExport:
+    """Tests for sampled trace export."""
+
+    def test_sampled_traces_written_as_jsonl(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        exporter = TraceExporter(path=str(path), sample_rate=1.0)
+        trace, token = start_trace("req-2")
+        with span("db"):
+            pass
+        end_trace(token)
+
+        assert exporter.sampled()
+        exporter.export(trace.to_dict(path="/feed/home", status=200))
+        deadline = time.monotonic() + 2
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        record = json.loads(path.read_text().splitlines()[0])
+        assert record["request_id"] == "req-2"
+        assert record["path"] == "/feed/home"
+        assert [s["name"] for s in record["spans"]] == ["db"]
+
+    def test_not_sampled_at_zero_rate(self):
+        assert not TraceExporter(sample_rate=0).sampled()
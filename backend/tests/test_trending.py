@@ -0,0 +1,133 @@
+"""
+Trending engine tests.
+
+Tests cover:
+- Exponential decay by half-life
+- Forward decay ranks the same whatever the landmark
+- /feed/trending ordered by the sorted set, with catalog metadata
+- Cursor positions clamped to MAX_OFFSET
+- End of feed past the trend set (no switch to newest-by-id)
+- Periodic rebuild: one worker per interval, retried after a failure
+"""
+
+import math
+from unittest.mock import AsyncMock, Mock, patch
+
+from fastapi.testclient import TestClient
+
+from backend.app import trending
+from backend.app.catalog import Catalog
+from backend.app.feed import MAX_OFFSET, encode_cursor
+from backend.app.trending import decayed_scores
+
+HOUR = 3600.0
+HALF_LIFE = trending.TRENDING_HALF_LIFE_HOURS * HOUR
+
+
+class TestDecay:
+    """Tests for decayed_scores."""
+
+    def test_half_life(self):
+        """An event one half-life old counts half."""
+        scores = decayed_scores([(1, 1.0, 1000.0), (2, 1.0, 1000.0 - HALF_LIFE)], as_of=1000.0)
+        assert scores[1] == 1.0
+        assert math.isclose(scores[2], 0.5)
+
+    def test_landmark_does_not_change_ranking(self):
+        """Scores for different landmarks differ by one common factor."""
+        events = [(1, 1.0, 0.0), (1, 0.5, 5 * HOUR), (2, 1.0, 20 * HOUR), (3, 0.2, 30 * HOUR)]
+        early = decayed_scores(events, as_of=30 * HOUR)
+        late = decayed_scores(events, as_of=31 * HOUR)
+        assert sorted(early, key=early.get) == sorted(late, key=late.get)
+        assert math.isclose(late[1] / early[1], late[3] / early[3])
+
+    def test_fully_decayed_dropped(self):
+        """Movies whose activity has decayed to nothing leave the set."""
+        scores = decayed_scores([(1, 1.0, 0.0)], as_of=20 * HALF_LIFE)
+        assert scores == {}
+
+    def test_event_weights(self):
+        """Ratings scale with the rating; unknown watch events count nothing."""
+        assert trending.rating_weight(5) == trending.RATING_WEIGHT
+        assert trending.watch_weight("completed") > trending.watch_weight("paused")
+        assert trending.watch_weight("unknown") == 0.0
+
+
+class TestTrendingFeed:
+    """Tests for /feed/trending with trend data."""
+
+    def test_ordered_by_sorted_set(self, client: TestClient, auth_headers):
+        """Pages follow ZREVRANGE order; metadata comes from the catalog."""
+        catalog = Catalog(lambda: [{"movie_id": i, "title": f"Movie {i}"} for i in (1, 2, 3)])
+        catalog.refresh()
+        with patch("backend.app.feed.catalog", catalog), patch(
+            "backend.app.feed.atrending_page", new_callable=AsyncMock
+        ) as ids:
+            ids.return_value = [(3, 2.0), (1, 1.5)]
+            response = client.get("/feed/trending?limit=2&offset=4", headers=auth_headers)
+
+        ids.assert_awaited_once_with(2, 4, None)
+        data = response.json()
+        assert data["source"] == "trending"
+        assert [(item["movie_id"], item["title"], item["rank"]) for item in data["items"]] == [
+            (3, "Movie 3", 5),
+            (1, "Movie 1", 6),
+        ]
+
+    def test_deep_cursor_clamped(self, client: TestClient, auth_headers):
+        """A cursor position past MAX_OFFSET is clamped like ?offset= is."""
+        cursor = encode_cursor(o=10_000_000, k="trend", m=7, s=1.25)
+        with patch("backend.app.feed.atrending_page", new_callable=AsyncMock) as ids:
+            ids.return_value = [(3, 1.0)]
+            response = client.get("/feed/trending", params={"after": cursor, "limit": 2}, headers=auth_headers)
+
+        ids.assert_awaited_once_with(2, MAX_OFFSET, (7, 1.25))
+        assert response.json()["items"][0]["rank"] == MAX_OFFSET + 1
+
+    def test_trend_cursor_past_the_set_ends_feed(self, client: TestClient, auth_headers):
+        """Once the trend set runs out, the feed ends instead of switching ordering."""
+        cursor = encode_cursor(o=40, k="trend", m=7, s=0.5)
+        with patch("backend.app.feed.atrending_page", new_callable=AsyncMock, return_value=[]), patch(
+            "backend.app.feed._movie_page", new_callable=AsyncMock
+        ) as newest:
+            response = client.get("/feed/trending", params={"after": cursor, "limit": 20}, headers=auth_headers)
+
+        data = response.json()
+        assert (data["items"], data["next_cursor"], data["source"]) == ([], None, "trending")
+        newest.assert_not_awaited()
+
+    def test_offset_past_the_set_ends_feed(self, client: TestClient, auth_headers):
+        """Offset paging too: a non-empty set that's shorter than the offset ends the feed."""
+        with patch("backend.app.feed.atrending_page", new_callable=AsyncMock, return_value=[]), patch(
+            "backend.app.feed.atrending_size", new_callable=AsyncMock, return_value=30
+        ), patch("backend.app.feed._movie_page", new_callable=AsyncMock) as newest:
+            response = client.get("/feed/trending?limit=20&offset=40", headers=auth_headers)
+
+        assert response.json()["items"] == []
+        newest.assert_not_awaited()
+
+
+class TestPeriodicRebuild:
+    """Tests for the in-app rebuild."""
+
+    def test_one_rebuild_per_interval(self, fake_redis, monkeypatch):
+        """The lock outlives the rebuild, so other workers skip until the interval is up."""
+        rebuilds = []
+        monkeypatch.setattr(trending, "rebuild_from_db", lambda db, as_of: rebuilds.append(as_of))
+        sessions = Mock()
+
+        assert trending.rebuild_if_due(sessions)
+        assert not trending.rebuild_if_due(sessions)
+        assert len(rebuilds) == 1
+        assert trending.TRENDING_REBUILD_LOCK_KEY in fake_redis.store
+        sessions.return_value.close.assert_called_once()
+
+    def test_failed_rebuild_is_retried(self, fake_redis, monkeypatch):
+        """A failure releases the lock for the next poll."""
+
+        def broken(db, as_of):
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(trending, "rebuild_from_db", broken)
+        assert not trending.rebuild_if_due(Mock())
+        assert trending.TRENDING_REBUILD_LOCK_KEY not in fake_redis.store
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Per-request latency of backend->AI calls: a fresh httpx.Client per call (old
+behaviour) vs the pooled keep-alive client, against a local stub AI server.
+
+    PYTHONPATH=. python scripts/bench_ai_client.py [n_requests]
+"""
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+BODY = json.dumps(
+    {
+        "items": [{"movie_id": i, "score": 0.5, "rank": i, "explanation": {}} for i in range(1, 21)],
+        "meta": {"latency_ms": 0},
+    }
+).encode()
+
+
+class StubAI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        # headers and body go out in separate writes; don't let Nagle + delayed ACK add 40ms
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *_args):
+        pass
+
+
+def timed(fn, n):
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["AI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+    from backend.app import ai_client
+
+    ai_client.AI_BASE_URL = os.environ["AI_BASE_URL"]
+
+    def fresh():
+        with httpx.Client(timeout=ai_client.AI_TIMEOUT_SECONDS) as client:
+            client.post(f"{ai_client.AI_BASE_URL}/ai/recommend", json={"user_id": 1}).json()
+
+    def pooled():
+        ai_client._call_ai_service(user_id="1", limit=20, offset=0)
+
+    pooled()  # open the pooled connection once
+    print(f"{n} sequential calls to a local stub AI server")
+    print(f"{'client':<14} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, fn in (("fresh/request", fresh), ("pooled", pooled)):
+        mean, p50, p99 = timed(fn, n)
+        print(f"{name:<14} {mean:>8.3f} {p50:>8.3f} {p99:>8.3f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Feed latency during a login burst: bcrypt inline in the request thread
+(PASSWORD_POOL_WORKERS=0, the old behaviour) vs the bounded process pool.
+
+Feed clients hit /feed/trending (served from an in-memory catalog, so the
+number measures request scheduling, not the DB) while login clients hammer
+/auth/login. Reports feed p50/p99 and how the logins were answered.
+
+    PYTHONPATH=. python scripts/bench_auth_feed_mix.py [feed_clients] [login_clients] [seconds]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+FEED_CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+LOGIN_CLIENTS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.setdefault("REDIS_ENABLED", "false")
+os.environ.setdefault("CATALOG_ENABLED", "false")
+os.environ.setdefault("JWT_SECRET", "bench-secret-key-that-is-at-least-32-characters")
+os.environ.setdefault("RATE_LIMIT_DEFAULT", "1000000/minute")
+
+EMAIL, PASSWORD = "bench@example.com", "BenchPassword123"
+
+
+def main():
+    import logging
+
+    import httpx
+
+    import backend.app.auth_utils as auth_utils
+    import backend.app.feed as feed
+    from backend.app.catalog import Catalog
+    from backend.app.main import app
+    from backend.models.user import User
+    from backend.session import Base, SessionLocal, engine
+
+    logging.disable(logging.WARNING)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(id="bench-user", email=EMAIL, password_hash=auth_utils._hash(PASSWORD)))
+    db.commit()
+    db.close()
+
+    feed.catalog = Catalog(lambda: [{"movie_id": i, "title": f"Movie {i}"} for i in range(1, 4000)])
+    feed.catalog.refresh()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            r = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+            stop = time.monotonic() + SECONDS
+            feed_ms, logins = [], Counter()
+
+            async def feed_client():
+                while time.monotonic() < stop:
+                    t0 = time.perf_counter()
+                    r = await client.get("/feed/trending?limit=20", headers=headers)
+                    feed_ms.append((time.perf_counter() - t0) * 1000)
+                    assert r.status_code == 200, r.text
+
+            async def login_client():
+                while time.monotonic() < stop:
+                    r = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                    logins[r.status_code] += 1
+                    if r.status_code == 503:
+                        await asyncio.sleep(0.05)
+
+            await asyncio.gather(*(feed_client() for _ in range(FEED_CLIENTS)), *(login_client() for _ in range(LOGIN_CLIENTS)))
+        feed_ms.sort()
+        return feed_ms, logins
+
+    print(f"feed_clients={FEED_CLIENTS} login_clients={LOGIN_CLIENTS} duration={SECONDS:.0f}s cpus={os.cpu_count()}")
+    print(f"{'bcrypt':<22} {'feed req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'login 200':>10} {'login 503':>10}")
+    workers = auth_utils.PASSWORD_POOL_WORKERS
+    for name, pool in (
+        ("inline (old)", auth_utils.PasswordPool(workers=0, max_pending=1_000_000)),
+        (f"pool workers={workers}", auth_utils.PasswordPool(workers=workers)),
+    ):
+        auth_utils.password_pool = pool
+        if pool.workers:
+            pool.run(auth_utils._verify, PASSWORD, auth_utils._hash(PASSWORD))  # start the workers
+        feed_ms, logins = asyncio.run(run())
+        p50, p99 = feed_ms[len(feed_ms) // 2], feed_ms[int(len(feed_ms) * 0.99) - 1]
+        print(f"{name:<22} {len(feed_ms) / SECONDS:>10.1f} {p50:>8.1f} {p99:>8.1f} {logins[200]:>10} {logins[503]:>10}")
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Upstream calls per cache expiry for one hot key: the old read-through
+(get_json -> miss -> compute -> set_json) vs cache.get_or_compute (XFetch
+early refresh + Redis lock). Each thread stands in for a worker process
+(L1 disabled) hammering the same key; compute sleeps to mimic the AI call.
+
+Uses REDIS_URL when a server answers there, otherwise fakeredis if it is
+installed (pip install "fakeredis[lua]").
+
+    PYTHONPATH=. python scripts/bench_cache_stampede.py [workers] [seconds] [ttl_s] [compute_ms]
+"""
+import os
+import sys
+import threading
+import time
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 30.0
+TTL = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+COMPUTE_MS = float(sys.argv[4]) if len(sys.argv) > 4 else 100.0
+THINK_MS = 5.0
+
+os.environ["REDIS_ENABLED"] = "false"  # we wire the client in below
+
+
+def redis_client():
+    import redis
+
+    url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    client = redis.from_url(url, decode_responses=True)
+    try:
+        client.ping()
+        return client, url
+    except redis.RedisError:
+        pass
+    try:
+        import fakeredis
+    except ModuleNotFoundError:
+        sys.exit(f"no Redis at {url} and fakeredis is not installed")
+    return fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True), "fakeredis"
+
+
+def main():
+    from backend.app.cache import cache
+
+    client, where = redis_client()
+    cache._client = client
+    cache._available = True
+    cache._l1 = None  # every thread behaves like a separate worker
+
+    def run(name, read):
+        key = f"trending:bench:{name}"
+        client.delete(key, f"lock:{key}")
+        upstream = []
+        latencies = []
+        stop = time.monotonic() + SECONDS
+
+        def compute():
+            upstream.append(time.monotonic())
+            time.sleep(COMPUTE_MS / 1000.0)
+            return [{"movie_id": i} for i in range(20)]
+
+        def worker():
+            while time.monotonic() < stop:
+                t0 = time.perf_counter()
+                read(key, compute)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                time.sleep(THINK_MS / 1000.0)
+
+        threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        latencies.sort()
+        expiries = SECONDS / TTL
+        p99, worst = latencies[int(len(latencies) * 0.99) - 1], latencies[-1]
+        # largest number of upstream calls that started within one compute window
+        burst = max(sum(1 for u in upstream if t <= u < t + COMPUTE_MS / 1000.0) for t in upstream)
+        print(f"{name:<15} {len(upstream):>9} {len(upstream) / expiries:>12.1f} {burst:>10} {p99:>8.1f} {worst:>8.1f}")
+
+    def naive(key, compute):
+        value = cache.get_json(key)
+        if value is None:
+            value = compute()
+            cache.set_json(key, value, TTL)
+        return value
+
+    def protected(key, compute):
+        return cache.get_or_compute(key, TTL, compute)
+
+    print(f"redis={where} workers={WORKERS} duration={SECONDS:.0f}s ttl={TTL}s compute={COMPUTE_MS:.0f}ms")
+    print(f"{'read path':<15} {'upstream':>9} {'per expiry':>12} {'max burst':>10} {'p99 ms':>8} {'max ms':>8}")
+    run("read-through", naive)
+    run("get_or_compute", protected)
+    print("stampede counters:", cache.tier_stats()["stampede"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+/feed/home throughput at fixed concurrency: the async handler vs the previous
+sync handler (blocking httpx call on the threadpool), both against a local
+stub AI server with a fixed think time. Cache is disabled so every request
+goes to the AI service.
+
+    PYTHONPATH=. python scripts/bench_feed_concurrency.py [concurrency] [requests] [ai_ms]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONCURRENCY = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+AI_MS = float(sys.argv[3]) if len(sys.argv) > 3 else 50.0
+
+BODY = json.dumps(
+    {"items": [{"movie_id": i, "score": 0.5, "rank": i} for i in range(1, 21)], "meta": {"latency_ms": AI_MS}}
+).encode()
+
+
+class StubAI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(AI_MS / 1000.0)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *_args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def serve_stub(port_queue):
+    server = Server(("127.0.0.1", 0), StubAI)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def main():
+    # stub runs in its own process so its threads don't compete for our GIL
+    port_queue = multiprocessing.Queue()
+    stub = multiprocessing.Process(target=serve_stub, args=(port_queue,), daemon=True)
+    stub.start()
+
+    os.environ["AI_BASE_URL"] = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+    os.environ.setdefault("REDIS_ENABLED", "false")
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    os.environ.setdefault("JWT_SECRET", "bench-secret-key-that-is-at-least-32-characters")
+
+    import logging
+
+    import httpx
+
+    from backend.app.ai_client import get_ai_recommendations
+    from backend.app.auth import get_current_user
+    from backend.app.feed import FeedResponse, transform_ai_item
+    from backend.app.main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app.dependency_overrides[get_current_user] = lambda: {"id": "bench-user", "email": "bench@example.com"}
+
+    @app.get("/bench/home-sync", response_model=FeedResponse)
+    def home_feed_sync(limit: int = 20, offset: int = 0) -> FeedResponse:
+        # the handler as it was before: sync def, blocking AI call on the threadpool
+        ai_items = get_ai_recommendations(user_id="bench-user", limit=limit, offset=offset, use_cache=False)
+        items = [transform_ai_item(item) for item in ai_items]
+        return FeedResponse(user_id="bench-user", items=items, next_offset=offset + len(items), source="ai")
+
+    async def run(path):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            sem = asyncio.Semaphore(CONCURRENCY)
+            latencies = []
+
+            async def one():
+                async with sem:
+                    t0 = time.perf_counter()
+                    r = await client.get(path)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    assert r.status_code == 200 and r.json()["source"] == "ai", r.text
+
+            await one()  # warm the pools
+            latencies.clear()
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(REQUESTS)))
+            elapsed = time.perf_counter() - t0
+        latencies.sort()
+        return REQUESTS / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+    print(f"concurrency={CONCURRENCY} requests={REQUESTS} stub AI think time={AI_MS:.0f}ms")
+    print(f"{'handler':<8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, path in (("sync", "/bench/home-sync"), ("async", "/feed/home?use_cache=false")):
+        if name == "async":
+            import backend.app.feed as feed
+
+            real = feed.get_ai_recommendations_async
+
+            async def no_cache(**kwargs):
+                return await real(use_cache=False, **kwargs)
+
+            feed.get_ai_recommendations_async = no_cache
+        rps, p50, p99 = asyncio.run(run(path))
+        print(f"{name:<8} {rps:>8.1f} {p50:>8.1f} {p99:>8.1f}")
+
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
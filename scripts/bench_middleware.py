@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Requests/sec on /health and /feed/home with the previous BaseHTTPMiddleware
+versions of SecurityHeadersMiddleware/RequestIDMiddleware vs the pure ASGI
+ones now in main.py. The AI call is stubbed in-process (returns a fixed
+page), so the numbers are the framework + middleware cost per request.
+
+    PYTHONPATH=. python scripts/bench_middleware.py [requests] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+os.environ.setdefault("REDIS_ENABLED", "false")
+os.environ.setdefault("CATALOG_ENABLED", "false")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "bench-secret-key-that-is-at-least-32-characters")
+os.environ.setdefault("RATE_LIMIT_DEFAULT", "1000000/minute")
+
+ITEMS = [{"movie_id": i, "title": f"Movie {i}", "score": 0.5, "rank": i} for i in range(1, 21)]
+
+
+def main():
+    import logging
+
+    import httpx
+    from starlette.middleware import Middleware
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    import backend.app.feed as feed
+    import backend.app.main as main_module
+    from backend.app.auth import get_current_user
+
+    app = main_module.app
+    logging.disable(logging.INFO)
+    app.dependency_overrides[get_current_user] = lambda: {"id": "bench-user", "email": "bench@example.com"}
+
+    async def stub_ai(**_kwargs):
+        return ITEMS
+
+    feed.get_ai_recommendations_async = stub_ai
+
+    # the middlewares as they were before
+    class OldSecurityHeadersMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            response = await call_next(request)
+            for name, value in main_module.SECURITY_HEADERS:
+                response.headers[name] = value
+            return response
+
+    class OldRequestIDMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+            request.state.request_id = request_id
+            response = await call_next(request)
+            response.headers["X-Request-ID"] = request_id
+            return response
+
+    new_stack = list(app.user_middleware)
+    swap = {
+        main_module.SecurityHeadersMiddleware: OldSecurityHeadersMiddleware,
+        main_module.RequestIDMiddleware: OldRequestIDMiddleware,
+    }
+    old_stack = [Middleware(swap[m.cls]) if m.cls in swap else m for m in new_stack]
+
+    async def run(path):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            sem = asyncio.Semaphore(CONCURRENCY)
+
+            async def one():
+                async with sem:
+                    r = await client.get(path)
+                    assert r.status_code == 200 and "x-request-id" in r.headers, r.text
+
+            await asyncio.gather(*(one() for _ in range(100)))  # warm up
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(REQUESTS)))
+            return REQUESTS / (time.perf_counter() - t0)
+
+    print(f"requests={REQUESTS} concurrency={CONCURRENCY} cpus={os.cpu_count()}")
+    print(f"{'path':<12} {'BaseHTTPMiddleware':>19} {'pure ASGI':>10} {'change':>8}")
+    for path in ("/health", "/feed/home"):
+        results = []
+        for stack in (old_stack, new_stack):
+            app.user_middleware = stack
+            app.middleware_stack = None  # rebuilt on the next request
+            results.append(asyncio.run(run(path)))
+        before, after = results
+        print(f"{path:<12} {before:>19.0f} {after:>10.0f} {(after / before - 1) * 100:>+7.0f}%")
+
+
+if __name__ == "__main__":
+    main()
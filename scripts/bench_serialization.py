@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Serialization cost of an /ai/recommend payload, per response size and encoder."""
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+from aii.explanations.reason_generator import ReasonInput, generate_reason
+from aii.serving.responses import msgpack, orjson
+
+TITLES = {i: f"Movie {i} (199{i % 10})" for i in range(1, 200)}
+GENRES = {i: {"drama", "comedy", "sci-fi"} if i % 2 else {"drama", "thriller"} for i in range(1, 200)}
+
+
+def make_payload(n):
+    items = []
+    for rank in range(1, n + 1):
+        reason = generate_reason(
+            ReasonInput(
+                user_id=1,
+                rec_movie_id=rank,
+                seed_movie_id=rank + 100,
+                movie_title=TITLES,
+                movie_genres=GENRES,
+            )
+        )
+        items.append(
+            {
+                "movie_id": rank,
+                "score": 1.0 - rank / (n + 1),
+                "rank": rank,
+                "explanation": {
+                    "primary_reason": reason["primary_reason"],
+                    "confidence": float(reason["confidence"]),
+                    "text": reason["text"],
+                    "factors": reason["factors"],
+                },
+            }
+        )
+    return {
+        "request_id": "bench",
+        "user_id": 1,
+        "model": {"name": "ibcf", "version": "v1", "trained_at": None},
+        "generated_at": "2026-01-01T00:00:00Z",
+        "ttl_seconds": 900,
+        "items": items,
+        "meta": {"latency_ms": 3, "degraded": False},
+    }
+
+
+def fastapi_default(payload):
+    # what a plain `return {...}` costs: jsonable_encoder + JSONResponse.render
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def main():
+    encoders = [("fastapi default", fastapi_default)]
+    if orjson is not None:
+        encoders.append(("orjson", orjson.dumps))
+    if msgpack is not None:
+        encoders.append(("msgpack", lambda p: msgpack.packb(p, use_bin_type=True)))
+
+    print(f"{'items':>5}  {'encoder':<16} {'us/response':>12} {'bytes':>8}")
+    for n in (10, 20, 50):
+        payload = make_payload(n)
+        for name, fn in encoders:
+            number = 2000
+            secs = min(timeit.repeat(lambda: fn(payload), number=number, repeat=5))
+            print(f"{n:>5}  {name:<16} {secs / number * 1e6:>12.1f} {len(fn(payload)):>8}")
+
+
+if __name__ == "__main__":
+    main()
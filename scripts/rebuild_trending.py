@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild the trending sorted set from historical ratings and watch_events.
+
+The backend rebuilds the set itself every TRENDING_REBUILD_INTERVAL; run
+this after loading data to fill it right away. MovieLens timestamps are
+years old, so `--as-of latest` decays relative to the newest rating instead
+of now (otherwise everything has decayed away); set TRENDING_REBUILD_AS_OF
+to match for the in-app rebuild.
+
+    PYTHONPATH=. python scripts/rebuild_trending.py [--as-of now|latest|<unix ts>]
+"""
+import argparse
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--as-of", default="now", help="now, latest (newest rating) or a unix timestamp")
+    args = parser.parse_args()
+
+    from backend.app import trending
+    from backend.app.cache import cache
+    from backend.session import SessionLocal
+
+    if not cache.is_available:
+        raise SystemExit("Redis is unavailable (check REDIS_URL)")
+
+    db = SessionLocal()
+    try:
+        as_of = trending.resolve_as_of(db, args.as_of)
+        t0 = time.perf_counter()
+        scored = trending.rebuild_from_db(db, as_of)
+        print(f"scored {scored} movies in {time.perf_counter() - t0:.1f}s")
+        print("top 10:", [movie_id for movie_id, _ in trending.trending_page(10)])
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -35,3 +35,82 @@ def test_ibcf_smoke(tmp_path):
     assert isinstance(out, list)
     assert len(out) <= 2
     assert all("movie_id" in r and "score" in r for r in out)
+
+
+def test_ibcf_expired_deadline_degrades_to_popular(tmp_path):
+    import time
+    from aii.models.ibcf import RecommendTrace
+
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    pd.DataFrame({"movie_id": [10, 20, 30], "title": ["A", "B", "C"]}).to_csv(processed / "movies.csv", index=False)
+    pd.DataFrame(
+        {"user_id": [1, 1, 2, 2], "movie_id": [10, 20, 10, 30], "rating": [5.0, 4.0, 3.0, 4.0], "timestamp": [1, 2, 3, 4]}
+    ).to_csv(processed / "ratings.csv", index=False)
+    pd.DataFrame({"movie_id": [30, 10, 20], "rating_count": [2, 1, 1]}).to_csv(
+        processed / "popular_movies.csv", index=False
+    )
+
+    rec = IBCFRecommender(ModelConfig(processed_dir=str(processed), min_user_history=1))
+    rec.load()
+    rec.fit()
+
+    trace = RecommendTrace()
+    out = rec.recommend(user_id=1, limit=2, deadline=time.monotonic() - 1, trace=trace)
+
+    assert trace.degraded
+    assert trace.seeds_expanded == 0
+    assert out and all(r["explanation"]["primary_reason"] == "popular" for r in out)
+
+    trace = RecommendTrace()
+    rec.recommend(user_id=1, limit=2, deadline=time.monotonic() + 60, trace=trace)
+    assert not trace.degraded
+    assert trace.seeds_expanded == 2
+
+
+def test_ibcf_ranking_cache_matches_fresh_scoring(tmp_path):
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    pd.DataFrame({"movie_id": [10, 20, 30, 40], "title": ["A", "B", "C", "D"]}).to_csv(
+        processed / "movies.csv", index=False
+    )
+    pd.DataFrame(
+        {
+            "user_id": [1, 1, 2, 2, 2, 3, 3],
+            "movie_id": [10, 20, 10, 30, 40, 20, 40],
+            "rating": [5.0, 4.0, 3.0, 4.0, 5.0, 2.0, 5.0],
+            "timestamp": [1, 2, 3, 4, 5, 6, 7],
+        }
+    ).to_csv(processed / "ratings.csv", index=False)
+    pd.DataFrame({"movie_id": [10, 20, 30, 40], "rating_count": [2, 2, 1, 2]}).to_csv(
+        processed / "popular_movies.csv", index=False
+    )
+
+    cfg = ModelConfig(processed_dir=str(processed), min_user_history=1, min_common_raters=1)
+    fresh = IBCFRecommender(cfg)
+    fresh.load()
+    fresh.fit()
+    expected = fresh.recommend(user_id=1, limit=5)
+
+    warmed = IBCFRecommender(cfg)
+    warmed.load()
+    warmed.fit()
+    assert warmed.rank_batch(warmed.most_active_users(3)) == 3
+
+    from aii.models.ibcf import RecommendTrace
+
+    trace = RecommendTrace()
+    assert warmed.recommend(user_id=1, limit=5, trace=trace) == expected
+    assert trace.cache_hit
+
+
+def test_ibcf_ranking_cache_capped_by_memory():
+    # 10 rows * 24 bytes per entry: room for two users
+    rec = IBCFRecommender(ModelConfig(ranked_cache_mb=500 / (1024 * 1024)))
+    ranked = [(mid, 1.0 - mid / 100, None if mid % 2 else 7) for mid in range(10)]
+    for uid in (1, 2, 3):
+        rec._ranked_put(uid, ranked)
+
+    assert list(rec._ranked) == [2, 3]
+    assert rec._ranked_bytes == 480
+    assert rec._cached_window(3, limit=3, offset=0, exclude={1}) == ranked[:1] + ranked[2:4]
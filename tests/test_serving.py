@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import aii.serving.app as serving
+from aii.models.ibcf import IBCFRecommender, ModelConfig
+from aii.serving.executor import Overloaded, ScoringExecutor
+
+HEADERS = {"X-Internal-Token": serving.INTERNAL_TOKEN}
+
+
+@pytest.fixture
+def model(tmp_path):
+    processed = tmp_path / "processed"
+    processed.mkdir()
+
+    pd.DataFrame({"movie_id": [10, 20, 30, 40], "title": ["A", "B", "C", "D"]}).to_csv(
+        processed / "movies.csv", index=False
+    )
+    pd.DataFrame(
+        {
+            "user_id": [1, 1, 1, 2, 2, 2, 3, 3],
+            "movie_id": [10, 20, 30, 10, 20, 40, 20, 30],
+            "rating": [5.0, 4.0, 2.0, 4.0, 5.0, 5.0, 3.0, 5.0],
+            "timestamp": [1, 2, 3, 4, 5, 6, 7, 8],
+        }
+    ).to_csv(processed / "ratings.csv", index=False)
+    pd.DataFrame({"movie_id": [20, 10, 30, 40], "rating_count": [3, 2, 2, 1]}).to_csv(
+        processed / "popular_movies.csv", index=False
+    )
+
+    m = IBCFRecommender(ModelConfig(processed_dir=str(processed), min_user_history=1, min_common_raters=1))
+    m.load()
+    m.fit()
+    return m
+
+
+@pytest.fixture
+def warmup_state(monkeypatch):
+    """A fresh module-level warm-up status, restored after the test."""
+    state = {"state": "pending", "users_total": 0, "users_done": 0, "elapsed_ms": 0}
+    monkeypatch.setattr(serving, "warmup", state)
+    return state
+
+
+@pytest.fixture
+def client(model, monkeypatch):
+    # no `with`: skip the startup hook, which loads the real dataset
+    monkeypatch.setattr(serving, "model", model)
+    return TestClient(serving.app)
+
+
+def test_recommend_runs_on_scoring_executor(client):
+    r = client.post("/ai/recommend", json={"request_id": "r1", "user_id": 1, "limit": 2}, headers=HEADERS)
+    assert r.status_code == 200
+    assert r.json()["items"]
+
+    body = client.get("/metrics").text
+    assert "ai_scoring_queue_depth 0" in body
+    assert "ai_scoring_submitted_total" in body
+
+
+def test_recommend_reports_stage_timings(client):
+    r = client.post(
+        "/ai/recommend",
+        json={"request_id": "t1", "user_id": 1, "limit": 2, "include_timings": True},
+        headers=HEADERS,
+    )
+    timings = r.json()["meta"]["timings"]
+    assert timings["path"] == "history"
+    assert timings["history_size"] == 3
+    assert set(timings["stages_ms"]) == {"candidates", "rank", "explain"}
+
+    r = client.post("/ai/recommend", json={"request_id": "t2", "user_id": 1, "limit": 2}, headers=HEADERS)
+    assert "timings" not in r.json()["meta"]
+
+    body = client.get("/metrics").text
+    assert 'ai_recommend_stage_seconds_count{stage="explain"}' in body
+    assert 'ai_request_latency_seconds_bucket{endpoint="recommend",le="+Inf"}' in body
+
+
+def test_recommend_fast_fails_when_overloaded(client, monkeypatch):
+    async def _full(*_args, **_kwargs):
+        raise Overloaded("full")
+
+    monkeypatch.setattr(serving.scoring, "run", _full)
+    r = client.post("/ai/recommend", json={"request_id": "r2", "user_id": 1}, headers=HEADERS)
+    assert r.status_code == 503
+    assert r.json()["detail"]["error"]["code"] == "OVERLOADED"
+
+
+def test_executor_rejects_beyond_queue_bound():
+    ex = ScoringExecutor(max_workers=1, max_queue=1)
+    gate = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(ex.run(gate.wait, 5))
+        queued = asyncio.ensure_future(ex.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Overloaded):
+            await ex.run(lambda: "rejected")
+        gate.set()
+        return await asyncio.gather(running, queued)
+
+    assert asyncio.run(scenario()) == [True, "queued"]
+    stats = ex.stats()
+    assert stats["rejected_total"] == 1
+    assert stats["queue_depth"] == 0
+    ex.shutdown()
+
+
+def test_background_call_waits_for_requests():
+    """Low-priority work only starts once no request is queued or running."""
+    ex = ScoringExecutor(max_workers=2, max_queue=0)
+    gate = threading.Event()
+    order = []
+
+    async def scenario():
+        request = asyncio.ensure_future(ex.run(lambda: gate.wait(5) and order.append("request")))
+        await asyncio.sleep(0.02)
+        background = asyncio.ensure_future(ex.run_background(order.append, "background", poll_s=0.005))
+        await asyncio.sleep(0.05)
+        assert order == [] and not background.done()
+        gate.set()
+        await asyncio.gather(request, background)
+
+    asyncio.run(scenario())
+    assert order == ["request", "background"]
+    assert ex.stats()["background_running"] == 0
+    ex.shutdown()
+
+
+def test_recommend_negotiates_msgpack(client):
+    msgpack = pytest.importorskip("msgpack")
+    r = client.post(
+        "/ai/recommend",
+        json={"request_id": "r3", "user_id": 1, "limit": 2},
+        headers={**HEADERS, "Accept": "application/msgpack"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/msgpack")
+    assert msgpack.unpackb(r.content, raw=False)["request_id"] == "r3"
+
+
+def test_warm_up_ranks_most_active_users(model, client, warmup_state):
+    asyncio.run(serving._warm_up(model, n_users=2, budget_s=10))
+    assert warmup_state["state"] == "done"
+    assert warmup_state["users_done"] == 2
+    assert client.get("/health").json()["warmup"]["state"] == "done"
+
+    r = client.post(
+        "/ai/recommend",
+        json={"request_id": "w1", "user_id": model.most_active_users(1)[0], "limit": 2, "include_timings": True},
+        headers=HEADERS,
+    )
+    assert r.json()["meta"]["timings"]["cache_hit"] is True
+
+
+def test_warm_up_reports_batch_cut_by_deadline(model, warmup_state, monkeypatch):
+    """users_done counts only ranked users; a batch cut short by the deadline is not "done"."""
+
+    def slow_rank_batch(user_ids, deadline=None):
+        time.sleep(0.05)  # runs past the deadline after one user
+        return 1
+
+    monkeypatch.setattr(model, "rank_batch", slow_rank_batch)
+    asyncio.run(serving._warm_up(model, n_users=3, budget_s=0.01))
+    assert warmup_state["state"] == "budget_exhausted"
+    assert warmup_state["users_done"] == 1